@@ -2,10 +2,10 @@
 
 try:
     from app.core.config import settings
-    from app.core.database import get_db, create_tables
+    from app.core.database import get_db, session_scope, create_tables
     from app.core.exceptions import AppError, ProductNotFoundError, InsufficientStockError
     
-    __all__ = ["settings", "get_db", "create_tables", "AppError", "ProductNotFoundError", "InsufficientStockError"]
+    __all__ = ["settings", "get_db", "session_scope", "create_tables", "AppError", "ProductNotFoundError", "InsufficientStockError"]
     
 except ImportError as e:
     import logging
@@ -28,7 +28,10 @@ except ImportError as e:
     def get_db():
         pass
     
+    def session_scope():
+        pass
+    
     def create_tables():
         pass
     
-    __all__ = ["settings", "get_db", "create_tables", "AppError", "ProductNotFoundError", "InsufficientStockError"]
\ No newline at end of file
+    __all__ = ["settings", "get_db", "session_scope", "create_tables", "AppError", "ProductNotFoundError", "InsufficientStockError"]
\ No newline at end of file
@@ -20,8 +20,66 @@ class Settings(BaseSettings):
     # Database
     database_url: str = Field(default="sqlite:///./data/apple_store.db")
     
+    # Database connection pool
+    db_pool_size: int = Field(default=10)
+    db_max_overflow: int = Field(default=20)
+    db_pool_timeout: float = Field(default=30.0)  # seconds to wait for a free connection
+    
+    # SQLite tuning (applied to every new connection)
+    db_journal_mode: str = Field(default="WAL")
+    db_synchronous: str = Field(default="NORMAL")
+    db_mmap_size: int = Field(default=256 * 1024 * 1024)  # 256MB
+    db_cache_size: int = Field(default=-64000)  # negative values are KiB, i.e. ~64MB
+    db_busy_timeout: int = Field(default=5000)  # milliseconds
+    
+    # Group commit: one writer thread commits cart, order and sign-up writes together
+    write_coordinator_enabled: bool = Field(default=False)
+    write_group_max_ops: int = Field(default=64)  # writes per commit at most
+    write_group_max_delay_ms: float = Field(default=2.0)  # how long a commit waits to gather more writes
+    write_wait_timeout_seconds: float = Field(default=30.0)  # callers stop waiting for a group commit after this
+    
+    # Worker threads for blocking DB and password-hashing calls made from UI handlers
+    blocking_pool_size: int = Field(default=8)
+    
+    # Catalog
+    catalog_cache_max_entries: int = Field(default=1024)
+    catalog_cache_ttl_seconds: float = Field(default=300.0)
+    search_suggestion_limit: int = Field(default=8)
+    search_debounce_ms: int = Field(default=150)  # browser waits this long after the last keystroke
+    home_snapshot_refresh_seconds: float = Field(default=300.0)  # rebuilt at least this often
+    home_snapshot_debounce_seconds: float = Field(default=1.0)  # wait for a burst of catalog writes to settle
+    
+    # Per-browser UI session state ("memory" or "sqlite"; sqlite shares state across worker processes)
+    session_backend: str = Field(default="memory")
+    session_store_path: str = Field(default="./data/sessions.db")
+    session_ttl_seconds: float = Field(default=3600.0)  # idle time before a session is dropped
+    session_max_entries: int = Field(default=100000)
+    session_max_bytes: int = Field(default=64 * 1024 * 1024)  # 64MB, memory backend only
+    
+    # Stock reservations (holds placed when items are added to a cart)
+    reservations_enabled: bool = Field(default=False)
+    reservation_ttl_seconds: int = Field(default=900)
+    reservation_sweep_interval_seconds: float = Field(default=30.0)
+    reservation_sweep_batch_size: int = Field(default=500)
+    
+    # Checkout
+    checkout_key_ttl_seconds: int = Field(default=86400)  # how long a repeated checkout returns the first order
+    order_queue_workers: int = Field(default=2)  # threads committing queued orders; 0 commits in the caller
+    order_queue_max_depth: int = Field(default=500)  # queued checkouts beyond this are turned away
+    order_queue_batch_size: int = Field(default=32)  # orders committed per transaction
+    orders_page_size: int = Field(default=20)  # orders per page of order history
+    
+    # Sales analytics
+    sales_analytics_chunk_orders: int = Field(default=100000)  # orders whose lines are read per query
+    sales_analytics_refresh_seconds: float = Field(default=60.0)  # reports older than this read new orders first
+    
     # Security
     secret_key: str = Field(default="your-secret-key-change-in-production")
+    bcrypt_rounds: int = Field(default=12)  # stored hashes with other rounds are upgraded on login
+    password_hash_workers: int = Field(default=2)  # bcrypt worker processes; 0 hashes in the calling thread
+    session_token_ttl_seconds: float = Field(default=7 * 24 * 3600.0)  # sign-in lifetime, renewed while in use
+    user_cache_max_entries: int = Field(default=10000)
+    user_cache_ttl_seconds: float = Field(default=300.0)
     
     # Server
     host: str = Field(default="0.0.0.0")
@@ -1,47 +1,196 @@
 """Database configuration and session management using SQLAlchemy V2"""
-from sqlalchemy import create_engine, event
-from sqlalchemy.orm import DeclarativeBase, Session
-from sqlalchemy.pool import StaticPool
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.orm import DeclarativeBase, Session, sessionmaker
+from sqlalchemy.pool import QueuePool, StaticPool
 from app.core.config import settings
+from app.core.search_index import create_product_search_index
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+import threading
 import logging
 
 logger = logging.getLogger(__name__)
 
-# Create engine with proper SQLite configuration
-engine = create_engine(
-    settings.database_url,
-    echo=settings.debug,
-    poolclass=StaticPool,
-    connect_args={
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Apply the configured SQLite pragmas to a freshly opened connection"""
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA journal_mode={settings.db_journal_mode}")
+        cursor.execute(f"PRAGMA synchronous={settings.db_synchronous}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.db_mmap_size)}")
+        cursor.execute(f"PRAGMA cache_size={int(settings.db_cache_size)}")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.db_busy_timeout)}")
+    finally:
+        cursor.close()
+
+def create_db_engine(database_url: str) -> Engine:
+    """Create an engine with the pool profile configured in settings"""
+    url = make_url(database_url)
+    
+    if url.get_backend_name() != "sqlite":
+        return create_engine(
+            url,
+            echo=settings.debug,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_pre_ping=True
+        )
+    
+    connect_args = {
         "check_same_thread": False,
-        "timeout": 20
+        "timeout": settings.db_busy_timeout / 1000
     }
-)
+    
+    if url.database in (None, "", ":memory:"):
+        # An in-memory database only exists inside its single connection
+        sqlite_engine = create_engine(
+            url,
+            echo=settings.debug,
+            poolclass=StaticPool,
+            connect_args=connect_args
+        )
+    else:
+        sqlite_engine = create_engine(
+            url,
+            echo=settings.debug,
+            poolclass=QueuePool,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            connect_args=connect_args
+        )
+    
+    event.listen(sqlite_engine, "connect", _set_sqlite_pragmas)
+    return sqlite_engine
+
+# Create engine with the tuned connection pool
+engine = create_db_engine(settings.database_url)
+
+# Objects stay usable after commit so UI code can read them once the scope closes
+SessionLocal = sessionmaker(bind=engine, expire_on_commit=False)
+
+# Session bound to the current page render or event handler, if any
+_current_session: ContextVar[Optional[Session]] = ContextVar("current_session", default=None)
+
+_session_stats_lock = threading.Lock()
+_session_stats = {"opened": 0, "closed": 0}
 
 class Base(DeclarativeBase):
     """Base class for all SQLAlchemy models"""
     pass
 
+def _ensure_columns():
+    """Add nullable columns added to models after their tables already existed"""
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {column_type}'))
+                logger.info(f"Added column {table.name}.{column.name}")
+
+def _merge_duplicate_cart_items():
+    """Merge repeated lines for one product in one cart, so the unique cart/product index can be created"""
+    inspector = inspect(engine)
+    if not inspector.has_table("cart_items"):
+        return
+    if any(index["name"] == "ux_cart_items_cart_product" for index in inspector.get_indexes("cart_items")):
+        return
+    with engine.begin() as connection:
+        # The oldest line of each product keeps the summed quantity; the others are deleted
+        merged = connection.execute(text(
+            "UPDATE cart_items SET quantity = ("
+            " SELECT SUM(duplicate.quantity) FROM cart_items AS duplicate"
+            " WHERE duplicate.cart_id = cart_items.cart_id AND duplicate.product_id = cart_items.product_id"
+            ") WHERE id IN ("
+            " SELECT MIN(id) FROM cart_items GROUP BY cart_id, product_id HAVING COUNT(*) > 1"
+            ")"
+        )).rowcount
+        if merged:
+            deleted = connection.execute(text(
+                "DELETE FROM cart_items WHERE id NOT IN ("
+                " SELECT MIN(id) FROM cart_items GROUP BY cart_id, product_id"
+                ")"
+            )).rowcount
+            logger.info(f"Merged {deleted} duplicate cart lines into {merged}")
+
+def _ensure_indexes():
+    """Create indexes added to models after their tables already existed"""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
 def create_tables():
     """Create all database tables"""
     try:
         Base.metadata.create_all(bind=engine)
+        _ensure_columns()
+        _merge_duplicate_cart_items()
+        _ensure_indexes()
+        create_product_search_index(engine)
         logger.info("Database tables created successfully")
     except Exception as e:
         logger.error(f"Error creating database tables: {e}")
         raise
 
-def get_db() -> Session:
+@contextmanager
+def session_scope() -> Iterator[Session]:
+    """Unit of work for one interaction, reusing the enclosing scope's session"""
+    session = _current_session.get()
+    if session is not None:
+        yield session
+        return
+    
+    session = SessionLocal()
+    token = _current_session.set(session)
+    with _session_stats_lock:
+        _session_stats["opened"] += 1
+    try:
+        yield session
+    except Exception as e:
+        session.rollback()
+        logger.error(f"Database session error: {e}")
+        raise
+    finally:
+        _current_session.reset(token)
+        session.close()
+        with _session_stats_lock:
+            _session_stats["closed"] += 1
+
+def get_db() -> Iterator[Session]:
     """Database session dependency"""
-    with Session(engine) as session:
-        try:
-            yield session
-        except Exception as e:
-            session.rollback()
-            logger.error(f"Database session error: {e}")
-            raise
-        finally:
-            session.close()
+    with session_scope() as session:
+        yield session
+
+def dialect_insert(db: Session):
+    """INSERT construct with ON CONFLICT support for the session's database"""
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+def begin_write(db: Session):
+    """Make the session's transaction a write transaction, so savepoints nest inside it and reads see the latest commit"""
+    # pysqlite only begins before DML; a SAVEPOINT outside a transaction would commit on release.
+    # A connection already in a transaction has written, so it holds the write lock already.
+    if db.get_bind().dialect.name == "sqlite" and not db.connection().connection.dbapi_connection.in_transaction:
+        db.execute(text("BEGIN IMMEDIATE"))
+
+def get_session_stats() -> Dict[str, int]:
+    """Report how many scoped sessions are currently open"""
+    with _session_stats_lock:
+        opened = _session_stats["opened"]
+        closed = _session_stats["closed"]
+    return {"open": opened - closed, "opened_total": opened, "closed_total": closed}
 
 def init_sample_data():
     """Initialize the database with sample Apple products"""
@@ -211,7 +360,7 @@ def init_sample_data():
             
             session.commit()
             logger.info("Sample data initialized successfully")
-            
+        
         except Exception as e:
             session.rollback()
             logger.error(f"Error initializing sample data: {e}")
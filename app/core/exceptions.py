@@ -31,17 +31,45 @@ class CartEmptyError(AppError):
         message = "Cannot checkout with an empty cart"
         super().__init__(message, status_code=400)
 
+class CheckoutKeyConflictError(AppError):
+    """Raised when a checkout idempotency key was already used by another checkout"""
+    def __init__(self, key: str):
+        message = f"Checkout request {key} was already used"
+        super().__init__(message, status_code=409)
+
+class OrderQueueFullError(AppError):
+    """Raised when the order queue is at its configured depth and turns a checkout away"""
+    def __init__(self, depth: int):
+        message = f"We're receiving a lot of orders right now ({depth} waiting). Please try again in a moment."
+        super().__init__(message, status_code=503)
+
 class UserNotFoundError(AppError):
     """Raised when a user is not found"""
     def __init__(self, user_id: int):
         message = f"User with ID {user_id} not found"
         super().__init__(message, status_code=404)
 
+class InvalidCursorError(AppError):
+    """Raised when a pagination cursor cannot be decoded"""
+    def __init__(self, cursor: str):
+        message = f"Invalid pagination cursor: {cursor}"
+        super().__init__(message, status_code=400)
+
+class UnsupportedDatabaseError(AppError):
+    """Raised when a feature relies on SQL the configured database does not speak"""
+    def __init__(self, feature: str, dialect: str):
+        message = f"{feature} requires SQLite, but the database is {dialect}"
+        super().__init__(message, status_code=501)
+
 __all__ = [
     "AppError",
     "ProductNotFoundError", 
     "CategoryNotFoundError",
     "InsufficientStockError",
     "CartEmptyError",
-    "UserNotFoundError"
+    "CheckoutKeyConflictError",
+    "OrderQueueFullError",
+    "UserNotFoundError",
+    "InvalidCursorError",
+    "UnsupportedDatabaseError"
 ]
\ No newline at end of file
@@ -0,0 +1,88 @@
+"""Bounded thread pool for blocking database and password-hashing work"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+from app.core.config import settings
+import asyncio
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class BlockingExecutor:
+    """Runs blocking calls on a fixed number of worker threads, tracking queue depth"""
+    
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="blocking")
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.active = 0
+        self.completed = 0
+        self.failed = 0
+        self.max_queue_depth = 0
+        self._queue_wait_total = 0.0
+        self._queue_wait_max = 0.0
+    
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run `func` on a worker thread and await its result without blocking the event loop"""
+        submitted_at = time.perf_counter()
+        with self._lock:
+            self.queued += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.queued)
+        
+        def call():
+            waited = time.perf_counter() - submitted_at
+            with self._lock:
+                self.queued -= 1
+                self.active += 1
+                self._queue_wait_total += waited
+                self._queue_wait_max = max(self._queue_wait_max, waited)
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                with self._lock:
+                    self.failed += 1
+                raise
+            finally:
+                with self._lock:
+                    self.active -= 1
+                    self.completed += 1
+        
+        future = self._pool.submit(call)
+        future.add_done_callback(self._forget_if_cancelled)
+        return await asyncio.wrap_future(future)
+    
+    def _forget_if_cancelled(self, future):
+        """A call cancelled while still queued never runs, so it leaves the queue here"""
+        if future.cancelled():
+            with self._lock:
+                self.queued -= 1
+    
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, utilisation and queue wait counters"""
+        with self._lock:
+            started = self.completed + self.active
+            return {
+                "workers": self.max_workers,
+                "queued": self.queued,
+                "active": self.active,
+                "completed": self.completed,
+                "failed": self.failed,
+                "max_queue_depth": self.max_queue_depth,
+                "avg_queue_wait_ms": round(self._queue_wait_total / started * 1000, 3) if started else 0.0,
+                "max_queue_wait_ms": round(self._queue_wait_max * 1000, 3)
+            }
+    
+    def shutdown(self):
+        """Wait for running calls and stop the workers"""
+        self._pool.shutdown(wait=True)
+        logger.info("Blocking executor shut down")
+
+blocking_executor = BlockingExecutor(settings.blocking_pool_size)
+
+async def run_blocking(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a blocking call on the shared bounded pool"""
+    return await blocking_executor.run(func, *args, **kwargs)
+
+__all__ = ["BlockingExecutor", "blocking_executor", "run_blocking"]
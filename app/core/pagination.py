@@ -0,0 +1,28 @@
+"""Opaque cursors for keyset pagination"""
+from typing import Any, List, NamedTuple, Optional
+from app.core.exceptions import InvalidCursorError
+import base64
+import json
+
+class Page(NamedTuple):
+    """One page of results and the cursor for the page after it"""
+    items: List[Any]
+    next_cursor: Optional[str]
+
+def encode_cursor(values: List[Any]) -> str:
+    """Encode the keyset values of the last row on a page"""
+    payload = json.dumps(values, default=str, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> List[Any]:
+    """Decode a cursor produced by encode_cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise InvalidCursorError(cursor)
+    if not isinstance(values, list):
+        raise InvalidCursorError(cursor)
+    return values
+
+__all__ = ["Page", "encode_cursor", "decode_cursor"]
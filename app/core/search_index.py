@@ -0,0 +1,271 @@
+"""SQLite FTS5 full-text index over products, kept in sync by triggers, and the word index behind typo tolerance"""
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Set
+import json
+import math
+import re
+import unicodedata
+import logging
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "products_fts"
+
+# Column weights for bm25(): name, description, category_name
+BM25_WEIGHTS = (10.0, 2.0, 5.0)
+
+_CREATE_TABLE = f"""
+CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+    name, description, category_name,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+)
+"""
+
+_POPULATE = f"""
+INSERT INTO {FTS_TABLE}(rowid, name, description, category_name)
+SELECT p.id, p.name, COALESCE(p.description, ''), COALESCE(c.name, '')
+FROM products p LEFT JOIN categories c ON c.id = p.category_id
+"""
+
+_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name, description, category_name)
+        VALUES (new.id, new.name, COALESCE(new.description, ''),
+                COALESCE((SELECT name FROM categories WHERE id = new.category_id), ''));
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+    END
+    """,
+    # Only text columns are watched so stock and price updates never touch the index
+    f"""
+    CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF name, description, category_id ON products BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        INSERT INTO {FTS_TABLE}(rowid, name, description, category_name)
+        VALUES (new.id, new.name, COALESCE(new.description, ''),
+                COALESCE((SELECT name FROM categories WHERE id = new.category_id), ''));
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS categories_fts_au AFTER UPDATE OF name ON categories BEGIN
+        UPDATE {FTS_TABLE} SET category_name = new.name
+        WHERE rowid IN (SELECT id FROM products WHERE category_id = new.id);
+    END
+    """,
+]
+
+# Typo tolerance: a trigram index over the vocabulary of product names and descriptions. Query words
+# with no exact match are mapped to similar indexed words, which are then searched through FTS5.
+TERMS_TABLE = "search_terms"
+TRIGRAMS_TABLE = "search_term_trigrams"
+
+# Minimum trigram similarity for a vocabulary word to stand in for a query word
+SIMILARITY_THRESHOLD = 0.3
+
+def search_terms(value: str) -> List[str]:
+    """Lowercased, accent-stripped words of a text, as the unicode61 tokenizer sees them"""
+    folded = value.casefold()
+    if not folded.isascii():
+        folded = "".join(char for char in unicodedata.normalize("NFKD", folded) if not unicodedata.combining(char))
+    return re.findall(r"[^\W_]+", folded)
+
+def term_trigrams(term: str) -> Set[str]:
+    """Padded trigrams of one word, as pg_trgm builds them"""
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+@lru_cache(maxsize=65536)
+def trigram_similarity(left: str, right: str) -> float:
+    """Shared trigrams over all trigrams of two words"""
+    left_trigrams, right_trigrams = term_trigrams(left), term_trigrams(right)
+    shared = len(left_trigrams & right_trigrams)
+    return shared / (len(left_trigrams) + len(right_trigrams) - shared)
+
+def _indexed_terms(value: str) -> Set[str]:
+    """Distinct words of a text worth correcting to; numbers such as model years and SKUs are left out"""
+    return {term for term in search_terms(value or "") if not term.isdigit()}
+
+_CREATE_TERM_TABLES = [
+    f"""
+    CREATE TABLE IF NOT EXISTS {TERMS_TABLE} (
+        id INTEGER PRIMARY KEY,
+        term TEXT NOT NULL UNIQUE,
+        trigram_count INTEGER NOT NULL
+    )
+    """,
+    f"""
+    CREATE TABLE IF NOT EXISTS {TRIGRAMS_TABLE} (
+        trigram TEXT NOT NULL,
+        term_id INTEGER NOT NULL,
+        PRIMARY KEY (trigram, term_id)
+    ) WITHOUT ROWID
+    """,
+]
+
+_KNOWN_TERMS = text(f"SELECT id, term FROM {TERMS_TABLE} WHERE term IN (SELECT value FROM json_each(:terms))")
+
+_INSERT_TERM = text(f"INSERT OR IGNORE INTO {TERMS_TABLE}(term, trigram_count) VALUES (:term, :trigram_count)")
+
+_INSERT_TRIGRAM = text(f"INSERT OR IGNORE INTO {TRIGRAMS_TABLE}(trigram, term_id) VALUES (:trigram, :term_id)")
+
+def add_search_terms(conn: Connection, terms: Iterable[str]) -> int:
+    """Add the words missing from the vocabulary along with their trigrams; returns how many were new"""
+    terms = sorted(set(terms))
+    if not terms:
+        return 0
+    known = {term for _, term in conn.execute(_KNOWN_TERMS, {"terms": json.dumps(terms)})}
+    new = [term for term in terms if term not in known]
+    if not new:
+        return 0
+    conn.execute(_INSERT_TERM, [{"term": term, "trigram_count": len(term_trigrams(term))} for term in new])
+    conn.execute(_INSERT_TRIGRAM, [
+        {"trigram": trigram, "term_id": term_id}
+        for term_id, term in conn.execute(_KNOWN_TERMS, {"terms": json.dumps(new)})
+        for trigram in term_trigrams(term)
+    ])
+    return len(new)
+
+def index_product_terms(mapper, conn: Connection, product):
+    """Add the words of a product inserted or renamed in a flush to the vocabulary"""
+    state = inspect(product)
+    if not any(state.attrs[name].history.has_changes() for name in ("name", "description")):
+        return
+    if not _term_index_exists(conn):
+        return
+    # Words of the old text stay in the vocabulary, where they cost a little space but never match a product
+    add_search_terms(conn, _indexed_terms(f"{product.name} {product.description or ''}"))
+
+def rebuild_search_terms(conn: Connection) -> int:
+    """Add the words of every product to the vocabulary; run after products are written outside the app"""
+    terms: Set[str] = set()
+    for name, description in conn.execute(text("SELECT name, description FROM products")):
+        terms.update(_indexed_terms(f"{name} {description or ''}"))
+    added = add_search_terms(conn, terms)
+    if added:
+        logger.info(f"Added {added} words to the product search term index")
+    return added
+
+# Trigrams of a query word matched against the vocabulary, most similar first. Similarity is at most
+# shared / query trigrams, so words sharing fewer than threshold * query trigrams are dropped before the join.
+_SIMILAR_TERMS = text(f"""
+SELECT t.term, CAST(c.shared AS REAL) / (t.trigram_count + :trigram_count - c.shared) AS similarity
+FROM (
+    SELECT term_id, count(*) AS shared
+    FROM {TRIGRAMS_TABLE}
+    WHERE trigram IN (SELECT value FROM json_each(:trigrams))
+    GROUP BY term_id
+    HAVING count(*) >= :min_shared
+) c JOIN {TERMS_TABLE} t ON t.id = c.term_id
+WHERE similarity >= :threshold
+ORDER BY similarity DESC
+LIMIT :limit
+""")
+
+class SimilarTerm(NamedTuple):
+    """An indexed word close to a query word"""
+    term: str
+    similarity: float
+
+def similar_terms(db: Session, word: str, limit: int = 3) -> List[SimilarTerm]:
+    """Indexed words sharing the most trigrams with `word`"""
+    trigrams = term_trigrams(word)
+    rows = db.execute(_SIMILAR_TERMS, {
+        "trigrams": json.dumps(sorted(trigrams)),
+        "trigram_count": len(trigrams),
+        "min_shared": math.ceil(SIMILARITY_THRESHOLD * len(trigrams)),
+        "threshold": SIMILARITY_THRESHOLD,
+        "limit": limit
+    })
+    return [SimilarTerm(term, similarity) for term, similarity in rows]
+
+def _create_term_index(conn):
+    """Create the vocabulary trigram index and catch it up with every product"""
+    for statement in _CREATE_TERM_TABLES:
+        conn.execute(text(statement))
+    rebuild_search_terms(conn)
+
+# Whether the index exists, cached per database URL
+_index_available: Dict[str, bool] = {}
+
+# Whether the vocabulary tables exist, cached per database URL
+_term_index_available: Dict[str, bool] = {}
+
+def _term_index_exists(conn: Connection) -> bool:
+    """Check whether the vocabulary tables exist in this connection's database"""
+    key = str(conn.engine.url)
+    if key not in _term_index_available:
+        _term_index_available[key] = conn.dialect.name == "sqlite" and conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": TERMS_TABLE}
+        ).first() is not None
+    return _term_index_available[key]
+
+def create_product_search_index(engine: Engine) -> bool:
+    """Create the FTS5 table with its sync triggers and the term index; returns False if FTS5 is unavailable"""
+    if engine.dialect.name != "sqlite":
+        _index_available[str(engine.url)] = False
+        return False
+    
+    with engine.begin() as conn:
+        exists = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": FTS_TABLE}
+        ).first()
+        if not exists:
+            try:
+                conn.execute(text(_CREATE_TABLE))
+            except OperationalError as e:
+                logger.warning(f"FTS5 unavailable, product search falls back to LIKE: {e}")
+                _index_available[str(engine.url)] = False
+                return False
+            conn.execute(text(_POPULATE))
+            logger.info("Product full-text search index created")
+        for trigger in _TRIGGERS:
+            conn.execute(text(trigger))
+        _create_term_index(conn)
+    
+    _index_available[str(engine.url)] = True
+    _term_index_available[str(engine.url)] = True
+    return True
+
+def search_index_available(db: Session) -> bool:
+    """Check whether the FTS5 index can be used with this session's database"""
+    bind = db.get_bind()
+    key = str(bind.url)
+    if key not in _index_available:
+        if bind.dialect.name != "sqlite":
+            _index_available[key] = False
+        else:
+            _index_available[key] = db.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {"name": FTS_TABLE}
+            ).first() is not None
+    return _index_available[key]
+
+def build_match_query(query: str) -> str:
+    """Turn free text into an FTS5 MATCH expression of quoted prefix terms"""
+    terms: List[str] = re.findall(r"\w+", query, flags=re.UNICODE)
+    return " ".join(f'"{term}"*' for term in terms)
+
+__all__ = [
+    "FTS_TABLE",
+    "BM25_WEIGHTS",
+    "SimilarTerm",
+    "search_terms",
+    "similar_terms",
+    "trigram_similarity",
+    "add_search_terms",
+    "index_product_terms",
+    "rebuild_search_terms",
+    "create_product_search_index",
+    "search_index_available",
+    "build_match_query"
+]
@@ -1,16 +1,176 @@
 """Security utilities for password hashing and authentication"""
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from passlib.context import CryptContext
-from typing import Optional
+from typing import Any, Callable, Dict, Optional, Tuple
+from app.core.config import settings
+from app.core.executor import run_blocking
+import asyncio
+import base64
+import hashlib
+import hmac
+import multiprocessing
+import signal
+import threading
+import time
+import logging
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+logger = logging.getLogger(__name__)
+
+# Password hashing context; hashes with other rounds than configured are upgraded on the next login
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.bcrypt_rounds)
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password in the calling process"""
+    return pwd_context.verify(plain_password, hashed_password)
+
+def _verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password in the calling process, rehashing it if its hash is outdated"""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+def _hash(password: str) -> str:
+    """Hash a password in the calling process"""
+    return pwd_context.hash(password)
+
+def _init_worker():
+    """Detach a forked worker from the server's signal handling; the server shuts the pool down"""
+    signal.set_wakeup_fd(-1)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+class PasswordHasher:
+    """Runs bcrypt in worker processes, bounding the CPU a login burst can take from the server"""
+    
+    def __init__(self, workers: int):
+        # With no workers hashing runs in the calling thread, e.g. in scripts
+        self.workers = workers
+        self.completed = 0
+        self.failed = 0
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+    
+    def start(self):
+        """Fork the workers now, while the server has started few threads"""
+        if self.workers > 0:
+            self._get_pool().submit(int).result()
+            logger.info(f"Password hasher started with {self.workers} worker processes")
+    
+    def run(self, func: Callable[..., Any], *args) -> Any:
+        """Run a hashing function in a worker and wait for its result"""
+        if self.workers <= 0:
+            return self._track(func, *args)
+        return self._submit(func, *args).result()
+    
+    async def run_async(self, func: Callable[..., Any], *args) -> Any:
+        """Run a hashing function in a worker without blocking the event loop"""
+        if self.workers <= 0:
+            return await run_blocking(self._track, func, *args)
+        return await asyncio.wrap_future(self._submit(func, *args))
+    
+    def stats(self) -> Dict[str, int]:
+        """Worker count and call counters"""
+        return {"workers": self.workers, "completed": self.completed, "failed": self.failed}
+    
+    def shutdown(self):
+        """Stop the worker processes"""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool:
+            pool.shutdown(wait=True)
+            logger.info("Password hasher shut down")
+    
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """The worker pool, created on first use"""
+        with self._lock:
+            if self._pool is None:
+                # Forked rather than spawned: spawned workers would re-import the server's main module
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("fork"),
+                    initializer=_init_worker
+                )
+            return self._pool
+    
+    def _submit(self, func: Callable[..., Any], *args) -> Future:
+        """Submit to the pool, replacing it once if a worker died"""
+        try:
+            future = self._get_pool().submit(func, *args)
+        except BrokenProcessPool:
+            logger.error("Password hasher pool broken, restarting it")
+            with self._lock:
+                self._pool = None
+            future = self._get_pool().submit(func, *args)
+        future.add_done_callback(self._count)
+        return future
+    
+    def _count(self, future: Future):
+        """Update counters when a pooled call finishes"""
+        with self._lock:
+            if future.cancelled() or future.exception() is not None:
+                self.failed += 1
+            else:
+                self.completed += 1
+    
+    def _track(self, func: Callable[..., Any], *args) -> Any:
+        """Run in the calling thread, updating counters"""
+        try:
+            result = func(*args)
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        with self._lock:
+            self.completed += 1
+        return result
+
+password_hasher = PasswordHasher(settings.password_hash_workers)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_hasher.run(_verify, plain_password, hashed_password)
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password; on success also returns a new hash if the stored one uses outdated settings"""
+    return password_hasher.run(_verify_and_update, plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
     """Generate password hash"""
-    return pwd_context.hash(password)
+    return password_hasher.run(_hash, password)
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password and rehash it if outdated, in a worker process, off the event loop"""
+    return await password_hasher.run_async(_verify_and_update, plain_password, hashed_password)
+
+# Session tokens are signed with a key derived from the secret, so it is never used directly
+_token_key = hmac.new(settings.secret_key.encode(), b"session-token", hashlib.sha256).digest()
+
+def _token_signature(payload: str) -> str:
+    """URL-safe HMAC-SHA256 signature of a token payload"""
+    digest = hmac.new(_token_key, payload.encode(), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+def create_session_token(user_id: int, ttl_seconds: float = settings.session_token_ttl_seconds) -> str:
+    """Signed token naming a signed-in user, valid for ttl_seconds"""
+    payload = f"{user_id}.{int(time.time() + ttl_seconds)}"
+    return f"{payload}.{_token_signature(payload)}"
+
+def read_session_token(token: Optional[str]) -> Optional[Tuple[int, float]]:
+    """User id and expiry time of a valid token; None if it is malformed, forged or expired"""
+    try:
+        user_id, expires_at, signature = (token or "").split(".")
+        payload = f"{user_id}.{expires_at}"
+        if not hmac.compare_digest(signature, _token_signature(payload)) or int(expires_at) <= time.time():
+            return None
+        return int(user_id), float(expires_at)
+    except ValueError:
+        return None
 
-__all__ = ["verify_password", "get_password_hash"]
\ No newline at end of file
+__all__ = [
+    "PasswordHasher",
+    "password_hasher",
+    "verify_password",
+    "verify_and_update_password",
+    "get_password_hash",
+    "verify_and_update_password_async",
+    "create_session_token",
+    "read_session_token"
+]
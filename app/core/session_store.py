@@ -0,0 +1,296 @@
+"""Per-client UI session state with LRU/TTL eviction and pluggable backends"""
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, NamedTuple, Optional
+from app.core.config import settings
+import sqlite3
+import sys
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class ClientSession(NamedTuple):
+    """Compact UI state of one browser session"""
+    auth_token: Optional[str] = None  # signed session token of the signed-in user
+    selected_category: Optional[int] = None
+    search_query: str = ""
+    product_sort: str = "id"
+    price_band: Optional[int] = None
+    in_stock: bool = False
+
+# Per-entry bookkeeping in the memory backend: OrderedDict node plus the _Entry tuple
+_ENTRY_OVERHEAD = 200
+
+def estimate_size(key: str, session: ClientSession) -> int:
+    """Approximate bytes one session entry holds in the memory backend"""
+    return (
+        _ENTRY_OVERHEAD
+        + sys.getsizeof(key)
+        + sys.getsizeof(session)
+        + sys.getsizeof(session.auth_token)
+        + sys.getsizeof(session.search_query)
+        + sys.getsizeof(session.product_sort)
+    )
+
+class SessionStore(ABC):
+    """Interface of a session state backend"""
+    
+    @abstractmethod
+    def get(self, key: str) -> Optional[ClientSession]:
+        """Return the live session for key, refreshing its TTL"""
+    
+    @abstractmethod
+    def put(self, key: str, session: ClientSession):
+        """Store a session, evicting past the configured bounds"""
+    
+    @abstractmethod
+    def delete(self, key: str):
+        """Forget a session"""
+    
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        """Size and eviction counters"""
+
+class _Entry(NamedTuple):
+    session: ClientSession
+    expires_at: float
+    size: int
+
+class MemorySessionStore(SessionStore):
+    """In-process LRU of sessions bounded by entry count, estimated bytes and idle TTL"""
+    
+    def __init__(self, max_entries: int, max_bytes: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    def get(self, key: str) -> Optional[ClientSession]:
+        """Return the live session for key, refreshing its TTL"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry.expires_at <= now:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries[key] = entry._replace(expires_at=now + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.session
+    
+    def put(self, key: str, session: ClientSession):
+        """Store a session, evicting past the configured bounds"""
+        now = time.monotonic()
+        with self._lock:
+            self._remove(key)
+            entry = _Entry(session, now + self.ttl_seconds, estimate_size(key, session))
+            self._entries[key] = entry
+            self.bytes += entry.size
+            self._evict(now)
+    
+    def delete(self, key: str):
+        """Forget a session"""
+        with self._lock:
+            self._remove(key)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Size and eviction counters"""
+        with self._lock:
+            return {
+                "backend": "memory",
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
+    
+    def _evict(self, now: float):
+        """Drop expired sessions, then the least recently used past the bounds; caller holds the lock"""
+        # Every access moves a session to the end with a fresh TTL, so expired ones collect at the front
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if entry.expires_at <= now:
+                self._remove(key)
+                self.expirations += 1
+            elif len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                self._remove(key)
+                self.evictions += 1
+            else:
+                break
+    
+    def _remove(self, key: str):
+        """Remove an entry and its size; caller holds the lock"""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry.size
+
+class SqliteSessionStore(SessionStore):
+    """Sessions in a local SQLite file, shared by every worker process on the host"""
+    
+    # Fraction of the TTL after which a read rewrites accessed_at, so reads rarely write
+    TOUCH_FRACTION = 0.1
+    # Puts between sweeps of expired and excess sessions
+    SWEEP_EVERY = 256
+    # One column per ClientSession field, in field order
+    COLUMNS = {
+        "auth_token": "TEXT",
+        "selected_category": "INTEGER",
+        "search_query": "TEXT NOT NULL DEFAULT ''",
+        "product_sort": "TEXT NOT NULL DEFAULT 'id'",
+        "price_band": "INTEGER",
+        "in_stock": "INTEGER NOT NULL DEFAULT 0",
+    }
+    _SELECT = f"SELECT accessed_at, {', '.join(COLUMNS)} FROM client_sessions WHERE key = ?"
+    _UPSERT = (
+        f"INSERT OR REPLACE INTO client_sessions (key, accessed_at, {', '.join(COLUMNS)}) "
+        f"VALUES (?, ?, {', '.join('?' for _ in COLUMNS)})"
+    )
+    
+    def __init__(self, path: str, max_entries: int, ttl_seconds: float):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._puts = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS client_sessions ("
+                "key TEXT PRIMARY KEY, "
+                "accessed_at REAL NOT NULL, "
+                + ", ".join(f"{name} {column_type}" for name, column_type in self.COLUMNS.items())
+                + ") WITHOUT ROWID"
+            )
+            # Files written before a field was added to ClientSession get its column with the default
+            existing = {row[1] for row in connection.execute("PRAGMA table_info(client_sessions)")}
+            for name, column_type in self.COLUMNS.items():
+                if name not in existing:
+                    connection.execute(f"ALTER TABLE client_sessions ADD COLUMN {name} {column_type}")
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS ix_client_sessions_accessed_at ON client_sessions (accessed_at)"
+            )
+    
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread; sqlite3 connections must not cross threads"""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=settings.db_busy_timeout / 1000)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+    
+    def get(self, key: str) -> Optional[ClientSession]:
+        """Return the live session for key, refreshing its TTL"""
+        now = time.time()
+        connection = self._connection()
+        row = connection.execute(self._SELECT, (key,)).fetchone()
+        if row is None or row[0] <= now - self.ttl_seconds:
+            with self._lock:
+                self.misses += 1
+            return None
+        if row[0] <= now - self.ttl_seconds * self.TOUCH_FRACTION:
+            with connection:
+                connection.execute("UPDATE client_sessions SET accessed_at = ? WHERE key = ?", (now, key))
+        with self._lock:
+            self.hits += 1
+        session = ClientSession(*row[1:])
+        return session._replace(in_stock=bool(session.in_stock))
+    
+    def put(self, key: str, session: ClientSession):
+        """Store a session, evicting past the configured bounds"""
+        connection = self._connection()
+        with connection:
+            connection.execute(self._UPSERT, (key, time.time(), *session))
+        with self._lock:
+            self._puts += 1
+            sweep = self._puts % self.SWEEP_EVERY == 0
+        if sweep:
+            self.sweep()
+    
+    def delete(self, key: str):
+        """Forget a session"""
+        connection = self._connection()
+        with connection:
+            connection.execute("DELETE FROM client_sessions WHERE key = ?", (key,))
+    
+    def sweep(self):
+        """Delete expired sessions, then the least recently used past max_entries"""
+        connection = self._connection()
+        with connection:
+            expired = connection.execute(
+                "DELETE FROM client_sessions WHERE accessed_at <= ?",
+                (time.time() - self.ttl_seconds,)
+            ).rowcount
+            excess = connection.execute("SELECT count(*) FROM client_sessions").fetchone()[0] - self.max_entries
+            evicted = 0
+            if excess > 0:
+                evicted = connection.execute(
+                    "DELETE FROM client_sessions WHERE key IN "
+                    "(SELECT key FROM client_sessions ORDER BY accessed_at LIMIT ?)",
+                    (excess,)
+                ).rowcount
+        with self._lock:
+            self.expirations += expired
+            self.evictions += evicted
+    
+    def stats(self) -> Dict[str, Any]:
+        """Size and eviction counters"""
+        entries = self._connection().execute("SELECT count(*) FROM client_sessions").fetchone()[0]
+        with self._lock:
+            return {
+                "backend": "sqlite",
+                "entries": entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
+
+def create_session_store() -> SessionStore:
+    """Build the session store selected by settings.session_backend"""
+    if settings.session_backend == "sqlite":
+        return SqliteSessionStore(
+            settings.session_store_path,
+            max_entries=settings.session_max_entries,
+            ttl_seconds=settings.session_ttl_seconds
+        )
+    if settings.session_backend != "memory":
+        logger.warning(f"Unknown session backend {settings.session_backend!r}, using memory")
+    return MemorySessionStore(
+        max_entries=settings.session_max_entries,
+        max_bytes=settings.session_max_bytes,
+        ttl_seconds=settings.session_ttl_seconds
+    )
+
+session_store = create_session_store()
+
+__all__ = [
+    "ClientSession",
+    "SessionStore",
+    "MemorySessionStore",
+    "SqliteSessionStore",
+    "create_session_store",
+    "session_store"
+]
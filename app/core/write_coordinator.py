@@ -0,0 +1,187 @@
+"""Single-writer group commit: write units from many threads share one transaction and one commit"""
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+from app.core.config import settings
+from app.core.database import SessionLocal, begin_write, engine
+import asyncio
+import queue
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# A write unit does its reads and writes in the session it is given and leaves the commit to its runner
+WriteUnit = Callable[[Session], T]
+
+class WriteCoordinator:
+    """One writer thread that runs queued write units under savepoints and commits them in groups"""
+    
+    def __init__(self, enabled: bool, max_ops: int, max_delay_ms: float, wait_timeout: float = 30.0):
+        self.enabled = enabled
+        self.max_ops = max_ops
+        self.max_delay = max_delay_ms / 1000
+        self.wait_timeout = wait_timeout
+        self.units = 0
+        self.failed = 0
+        self.groups = 0
+        self.failed_groups = 0
+        self._queue: "queue.Queue[Optional[Tuple[WriteUnit, Future]]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+    
+    def start(self):
+        """Start the writer thread"""
+        with self._lock:
+            if not self.enabled or self._thread:
+                return
+            self._thread = threading.Thread(target=self._run, name="write-coordinator", daemon=True)
+        self._thread.start()
+        logger.info(f"Write coordinator started: up to {self.max_ops} writes or {self.max_delay * 1000:g} ms per commit")
+    
+    def stop(self):
+        """Commit the units already queued, then stop the writer"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread:
+            self._queue.put(None)
+            thread.join()
+            logger.info("Write coordinator stopped")
+    
+    def in_writer(self) -> bool:
+        """Whether the calling thread is the writer, i.e. already inside a group transaction"""
+        return self._thread is not None and threading.current_thread() is self._thread
+    
+    def submit(self, unit: WriteUnit) -> Future:
+        """Queue a write unit; the future resolves once its group commits"""
+        self.start()
+        future: Future = Future()
+        self._queue.put((unit, future))
+        return future
+    
+    def run(self, unit: WriteUnit, timeout: Optional[float] = None) -> Any:
+        """Queue a write unit and wait for its committed result, at most timeout seconds"""
+        timeout = self.wait_timeout if timeout is None else timeout
+        future = self.submit(unit)
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            # A unit still queued is dropped; one the writer already started may yet commit
+            future.cancel()
+            logger.error(f"Gave up waiting for a group commit after {timeout:g} s")
+            raise
+    
+    async def run_async(self, unit: WriteUnit, timeout: Optional[float] = None) -> Any:
+        """Queue a write unit and await its committed result without blocking the event loop, at most timeout seconds"""
+        timeout = self.wait_timeout if timeout is None else timeout
+        future = self.submit(unit)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            future.cancel()
+            logger.error(f"Gave up waiting for a group commit after {timeout:g} s")
+            raise
+    
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and group commit counters"""
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "queued": self._queue.qsize(),
+                "units": self.units,
+                "failed": self.failed,
+                "groups": self.groups,
+                "failed_groups": self.failed_groups,
+                "avg_group_size": round(self.units / self.groups, 2) if self.groups else 0.0
+            }
+    
+    def _run(self):
+        """Gather units for up to max_delay or max_ops, commit them together, until stopped"""
+        # The writer keeps its own connection: callers waiting on it may hold every pooled one
+        with engine.connect() as connection:
+            self._drain(connection)
+    
+    def _drain(self, connection: Connection):
+        """Commit groups of queued units on the writer's connection until stopped"""
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is None:
+                break
+            group = [item]
+            deadline = time.monotonic() + self.max_delay
+            while len(group) < self.max_ops:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                group.append(item)
+            self._commit_group(connection, group)
+    
+    def _commit_group(self, connection: Connection, group: List[Tuple[WriteUnit, Future]]):
+        """Run each unit under its own savepoint and commit the group in one transaction"""
+        done: List[Tuple[Future, Any]] = []
+        failed = 0
+        try:
+            with SessionLocal(bind=connection) as db:
+                begin_write(db)
+                for unit, future in group:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    try:
+                        with db.begin_nested():
+                            result = unit(db)
+                        done.append((future, result))
+                    except Exception as e:
+                        # Only this unit's savepoint is rolled back; the rest of the group still commits
+                        failed += 1
+                        future.set_exception(e)
+                db.commit()
+        except Exception as e:
+            # Also reached before any unit ran, e.g. when BEGIN IMMEDIATE times out on a locked database
+            unresolved = [future for _, future in group if not future.done()]
+            logger.error(f"Failed to commit a group of {len(group)} writes: {e}")
+            with self._lock:
+                self.units += len(unresolved) + failed
+                self.failed += len(unresolved) + failed
+                self.failed_groups += 1
+            for future in unresolved:
+                future.set_exception(e)
+            return
+        with self._lock:
+            self.units += len(done) + failed
+            self.failed += failed
+            self.groups += 1
+        for future, result in done:
+            future.set_result(result)
+
+write_coordinator = WriteCoordinator(
+    enabled=settings.write_coordinator_enabled,
+    max_ops=settings.write_group_max_ops,
+    max_delay_ms=settings.write_group_max_delay_ms,
+    wait_timeout=settings.write_wait_timeout_seconds
+)
+
+def run_write(db: Session, unit: WriteUnit) -> Any:
+    """Run a write unit and commit it: in a group commit when the coordinator is enabled, else in db"""
+    if write_coordinator.in_writer():
+        # Called from another unit: it is already in the group transaction
+        return unit(db)
+    if write_coordinator.enabled:
+        return write_coordinator.run(unit)
+    try:
+        result = unit(db)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return result
+
+__all__ = ["WriteUnit", "WriteCoordinator", "write_coordinator", "run_write"]
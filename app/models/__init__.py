@@ -4,9 +4,10 @@ try:
     from app.models.product import Product, Category
     from app.models.user import User
     from app.models.cart import Cart, CartItem
-    from app.models.order import Order, OrderItem
+    from app.models.order import Order, OrderItem, CheckoutRequest
+    from app.models.reservation import StockHold, StockHoldTotal
     
-    __all__ = ["Product", "Category", "User", "Cart", "CartItem", "Order", "OrderItem"]
+    __all__ = ["Product", "Category", "User", "Cart", "CartItem", "Order", "OrderItem", "CheckoutRequest", "StockHold", "StockHoldTotal"]
     
 except ImportError as e:
     import logging
@@ -1,16 +1,21 @@
 """Shopping cart models"""
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import Integer, ForeignKey, DateTime, func
+from sqlalchemy import Integer, ForeignKey, DateTime, Index, func
 from datetime import datetime
-from typing import List
+from typing import List, NamedTuple
 from app.core.database import Base
 
+class CartTotals(NamedTuple):
+    """Item count and amount of a cart, computed together"""
+    total_items: int
+    total_amount: float
+
 class Cart(Base):
     """Shopping cart model"""
     __tablename__ = "carts"
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"))
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), index=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=func.now())
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=func.now(), onupdate=func.now())
     
@@ -30,10 +35,25 @@ class Cart(Base):
     def total_items(self) -> int:
         """Calculate total number of items in cart"""
         return sum(item.quantity for item in self.items)
+    
+    def totals(self) -> CartTotals:
+        """Calculate item count and amount in a single pass over the items"""
+        total_items = 0
+        total_amount = 0.0
+        for item in self.items:
+            total_items += item.quantity
+            total_amount += item.subtotal
+        return CartTotals(total_items, total_amount)
 
 class CartItem(Base):
     """Cart item model"""
     __tablename__ = "cart_items"
+    __table_args__ = (
+        # One line per product per cart; also the conflict target of the add-to-cart upsert
+        Index("ux_cart_items_cart_product", "cart_id", "product_id", unique=True),
+        # Covers the cart badge count, SUM(quantity) for one cart, without reading the table
+        Index("ix_cart_items_cart_quantity", "cart_id", "quantity"),
+    )
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     cart_id: Mapped[int] = mapped_column(Integer, ForeignKey("carts.id"))
@@ -1,18 +1,25 @@
 """Order models"""
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import String, Integer, Numeric, ForeignKey, DateTime, func
+from sqlalchemy import String, Integer, Numeric, ForeignKey, DateTime, Index, func
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 from app.core.database import Base
 
 class Order(Base):
     """Order model"""
     __tablename__ = "orders"
+    __table_args__ = (
+        # Order history: a user's orders newest first, resumed from a (created_at, id) cursor
+        Index("ix_orders_user_created", "user_id", "created_at"),
+    )
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"))
     total: Mapped[float] = mapped_column(Numeric(10, 2))
     status: Mapped[str] = mapped_column(String(50), default="pending")
+    # Written with the order so history lists never load its items; NULL on orders placed before they existed
+    item_count: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    summary: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=func.now())
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=func.now(), onupdate=func.now())
     
@@ -26,6 +33,9 @@ class Order(Base):
 class OrderItem(Base):
     """Order item model"""
     __tablename__ = "order_items"
+    __table_args__ = (
+        Index("ix_order_items_order", "order_id"),
+    )
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     order_id: Mapped[int] = mapped_column(Integer, ForeignKey("orders.id"))
@@ -44,4 +54,20 @@ class OrderItem(Base):
     @property
     def subtotal(self) -> float:
         """Calculate subtotal for this order item"""
-        return float(self.price) * self.quantity
\ No newline at end of file
+        return float(self.price) * self.quantity
+
+class CheckoutRequest(Base):
+    """Idempotency key of one checkout attempt and the order it created"""
+    __tablename__ = "checkout_requests"
+    __table_args__ = (
+        Index("ix_checkout_requests_expires", "expires_at"),
+    )
+    
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"))
+    order_id: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey("orders.id"), nullable=True)
+    expires_at: Mapped[datetime] = mapped_column(DateTime)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=func.now())
+    
+    def __repr__(self) -> str:
+        return f"<CheckoutRequest(key='{self.key}', user_id={self.user_id}, order_id={self.order_id}, expires_at={self.expires_at})>"
@@ -1,9 +1,10 @@
 """Product and Category models"""
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import String, Text, Integer, Numeric, ForeignKey, DateTime, func
+from sqlalchemy import String, Text, Integer, Numeric, ForeignKey, DateTime, Index, event, func
 from datetime import datetime
 from typing import List, Optional
 from app.core.database import Base
+from app.core.search_index import index_product_terms
 
 class Category(Base):
     """Product category model"""
@@ -23,6 +24,14 @@ class Category(Base):
 class Product(Base):
     """Product model"""
     __tablename__ = "products"
+    __table_args__ = (
+        # Keyset pagination orders by (sort column, id); SQLite appends the rowid to every index
+        Index("ix_products_price", "price"),
+        Index("ix_products_category_name", "category_id", "name"),
+        # Covers the facet count query (category x price band x in stock) without touching the table;
+        # also the category filter index, ordered by price within a category
+        Index("ix_products_category_price_stock", "category_id", "price", "stock"),
+    )
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     name: Mapped[str] = mapped_column(String(200), index=True)
@@ -47,4 +56,8 @@ class Product(Base):
     
     def can_fulfill_quantity(self, quantity: int) -> bool:
         """Check if we can fulfill the requested quantity"""
-        return self.stock >= quantity
\ No newline at end of file
+        return self.stock >= quantity
+
+# New product words join the typo-tolerance vocabulary in the transaction that writes them
+event.listen(Product, "after_insert", index_product_terms)
+event.listen(Product, "after_update", index_product_terms)
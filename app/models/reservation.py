@@ -0,0 +1,33 @@
+"""Stock reservation models"""
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import Integer, ForeignKey, DateTime, Index, func
+from datetime import datetime
+from app.core.database import Base
+
+class StockHold(Base):
+    """Time-limited hold on product stock for one cart line"""
+    __tablename__ = "stock_holds"
+    __table_args__ = (
+        Index("ux_stock_holds_cart_product", "cart_id", "product_id", unique=True),
+        Index("ix_stock_holds_expires", "expires_at"),
+    )
+    
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    cart_id: Mapped[int] = mapped_column(Integer, ForeignKey("carts.id"))
+    product_id: Mapped[int] = mapped_column(Integer, ForeignKey("products.id"))
+    quantity: Mapped[int] = mapped_column(Integer)
+    expires_at: Mapped[datetime] = mapped_column(DateTime)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=func.now())
+    
+    def __repr__(self) -> str:
+        return f"<StockHold(cart_id={self.cart_id}, product_id={self.product_id}, quantity={self.quantity}, expires_at={self.expires_at})>"
+
+class StockHoldTotal(Base):
+    """Running total of held units per product, so availability is one row lookup"""
+    __tablename__ = "stock_hold_totals"
+    
+    product_id: Mapped[int] = mapped_column(Integer, ForeignKey("products.id"), primary_key=True)
+    quantity: Mapped[int] = mapped_column(Integer, default=0)
+    
+    def __repr__(self) -> str:
+        return f"<StockHoldTotal(product_id={self.product_id}, quantity={self.quantity})>"
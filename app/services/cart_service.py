@@ -1,17 +1,33 @@
 """Cart service for shopping cart operations"""
-from sqlalchemy.orm import Session
-from sqlalchemy import select
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import select, update, delete, func, text
 from typing import Optional
 from app.models.cart import Cart, CartItem
 from app.models.product import Product
 from app.models.user import User
+from app.core.config import settings
 from app.core.exceptions import ProductNotFoundError, InsufficientStockError
+from app.core.write_coordinator import run_write
+from app.services.reservation_service import ReservationService
+
+# Plain SQL so the statement compiles once; SQLAlchemy does not cache its dialect upsert
+# constructs. ON CONFLICT ... RETURNING reads the same on SQLite and PostgreSQL.
+_UPSERT_CART_ITEM = text("""
+    INSERT INTO cart_items (cart_id, product_id, quantity, created_at)
+    VALUES (:cart_id, :product_id, :quantity, CURRENT_TIMESTAMP)
+    ON CONFLICT (cart_id, product_id) DO UPDATE
+    SET quantity = cart_items.quantity + excluded.quantity
+    WHERE (SELECT stock FROM products WHERE products.id = excluded.product_id)
+        >= cart_items.quantity + excluded.quantity
+    RETURNING id, cart_id, product_id, quantity, created_at
+""").columns(CartItem.id, CartItem.cart_id, CartItem.product_id, CartItem.quantity, CartItem.created_at)
 
 class CartService:
     """Service for cart-related operations"""
     
     def __init__(self, db: Session):
         self.db = db
+        self.reservations = ReservationService(db) if settings.reservations_enabled else None
     
     def get_or_create_cart(self, user_id: int) -> Cart:
         """Get existing cart or create new one for user"""
@@ -20,113 +36,140 @@ class CartService:
         cart = self.db.execute(query).scalar_one_or_none()
         
         if not cart:
+            # Flushed, not committed: the new cart is saved with the caller's write
             cart = Cart(user_id=user_id)
             self.db.add(cart)
-            self.db.commit()
-            self.db.refresh(cart)
+            self.db.flush()
         
         return cart
     
     def add_to_cart(self, user_id: int, product_id: int, quantity: int = 1) -> CartItem:
         """Add product to cart"""
+        return run_write(self.db, lambda db: CartService(db)._add_to_cart(user_id, product_id, quantity))
+    
+    def _add_to_cart(self, user_id: int, product_id: int, quantity: int) -> CartItem:
+        """Write unit of add_to_cart"""
         # Verify product exists and has sufficient stock
         product = self.db.get(Product, product_id)
         if not product:
             raise ProductNotFoundError(product_id)
         
-        if not product.can_fulfill_quantity(quantity):
+        if not self.reservations and not product.can_fulfill_quantity(quantity):
             raise InsufficientStockError(product.name, quantity, product.stock)
         
-        # Get or create cart
         cart = self.get_or_create_cart(user_id)
         
-        # Check if item already exists in cart
-        query = select(CartItem).where(
-            CartItem.cart_id == cart.id,
-            CartItem.product_id == product_id
-        )
-        existing_item = self.db.execute(query).scalar_one_or_none()
+        # Insert the line, or add to it if it exists and stock still covers the new quantity
+        cart_item = self.db.execute(
+            select(CartItem).from_statement(_UPSERT_CART_ITEM),
+            {"cart_id": cart.id, "product_id": product_id, "quantity": quantity},
+            execution_options={"populate_existing": True}
+        ).scalar_one_or_none()
+        
+        if cart_item is None:
+            # The line exists and stock does not cover it plus this quantity
+            in_cart = self.db.execute(
+                select(CartItem.quantity).where(CartItem.cart_id == cart.id, CartItem.product_id == product_id)
+            ).scalar_one()
+            raise InsufficientStockError(product.name, in_cart + quantity, product.stock)
+        if self.reservations:
+            # Holds the whole line quantity, counting every other cart's active holds
+            self.reservations.place_hold(cart.id, product_id, cart_item.quantity, product.name)
         
-        if existing_item:
-            # Update quantity
-            new_quantity = existing_item.quantity + quantity
-            if not product.can_fulfill_quantity(new_quantity):
-                raise InsufficientStockError(product.name, new_quantity, product.stock)
-            
-            existing_item.quantity = new_quantity
-            cart_item = existing_item
-        else:
-            # Create new cart item
-            cart_item = CartItem(
-                cart_id=cart.id,
-                product_id=product_id,
-                quantity=quantity
-            )
-            self.db.add(cart_item)
-        
-        self.db.commit()
-        self.db.refresh(cart_item)
         return cart_item
     
     def update_cart_item(self, user_id: int, product_id: int, quantity: int) -> Optional[CartItem]:
         """Update cart item quantity"""
-        cart = self.get_or_create_cart(user_id)
-        
-        query = select(CartItem).where(
-            CartItem.cart_id == cart.id,
-            CartItem.product_id == product_id
-        )
-        cart_item = self.db.execute(query).scalar_one_or_none()
-        
-        if not cart_item:
-            return None
-        
+        return run_write(self.db, lambda db: CartService(db)._update_cart_item(user_id, product_id, quantity))
+    
+    def _update_cart_item(self, user_id: int, product_id: int, quantity: int) -> Optional[CartItem]:
+        """Write unit of update_cart_item"""
         if quantity <= 0:
             # Remove item from cart
-            self.db.delete(cart_item)
-            self.db.commit()
+            self._remove_from_cart(user_id, product_id)
             return None
         
-        # Verify stock availability
-        product = self.db.get(Product, product_id)
-        if not product.can_fulfill_quantity(quantity):
-            raise InsufficientStockError(product.name, quantity, product.stock)
+        # Set the quantity only if stock covers it
+        stock = select(Product.stock).where(Product.id == product_id).scalar_subquery()
+        statement = (
+            update(CartItem)
+            .where(
+                CartItem.cart_id.in_(self._user_cart_ids(user_id)),
+                CartItem.product_id == product_id,
+                stock >= quantity
+            )
+            .values(quantity=quantity)
+            .returning(CartItem)
+        )
+        cart_item = self.db.execute(
+            statement,
+            execution_options={"populate_existing": True}
+        ).scalar_one_or_none()
+        
+        if cart_item is None:
+            # Either the line does not exist or stock is short; only the latter is an error
+            product = self.db.get(Product, product_id)
+            if product and not product.can_fulfill_quantity(quantity):
+                raise InsufficientStockError(product.name, quantity, product.stock)
+            return None
+        if self.reservations:
+            product = self.db.get(Product, product_id)
+            self.reservations.place_hold(cart_item.cart_id, product_id, quantity, product.name)
         
-        cart_item.quantity = quantity
-        self.db.commit()
-        self.db.refresh(cart_item)
         return cart_item
     
     def remove_from_cart(self, user_id: int, product_id: int) -> bool:
         """Remove product from cart"""
-        cart = self.get_or_create_cart(user_id)
-        
-        query = select(CartItem).where(
-            CartItem.cart_id == cart.id,
+        return run_write(self.db, lambda db: CartService(db)._remove_from_cart(user_id, product_id))
+    
+    def _remove_from_cart(self, user_id: int, product_id: int) -> bool:
+        """Write unit of remove_from_cart"""
+        statement = delete(CartItem).where(
+            CartItem.cart_id.in_(self._user_cart_ids(user_id)),
             CartItem.product_id == product_id
-        )
-        cart_item = self.db.execute(query).scalar_one_or_none()
+        ).returning(CartItem.cart_id)
+        cart_ids = self.db.execute(statement).scalars().all()
         
-        if cart_item:
-            self.db.delete(cart_item)
-            self.db.commit()
-            return True
-        
-        return False
+        if self.reservations:
+            for cart_id in cart_ids:
+                self.reservations.release_hold(cart_id, product_id)
+        return bool(cart_ids)
     
     def get_cart_contents(self, user_id: int) -> Cart:
-        """Get cart with all items"""
-        cart = self.get_or_create_cart(user_id)
-        # Refresh to get latest items
-        self.db.refresh(cart)
-        return cart
+        """Get cart with all items and their products loaded up front"""
+        # Two statements whatever the cart size: the cart, then its items joined to their products
+        query = (
+            select(Cart)
+            .where(Cart.user_id == user_id)
+            .options(selectinload(Cart.items).joinedload(CartItem.product))
+            .execution_options(populate_existing=True)
+        )
+        cart = self.db.execute(query).scalar_one_or_none()
+        # Reading an empty cart does not need to create one
+        return cart or Cart(user_id=user_id, items=[])
+    
+    def count_cart_items(self, user_id: int) -> int:
+        """Count the units in the user's cart with one indexed SUM(quantity)"""
+        query = select(func.coalesce(func.sum(CartItem.quantity), 0)).where(
+            CartItem.cart_id.in_(self._user_cart_ids(user_id))
+        )
+        return self.db.execute(query).scalar_one()
     
     def clear_cart(self, user_id: int) -> bool:
         """Clear all items from cart"""
-        cart = self.get_or_create_cart(user_id)
-        
-        for item in cart.items:
-            self.db.delete(item)
-        
-        self.db.commit()
-        return True
\ No newline at end of file
+        return run_write(self.db, lambda db: CartService(db)._clear_cart(user_id))
+    
+    def _clear_cart(self, user_id: int) -> bool:
+        """Write unit of clear_cart"""
+        statement = delete(CartItem).where(
+            CartItem.cart_id.in_(self._user_cart_ids(user_id))
+        ).returning(CartItem.cart_id)
+        cart_ids = set(self.db.execute(statement).scalars())
+        if self.reservations:
+            for cart_id in cart_ids:
+                self.reservations.release_cart(cart_id)
+        return True
+    
+    def _user_cart_ids(self, user_id: int):
+        """Subquery selecting the user's cart ids"""
+        return select(Cart.id).where(Cart.user_id == user_id)
@@ -0,0 +1,344 @@
+"""In-process catalog cache with TTL, LRU eviction and write-driven invalidation"""
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from collections import OrderedDict
+from decimal import Decimal
+from typing import Any, Callable, Dict, Hashable, Iterable, List, NamedTuple, Optional, Set
+from app.core.config import settings
+from app.models.product import Product, Category
+from app.services.product_service import ProductService, FacetCube
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class CategorySnapshot(NamedTuple):
+    """Detached, read-only view of a category"""
+    id: int
+    name: str
+    description: Optional[str]
+    
+    @classmethod
+    def from_model(cls, category: Category) -> "CategorySnapshot":
+        """Copy the cached columns off an ORM category"""
+        return cls(category.id, category.name, category.description)
+
+class ProductSnapshot(NamedTuple):
+    """Detached, read-only view of a product"""
+    id: int
+    name: str
+    description: Optional[str]
+    price: Decimal
+    image_url: Optional[str]
+    stock: int
+    category_id: int
+    
+    @classmethod
+    def from_model(cls, product: Product) -> "ProductSnapshot":
+        """Copy the cached columns off an ORM product"""
+        return cls(
+            product.id,
+            product.name,
+            product.description,
+            product.price,
+            product.image_url,
+            product.stock,
+            product.category_id
+        )
+    
+    @property
+    def is_in_stock(self) -> bool:
+        """Check if product is in stock"""
+        return self.stock > 0
+    
+    def can_fulfill_quantity(self, quantity: int) -> bool:
+        """Check if we can fulfill the requested quantity"""
+        return self.stock >= quantity
+
+# Invalidation tags: entries are dropped when any of their tags is invalidated
+CATEGORIES_TAG = "categories"
+# Entries that depend on which products are in stock, dropped when a product sells out or is restocked
+STOCK_TAG = "stock"
+
+def product_tag(product_id: int) -> str:
+    """Tag for entries that contain this product"""
+    return f"product:{product_id}"
+
+def listing_tag(category_id: Optional[int]) -> str:
+    """Tag for entries whose membership or order depends on this category's products"""
+    return f"listing:{category_id or 'all'}"
+
+class _Entry(NamedTuple):
+    value: Any
+    expires_at: float
+    tags: frozenset
+
+class CatalogCache:
+    """Bounded LRU cache of catalog snapshots with TTL expiry and tag invalidation"""
+    
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._tag_index: Dict[str, Set[Hashable]] = {}
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        # Bumped on every invalidation so loads racing with a write are not cached
+        self._generation = 0
+        # Called with the invalidated tags, or None when everything is dropped
+        self._listeners: List[Callable[[Optional[Set[str]]], None]] = []
+    
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any], tags: Callable[[Any], Iterable[str]]) -> Any:
+        """Return the cached value for key, loading and caching it on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry.value
+                self._remove(key)
+                self.expirations += 1
+            self.misses += 1
+            generation = self._generation
+        
+        value = loader()
+        self.put(key, value, tags(value), generation)
+        return value
+    
+    def put(self, key: Hashable, value: Any, tags: Iterable[str], generation: Optional[int] = None):
+        """Store a value, evicting the least recently used entries past the bound"""
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            if key in self._entries:
+                self._remove(key)
+            entry = _Entry(value, time.monotonic() + self.ttl_seconds, frozenset(tags))
+            self._entries[key] = entry
+            for tag in entry.tags:
+                self._tag_index.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+    
+    def add_listener(self, listener: Callable[[Optional[Set[str]]], None]):
+        """Notify listener of invalidations, for data kept outside the cache that shares its tags"""
+        self._listeners.append(listener)
+    
+    def invalidate_tags(self, tags: Iterable[str]):
+        """Drop every entry carrying any of the given tags"""
+        tags = set(tags)
+        with self._lock:
+            self._generation += 1
+            for tag in tags:
+                for key in list(self._tag_index.get(tag, ())):
+                    self._remove(key)
+                    self.invalidations += 1
+        self._notify(tags)
+    
+    def invalidate_products(
+        self,
+        product_ids: Iterable[int],
+        category_ids: Iterable[Optional[int]] = (),
+        stock_changed: bool = False
+    ):
+        """Invalidate entries holding these products, plus listings of these categories or stock"""
+        tags = [product_tag(product_id) for product_id in product_ids]
+        if stock_changed:
+            tags.append(STOCK_TAG)
+        category_ids = list(category_ids)
+        if category_ids:
+            tags.append(listing_tag(None))
+            tags.extend(listing_tag(category_id) for category_id in category_ids)
+        self.invalidate_tags(tags)
+    
+    def clear(self):
+        """Drop all entries"""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._tag_index.clear()
+        self._notify(None)
+    
+    def stats(self) -> Dict[str, int]:
+        """Hit, miss and eviction counters"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations
+            }
+    
+    def _notify(self, tags: Optional[Set[str]]):
+        """Tell listeners about an invalidation"""
+        for listener in self._listeners:
+            try:
+                listener(tags)
+            except Exception as e:
+                logger.error(f"Catalog cache listener failed: {e}")
+    
+    def _remove(self, key: Hashable):
+        """Remove an entry and its tag references; caller holds the lock"""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry.tags:
+            keys = self._tag_index.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tag_index[tag]
+
+catalog_cache = CatalogCache(
+    max_entries=settings.catalog_cache_max_entries,
+    ttl_seconds=settings.catalog_cache_ttl_seconds
+)
+
+def _product_list_tags(category_id: Optional[int]) -> Callable[[List[ProductSnapshot]], List[str]]:
+    """Tags for a product listing: its category plus every product it contains"""
+    def tags(products: List[ProductSnapshot]) -> List[str]:
+        return [listing_tag(category_id)] + [product_tag(product.id) for product in products]
+    return tags
+
+class CatalogReader:
+    """Read-through cache in front of ProductService returning detached snapshots"""
+    
+    def __init__(self, db: Session, cache: CatalogCache = catalog_cache):
+        self.product_service = ProductService(db)
+        self.cache = cache
+    
+    def get_categories(self) -> List[CategorySnapshot]:
+        """Get all categories"""
+        return list(self.cache.get_or_load(
+            ("categories",),
+            lambda: tuple(CategorySnapshot.from_model(c) for c in self.product_service.get_all_categories()),
+            lambda value: [CATEGORIES_TAG]
+        ))
+    
+    def get_featured_products(self, limit: int = 8) -> List[ProductSnapshot]:
+        """Get featured products"""
+        return list(self.cache.get_or_load(
+            ("featured", limit),
+            lambda: tuple(ProductSnapshot.from_model(p) for p in self.product_service.get_featured_products(limit)),
+            _product_list_tags(None)
+        ))
+    
+    def get_facet_cube(self) -> FacetCube:
+        """Product counts per category, price band and stock state"""
+        return self.cache.get_or_load(
+            ("facets",),
+            self.product_service.get_facet_cube,
+            lambda value: [listing_tag(None), STOCK_TAG]
+        )
+    
+    def count_products(
+        self,
+        category_id: Optional[int] = None,
+        price_band: Optional[int] = None,
+        in_stock: bool = False
+    ) -> int:
+        """Count products, optionally filtered by category, price band and stock"""
+        if price_band is None and not in_stock:
+            return self.cache.get_or_load(
+                ("count", category_id),
+                lambda: self.product_service.count_products(category_id),
+                lambda value: [listing_tag(category_id)]
+            )
+        return self.get_facet_cube().count(category_id, price_band, in_stock)
+    
+    def get_products_window(
+        self,
+        category_id: Optional[int],
+        sort: str,
+        offset: int,
+        limit: int,
+        cursor: Optional[str] = None,
+        price_band: Optional[int] = None,
+        in_stock: bool = False
+    ) -> List[ProductSnapshot]:
+        """Get `limit` products starting at `offset` in the given sort order and filters"""
+        list_tags = _product_list_tags(category_id)
+        return list(self.cache.get_or_load(
+            ("window", category_id, sort, offset, limit, price_band, in_stock),
+            lambda: tuple(
+                ProductSnapshot.from_model(p)
+                for p in self.product_service.get_products_page(
+                    category_id,
+                    sort=sort,
+                    cursor=cursor,
+                    limit=limit,
+                    offset=offset,
+                    price_band=price_band,
+                    in_stock=in_stock
+                ).items
+            ),
+            (lambda value: list_tags(value) + [STOCK_TAG]) if in_stock else list_tags
+        ))
+
+def invalidate_on_commit(session: Session, product_ids: Iterable[int], stock_changed: bool = False):
+    """Invalidate products changed by bulk statements the ORM does not track, once the session commits"""
+    tags = session.info.setdefault("catalog_cache_tags", set())
+    tags.update(product_tag(product_id) for product_id in product_ids)
+    if stock_changed:
+        tags.add(STOCK_TAG)
+
+def _collect_catalog_changes(session: Session, flush_context):
+    """Record which cached catalog entries a flush makes stale"""
+    tags = session.info.setdefault("catalog_cache_tags", set())
+    
+    for obj in list(session.new) + list(session.deleted):
+        if isinstance(obj, Product):
+            tags.update([product_tag(obj.id), listing_tag(None), listing_tag(obj.category_id)])
+        elif isinstance(obj, Category):
+            tags.add(CATEGORIES_TAG)
+    
+    for obj in session.dirty:
+        if isinstance(obj, Product) and session.is_modified(obj):
+            tags.add(product_tag(obj.id))
+            state = inspect(obj)
+            stock = state.attrs.stock.history
+            if stock.deleted and stock.added and ((stock.deleted[0] or 0) > 0) != ((stock.added[0] or 0) > 0):
+                tags.add(STOCK_TAG)
+            # Membership and ordering of listings only change with these columns
+            if any(state.attrs[name].history.has_changes() for name in ("category_id", "price", "name")):
+                tags.add(listing_tag(None))
+                tags.add(listing_tag(obj.category_id))
+                tags.update(listing_tag(old) for old in state.attrs.category_id.history.deleted)
+        elif isinstance(obj, Category) and session.is_modified(obj):
+            tags.add(CATEGORIES_TAG)
+
+def _apply_catalog_changes(session: Session):
+    """Invalidate stale entries once the writes are committed"""
+    tags = session.info.pop("catalog_cache_tags", None)
+    if tags:
+        catalog_cache.invalidate_tags(tags)
+
+def _discard_catalog_changes(session: Session):
+    """Forget pending invalidations of a rolled back transaction"""
+    session.info.pop("catalog_cache_tags", None)
+
+event.listen(Session, "after_flush", _collect_catalog_changes)
+event.listen(Session, "after_commit", _apply_catalog_changes)
+event.listen(Session, "after_rollback", _discard_catalog_changes)
+
+__all__ = [
+    "CategorySnapshot",
+    "ProductSnapshot",
+    "CatalogCache",
+    "CatalogReader",
+    "catalog_cache",
+    "invalidate_on_commit",
+    "product_tag",
+    "listing_tag",
+    "STOCK_TAG",
+    "CATEGORIES_TAG"
+]
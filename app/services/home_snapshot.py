@@ -0,0 +1,123 @@
+"""Home page data kept ready in memory and rebuilt in the background when the catalog changes"""
+from typing import Dict, NamedTuple, Optional, Set, Tuple
+from app.core.config import settings
+from app.core.database import session_scope
+from app.services.catalog_cache import (
+    CatalogReader,
+    CategorySnapshot,
+    ProductSnapshot,
+    catalog_cache,
+    product_tag,
+    listing_tag,
+    CATEGORIES_TAG
+)
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class HomeSnapshot(NamedTuple):
+    """Everything the home page shows, identical for every visitor"""
+    featured_products: Tuple[ProductSnapshot, ...]
+    categories: Tuple[CategorySnapshot, ...]
+    category_counts: Dict[int, int]
+    built_at: float
+
+class HomeSnapshotCache:
+    """Serves the current home snapshot and rebuilds it on catalog changes or every refresh interval"""
+    
+    def __init__(
+        self,
+        refresh_seconds: float = settings.home_snapshot_refresh_seconds,
+        debounce_seconds: float = settings.home_snapshot_debounce_seconds,
+        featured_limit: int = 8
+    ):
+        self.refresh_seconds = refresh_seconds
+        self.debounce_seconds = debounce_seconds
+        self.featured_limit = featured_limit
+        self.rebuilds = 0
+        self._snapshot: Optional[HomeSnapshot] = None
+        self._watched_tags: Set[str] = set()
+        self._stale = threading.Event()
+        self._stop = threading.Event()
+        self._build_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+    
+    @property
+    def snapshot(self) -> Optional[HomeSnapshot]:
+        """Current snapshot, or None before the first build"""
+        return self._snapshot
+    
+    def get(self) -> HomeSnapshot:
+        """Current snapshot, building it first if there is none yet"""
+        return self._snapshot or self.refresh()
+    
+    def refresh(self) -> HomeSnapshot:
+        """Rebuild the snapshot from the catalog"""
+        with self._build_lock:
+            # Cleared before reading, so a write committed during the build triggers another one
+            self._stale.clear()
+            with session_scope() as db:
+                reader = CatalogReader(db)
+                featured = tuple(reader.get_featured_products(self.featured_limit))
+                categories = tuple(reader.get_categories())
+                counts = reader.get_facet_cube().facets().categories
+            snapshot = HomeSnapshot(featured, categories, counts, time.time())
+            self._watched_tags = {CATEGORIES_TAG, listing_tag(None)} | {product_tag(p.id) for p in featured}
+            self._snapshot = snapshot
+            self.rebuilds += 1
+        return snapshot
+    
+    def invalidate(self, tags: Optional[Set[str]] = None):
+        """Schedule a rebuild if the invalidated catalog tags touch the snapshot; None means everything"""
+        if tags is None or not tags.isdisjoint(self._watched_tags):
+            self._stale.set()
+    
+    def start(self):
+        """Start rebuilding in a daemon thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="home-snapshot", daemon=True)
+        self._thread.start()
+        logger.info("Home snapshot refresher started")
+    
+    def stop(self):
+        """Stop the refresher and wait for the current build to finish"""
+        self._stop.set()
+        self._stale.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+    
+    def stats(self) -> Dict[str, float]:
+        """Rebuild count and snapshot age"""
+        snapshot = self._snapshot
+        return {
+            "rebuilds": self.rebuilds,
+            "age_seconds": round(time.time() - snapshot.built_at, 1) if snapshot else -1,
+            "stale": self._stale.is_set()
+        }
+    
+    def _run(self):
+        """Rebuild when the snapshot goes stale, and every refresh interval regardless"""
+        while True:
+            self._stale.wait(self.refresh_seconds)
+            if self._stop.is_set():
+                return
+            if self._stale.is_set():
+                # Let a burst of catalog writes settle into one rebuild
+                if self._stop.wait(self.debounce_seconds):
+                    return
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Failed to rebuild home snapshot: {e}")
+                self._stale.set()
+                self._stop.wait(self.debounce_seconds)
+
+home_snapshot = HomeSnapshotCache()
+catalog_cache.add_listener(home_snapshot.invalidate)
+
+__all__ = ["HomeSnapshot", "HomeSnapshotCache", "home_snapshot"]
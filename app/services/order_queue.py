@@ -0,0 +1,221 @@
+"""Order intake queue: checkouts are validated, queued and committed in batches by worker threads"""
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.core.database import begin_write, session_scope
+from app.core.exceptions import OrderQueueFullError
+from app.core.write_coordinator import write_coordinator
+from app.models.order import Order
+from app.services.order_service import OrderService
+import asyncio
+import queue
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class PendingOrder:
+    """Handle of a queued checkout, resolved with the order once a worker commits it"""
+    
+    def __init__(self, user_id: int, idempotency_key: Optional[str] = None):
+        self.user_id = user_id
+        self.idempotency_key = idempotency_key
+        self.queued_at = time.monotonic()
+        self._future: Future = Future()
+    
+    @property
+    def done(self) -> bool:
+        """Whether the order was committed or rejected"""
+        return self._future.done()
+    
+    def result(self, timeout: Optional[float] = None) -> Order:
+        """Wait for the order; raises the checkout's error if it failed"""
+        return self._future.result(timeout)
+    
+    async def wait(self) -> Order:
+        """Wait for the order without blocking the event loop"""
+        return await asyncio.wrap_future(self._future)
+
+class OrderQueue:
+    """Bounded checkout queue drained by a fixed pool of threads, each committing a batch of orders at a time"""
+    
+    def __init__(self, workers: int, max_depth: int, batch_size: int):
+        # With no workers orders commit in the submitting thread, e.g. in scripts
+        self.workers = workers
+        self.max_depth = max_depth
+        self.batch_size = batch_size
+        self.submitted = 0
+        self.placed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.batches = 0
+        self.max_depth_seen = 0
+        self._queue: "queue.Queue[Optional[PendingOrder]]" = queue.Queue(maxsize=max_depth)
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+    
+    def start(self):
+        """Start the worker threads"""
+        with self._lock:
+            if self._threads or self.workers <= 0:
+                return
+            self._threads = [
+                threading.Thread(target=self._run, name=f"order-worker-{index}", daemon=True)
+                for index in range(self.workers)
+            ]
+        for thread in self._threads:
+            thread.start()
+        logger.info(f"Order queue started with {self.workers} workers")
+    
+    def stop(self):
+        """Commit the orders already queued, then stop the workers"""
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            self._queue.put(None)
+        for thread in threads:
+            thread.join()
+        if threads:
+            logger.info("Order queue stopped")
+    
+    def submit(self, user_id: int, idempotency_key: Optional[str] = None) -> PendingOrder:
+        """Validate a checkout and queue it; raises OrderQueueFullError instead of waiting past the configured depth"""
+        pending = PendingOrder(user_id, idempotency_key)
+        with session_scope() as db:
+            existing = OrderService(db).validate_checkout(user_id, idempotency_key)
+        if existing:
+            pending._future.set_result(existing)
+            return pending
+        
+        if self.workers <= 0:
+            self._commit_one(pending)
+            return pending
+        
+        self.start()
+        try:
+            self._queue.put_nowait(pending)
+        except queue.Full:
+            with self._lock:
+                self.rejected += 1
+            logger.warning(f"Order queue full, turned away checkout of user {user_id}")
+            raise OrderQueueFullError(self.max_depth)
+        with self._lock:
+            self.submitted += 1
+            self.max_depth_seen = max(self.max_depth_seen, self._queue.qsize())
+        return pending
+    
+    def stats(self) -> Dict[str, float]:
+        """Queue depth and order counters"""
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "depth": self._queue.qsize(),
+                "max_depth": self.max_depth,
+                "max_depth_seen": self.max_depth_seen,
+                "submitted": self.submitted,
+                "placed": self.placed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "batches": self.batches,
+                "avg_batch_size": round((self.placed + self.failed) / self.batches, 2) if self.batches else 0.0
+            }
+    
+    def _run(self):
+        """Take up to batch_size queued orders at a time and commit them together, until stopped"""
+        stopping = False
+        while not stopping:
+            batch = []
+            pending = self._queue.get()
+            while pending is not None:
+                batch.append(pending)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    pending = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            stopping = pending is None
+            if batch:
+                self._commit_batch(batch)
+    
+    def _commit_batch(self, batch: List[PendingOrder]):
+        """Write each order under its own savepoint and commit the batch in one transaction"""
+        if write_coordinator.enabled:
+            self._commit_through_coordinator(batch)
+            return
+        staged: List[Tuple[PendingOrder, Order]] = []
+        try:
+            with session_scope() as db:
+                begin_write(db)
+                order_service = OrderService(db)
+                for pending in batch:
+                    try:
+                        with db.begin_nested():
+                            order = order_service.stage_order_from_cart(pending.user_id, pending.idempotency_key)
+                        staged.append((pending, order))
+                    except Exception as e:
+                        # Only this order's savepoint is rolled back; the rest of the batch still commits
+                        self._resolve(pending, error=e)
+                db.commit()
+        except Exception as e:
+            # Also reached before any order was staged, e.g. when BEGIN IMMEDIATE times out on a locked database
+            logger.error(f"Failed to commit a batch of {len(batch)} orders: {e}")
+            for pending in batch:
+                if not pending.done:
+                    self._resolve(pending, error=e)
+            return
+        finally:
+            with self._lock:
+                self.batches += 1
+        for pending, order in staged:
+            self._resolve(pending, order=order)
+    
+    def _commit_through_coordinator(self, batch: List[PendingOrder]):
+        """Hand the batch to the write coordinator, which commits it with the other writes of its group"""
+        futures = [
+            (pending, write_coordinator.submit(
+                lambda db, pending=pending: OrderService(db).stage_order_from_cart(pending.user_id, pending.idempotency_key)
+            ))
+            for pending in batch
+        ]
+        for pending, future in futures:
+            try:
+                order = future.result()
+            except Exception as e:
+                self._resolve(pending, error=e)
+                continue
+            self._resolve(pending, order=order)
+        with self._lock:
+            self.batches += 1
+    
+    def _commit_one(self, pending: PendingOrder):
+        """Commit a single order in the calling thread"""
+        try:
+            with session_scope() as db:
+                order = OrderService(db).create_order_from_cart(pending.user_id, pending.idempotency_key)
+        except Exception as e:
+            self._resolve(pending, error=e)
+            return
+        self._resolve(pending, order=order)
+    
+    def _resolve(self, pending: PendingOrder, order: Optional[Order] = None, error: Optional[Exception] = None):
+        """Complete a pending order and count it"""
+        with self._lock:
+            if error is None:
+                self.placed += 1
+            else:
+                self.failed += 1
+        if error is None:
+            pending._future.set_result(order)
+        else:
+            logger.warning(f"Order of user {pending.user_id} failed: {error}")
+            pending._future.set_exception(error)
+
+order_queue = OrderQueue(
+    workers=settings.order_queue_workers,
+    max_depth=settings.order_queue_max_depth,
+    batch_size=settings.order_queue_batch_size
+)
+
+__all__ = ["PendingOrder", "OrderQueue", "order_queue"]
@@ -1,12 +1,44 @@
 """Order service for order processing"""
 from sqlalchemy.orm import Session
-from sqlalchemy import select
-from typing import List
-from app.models.order import Order, OrderItem
-from app.models.cart import Cart
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import String, select, update, delete, or_, tuple_, type_coerce
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from app.models.order import Order, OrderItem, CheckoutRequest
+from app.models.cart import Cart, CartItem
 from app.models.product import Product
-from app.core.exceptions import CartEmptyError, InsufficientStockError
+from app.core.config import settings
+from app.core.database import begin_write, dialect_insert
+from app.core.exceptions import CartEmptyError, CheckoutKeyConflictError, InsufficientStockError, InvalidCursorError
+from app.core.pagination import Page, encode_cursor, decode_cursor
+from app.core.write_coordinator import run_write, write_coordinator
 from app.services.cart_service import CartService
+from app.services.catalog_cache import invalidate_on_commit
+from app.services.reservation_service import ReservationService, held_quantity
+
+# Expired checkout keys deleted per new checkout, oldest first
+CHECKOUT_KEY_PURGE_BATCH = 100
+
+# Longest line summary stored on an order; lines past it are counted instead of listed
+ORDER_SUMMARY_LENGTH = 255
+
+# Order history pages compare and sort created_at as stored, so cursors round-trip whatever its text format
+_created_key = type_coerce(Order.created_at, String)
+
+def order_summary(lines: List[Tuple[str, int]]) -> str:
+    """One-line description of an order's (name, quantity) lines, such as: iPhone 15 × 2, AirPods and 3 more"""
+    # Room for the " and N more" tail
+    limit = ORDER_SUMMARY_LENGTH - 16
+    parts: List[str] = []
+    for name, quantity in lines:
+        part = f"{name} × {quantity}" if quantity > 1 else name
+        if len(", ".join(parts + [part])) > limit:
+            if not parts:
+                parts.append(part[:limit])
+            break
+        parts.append(part)
+    remaining = len(lines) - len(parts)
+    return ", ".join(parts) + (f" and {remaining} more" if remaining else "")
 
 class OrderService:
     """Service for order-related operations"""
@@ -15,58 +47,211 @@ class OrderService:
         self.db = db
         self.cart_service = CartService(db)
     
-    def create_order_from_cart(self, user_id: int) -> Order:
-        """Create order from user's cart"""
+    def create_order_from_cart(self, user_id: int, idempotency_key: Optional[str] = None) -> Order:
+        """Create order from user's cart; repeating an idempotency key returns the order it created"""
+        if idempotency_key and write_coordinator.enabled:
+            # A repeat is answered by a read instead of waiting for a group commit
+            existing = self.get_order_by_checkout_key(user_id, idempotency_key)
+            if existing:
+                return existing
+        return run_write(self.db, lambda db: OrderService(db).stage_order_from_cart(user_id, idempotency_key))
+    
+    def stage_order_from_cart(self, user_id: int, idempotency_key: Optional[str] = None) -> Order:
+        """Write an order from user's cart in the current transaction, leaving the commit to the caller"""
+        if idempotency_key:
+            existing = self.get_order_by_checkout_key(user_id, idempotency_key)
+            if existing:
+                return existing
+        
+        # Take the write lock before reading the cart, so a concurrent checkout of it finds it cleared
+        begin_write(self.db)
         cart = self.cart_service.get_cart_contents(user_id)
         
         if not cart.items:
+            # A repeat that started before the first attempt committed finds the cart already cleared
+            existing = idempotency_key and self.get_order_by_checkout_key(user_id, idempotency_key)
+            if existing:
+                return existing
             raise CartEmptyError()
         
-        # Verify stock availability for all items
-        for cart_item in cart.items:
-            product = cart_item.product
-            if not product.can_fulfill_quantity(cart_item.quantity):
-                raise InsufficientStockError(
-                    product.name, 
-                    cart_item.quantity, 
-                    product.stock
-                )
+        # Detach the line data from the ORM objects before the write transaction starts
+        lines = sorted(
+            (item.product_id, item.quantity, item.product.price, item.product.name)
+            for item in cart.items
+        )
+        
+        reservations_enabled = settings.reservations_enabled
+        sold_out = False
+        
+        # Claim the key before touching stock; a repeat waits here for the first attempt's write lock
+        if idempotency_key and not self._claim_checkout_key(user_id, idempotency_key):
+            existing = self.get_order_by_checkout_key(user_id, idempotency_key)
+            if existing:
+                return existing
+            raise CheckoutKeyConflictError(idempotency_key)
+        
+        # Reserve stock atomically; the WHERE clause makes overselling impossible
+        for product_id, quantity, price, name in lines:
+            sellable = Product.stock
+            if reservations_enabled:
+                # Units held by other carts are not for sale to this one
+                sellable = Product.stock - held_quantity(product_id, cart.id)
+            remaining = self.db.execute(
+                update(Product)
+                .where(Product.id == product_id, sellable >= quantity)
+                .values(stock=Product.stock - quantity)
+                .returning(Product.stock)
+                .execution_options(synchronize_session=False)
+            ).scalar_one_or_none()
+            if remaining == 0:
+                sold_out = True
+            if remaining is None:
+                if reservations_enabled:
+                    available = ReservationService(self.db).available_to_sell(product_id, cart.id)
+                else:
+                    available = self.db.execute(
+                        select(Product.stock).where(Product.id == product_id)
+                    ).scalar_one_or_none()
+                raise InsufficientStockError(name, quantity, max(0, available or 0))
         
         # Create order
         order = Order(
             user_id=user_id,
-            total=cart.total_amount,
-            status="pending"
+            total=sum(price * quantity for _, quantity, price, _ in lines),
+            status="pending",
+            item_count=sum(quantity for _, quantity, _, _ in lines),
+            summary=order_summary([(name, quantity) for _, quantity, _, name in lines])
         )
+        order.items = [
+            OrderItem(product_id=product_id, quantity=quantity, price=price)
+            for product_id, quantity, price, _ in lines
+        ]
         self.db.add(order)
-        self.db.flush()  # Get order ID
-        
-        # Create order items and update stock
-        for cart_item in cart.items:
-            order_item = OrderItem(
-                order_id=order.id,
-                product_id=cart_item.product_id,
-                quantity=cart_item.quantity,
-                price=cart_item.product.price
+        if idempotency_key:
+            self.db.flush()
+            self.db.execute(
+                update(CheckoutRequest)
+                .where(CheckoutRequest.key == idempotency_key)
+                .values(order_id=order.id)
             )
-            self.db.add(order_item)
-            
-            # Update product stock
-            product = cart_item.product
-            product.stock -= cart_item.quantity
         
-        # Clear cart
-        self.cart_service.clear_cart(user_id)
+        # Clear cart and convert its holds into the sale
+        self.db.execute(delete(CartItem).where(CartItem.cart_id == cart.id))
+        if reservations_enabled:
+            ReservationService(self.db).release_cart(cart.id)
         
-        self.db.commit()
-        self.db.refresh(order)
+        # Bulk UPDATEs bypass the ORM, so drop the stale stock from the session now and from the catalog cache on commit
+        for item in cart.items:
+            self.db.expire(item.product, ["stock"])
+        self.db.expire(cart, ["items"])
+        invalidate_on_commit(self.db, [product_id for product_id, _, _, _ in lines], stock_changed=sold_out)
         return order
     
+    def validate_checkout(self, user_id: int, idempotency_key: Optional[str] = None) -> Optional[Order]:
+        """Check a cart can be checked out before it is queued; returns the order if this key already placed one"""
+        if idempotency_key:
+            existing = self.get_order_by_checkout_key(user_id, idempotency_key)
+            if existing:
+                return existing
+        
+        # Plain rows rather than the ORM cart, as this runs once more per order than the write itself
+        lines = self.db.execute(
+            select(Product.name, CartItem.quantity, Product.stock)
+            .join(CartItem, CartItem.product_id == Product.id)
+            .join(Cart, Cart.id == CartItem.cart_id)
+            .where(Cart.user_id == user_id)
+        ).all()
+        if not lines:
+            raise CartEmptyError()
+        for name, quantity, stock in lines:
+            # The worker re-checks atomically; this only turns away carts that cannot succeed
+            if quantity > stock:
+                raise InsufficientStockError(name, quantity, stock)
+        return None
+    
+    def get_order_by_checkout_key(self, user_id: int, key: str) -> Optional[Order]:
+        """The order a live checkout key of this user created, if any"""
+        query = select(Order).join(CheckoutRequest, CheckoutRequest.order_id == Order.id).where(
+            CheckoutRequest.key == key,
+            CheckoutRequest.user_id == user_id,
+            CheckoutRequest.expires_at > datetime.utcnow()
+        )
+        return self.db.execute(query).scalar_one_or_none()
+    
+    def _claim_checkout_key(self, user_id: int, key: str) -> bool:
+        """Record a new checkout key in the current transaction; False if it is already taken"""
+        now = datetime.utcnow()
+        expired = (
+            select(CheckoutRequest.key)
+            .where(CheckoutRequest.expires_at <= now)
+            .order_by(CheckoutRequest.expires_at)
+            .limit(CHECKOUT_KEY_PURGE_BATCH)
+        )
+        self.db.execute(
+            delete(CheckoutRequest)
+            .where(or_(
+                CheckoutRequest.key.in_(expired),
+                (CheckoutRequest.key == key) & (CheckoutRequest.expires_at <= now)
+            ))
+            .execution_options(synchronize_session=False)
+        )
+        insert = dialect_insert(self.db)
+        result = self.db.execute(
+            insert(CheckoutRequest)
+            .values(
+                key=key,
+                user_id=user_id,
+                expires_at=now + timedelta(seconds=settings.checkout_key_ttl_seconds)
+            )
+            .on_conflict_do_nothing()
+        )
+        return result.rowcount == 1
+    
     def get_user_orders(self, user_id: int) -> List[Order]:
         """Get all orders for a user"""
         query = select(Order).where(Order.user_id == user_id).order_by(Order.created_at.desc())
         return list(self.db.execute(query).scalars().all())
     
+    def get_user_orders_page(self, user_id: int, cursor: Optional[str] = None, limit: int = 20) -> Page:
+        """Get one keyset-paginated page of a user's orders, newest first, without loading their items"""
+        query = select(Order, _created_key.label("created_key")).where(Order.user_id == user_id)
+        if cursor:
+            values = decode_cursor(cursor)
+            if len(values) != 2 or not isinstance(values[0], str) or not isinstance(values[1], int):
+                raise InvalidCursorError(cursor)
+            query = query.where(tuple_(_created_key, Order.id) < tuple_(*values))
+        
+        query = query.order_by(Order.created_at.desc(), Order.id.desc()).limit(limit + 1)
+        rows = self.db.execute(query).all()
+        
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last_order, last_created = rows[-1]
+            next_cursor = encode_cursor([last_created, last_order.id])
+        orders = [order for order, _ in rows]
+        self._fill_missing_summaries(orders)
+        return Page(orders, next_cursor)
+    
+    def _fill_missing_summaries(self, orders: List[Order]):
+        """Work out the summaries of orders placed before they were stored, with one query for the whole page"""
+        missing = {order.id: order for order in orders if order.item_count is None}
+        if not missing:
+            return
+        lines: Dict[int, List[Tuple[str, int]]] = {order_id: [] for order_id in missing}
+        rows = self.db.execute(
+            select(OrderItem.order_id, Product.name, OrderItem.quantity)
+            .join(Product, Product.id == OrderItem.product_id)
+            .where(OrderItem.order_id.in_(missing))
+            .order_by(OrderItem.order_id, OrderItem.product_id)
+        ).all()
+        for order_id, name, quantity in rows:
+            lines[order_id].append((name, quantity))
+        for order_id, order in missing.items():
+            # Loaded values rather than changes: listing orders never writes them back
+            set_committed_value(order, "item_count", sum(quantity for _, quantity in lines[order_id]))
+            set_committed_value(order, "summary", order_summary(lines[order_id]))
+    
     def get_order(self, order_id: int) -> Order:
         """Get order by ID"""
         return self.db.get(Order, order_id)
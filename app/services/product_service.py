@@ -1,9 +1,103 @@
 """Product service for business logic"""
 from sqlalchemy.orm import Session
-from sqlalchemy import select
-from typing import List, Optional
+from sqlalchemy import select, func, literal_column, table, column, tuple_
+from sqlalchemy.sql import Select
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+from decimal import Decimal
 from app.models.product import Product, Category
-from app.core.exceptions import ProductNotFoundError, CategoryNotFoundError
+from app.core.exceptions import ProductNotFoundError, CategoryNotFoundError, InvalidCursorError
+from app.core.pagination import Page, encode_cursor, decode_cursor
+from app.core.search_index import (
+    FTS_TABLE,
+    BM25_WEIGHTS,
+    search_index_available,
+    build_match_query,
+    search_terms,
+    similar_terms,
+    trigram_similarity
+)
+
+_fts = table(FTS_TABLE, column("rowid"))
+_fts_ref = literal_column(FTS_TABLE)
+
+# Sort keys accepted by get_products_page; ties are always broken by id
+PRODUCT_SORTS = {
+    "id": Product.id,
+    "price": Product.price,
+    "name": Product.name,
+}
+
+# Price facet bands as [low, high) dollar ranges; None leaves a side open
+PRICE_BANDS: List[Tuple[Optional[int], Optional[int]]] = [
+    (None, 100),
+    (100, 250),
+    (250, 500),
+    (500, 1000),
+    (1000, 2000),
+    (2000, None),
+]
+
+def price_band_label(band: int) -> str:
+    """Display label of a price band"""
+    low, high = PRICE_BANDS[band]
+    if low is None:
+        return f"Under ${high:,}"
+    if high is None:
+        return f"${low:,} and up"
+    return f"${low:,} – ${high:,}"
+
+class ProductFacets(NamedTuple):
+    """Facet counts; each facet's counts apply every filter except its own"""
+    categories: Dict[int, int]
+    price_bands: List[int]
+    in_stock: int
+    total: int
+
+class FacetCube(NamedTuple):
+    """Product counts per (category, price band, in stock) cell, from one query"""
+    cells: Tuple[Tuple[int, int, bool, int], ...]
+    
+    def count(self, category_id: Optional[int] = None, price_band: Optional[int] = None, in_stock: bool = False) -> int:
+        """Number of products matching the filters"""
+        return sum(
+            count for cell_category, band, cell_in_stock, count in self.cells
+            if (not category_id or cell_category == category_id)
+            and (price_band is None or band == price_band)
+            and (cell_in_stock or not in_stock)
+        )
+    
+    def facets(self, category_id: Optional[int] = None, price_band: Optional[int] = None, in_stock: bool = False) -> ProductFacets:
+        """Counts for every value of every facet under the current filters"""
+        categories: Dict[int, int] = {}
+        price_bands = [0] * len(PRICE_BANDS)
+        in_stock_count = 0
+        total = 0
+        for cell_category, band, cell_in_stock, count in self.cells:
+            category_match = not category_id or cell_category == category_id
+            band_match = price_band is None or band == price_band
+            stock_match = cell_in_stock or not in_stock
+            if band_match and stock_match:
+                categories[cell_category] = categories.get(cell_category, 0) + count
+            if category_match and stock_match:
+                price_bands[band] += count
+            if category_match and band_match and cell_in_stock:
+                in_stock_count += count
+            if category_match and band_match and stock_match:
+                total += count
+        return ProductFacets(categories, price_bands, in_stock_count, total)
+
+def product_cursor(product: Product, sort: str = "id") -> str:
+    """Cursor that resumes a get_products_page listing right after this product"""
+    return encode_cursor([getattr(product, sort), product.id])
+
+# Matches fetched for a typo-tolerant search before ranking them by similarity
+FUZZY_CANDIDATES = 200
+FUZZY_RELATIVE_CUTOFF = 0.8
+
+class ProductSearchHit(NamedTuple):
+    """A ranked search result with an optional highlighted snippet"""
+    product: Product
+    snippet: Optional[str]
 
 class ProductService:
     """Service for product-related operations"""
@@ -11,6 +105,54 @@ class ProductService:
     def __init__(self, db: Session):
         self.db = db
     
+    def _filter_products(
+        self,
+        query: Select,
+        category_id: Optional[int],
+        price_band: Optional[int],
+        in_stock: bool
+    ) -> Select:
+        """Apply the category, price band and in-stock filters to a products query"""
+        if category_id:
+            query = query.where(Product.category_id == category_id)
+        if price_band is not None:
+            low, high = PRICE_BANDS[price_band]
+            if low is not None:
+                query = query.where(Product.price >= low)
+            if high is not None:
+                query = query.where(Product.price < high)
+        if in_stock:
+            query = query.where(Product.stock > 0)
+        return query
+    
+    def _facet_query(self) -> Select:
+        """One row per category with its product count per price band, then its in-stock count per band"""
+        # Each count is an index range count on (category_id, price, stock), far cheaper than evaluating
+        # a band expression for every product and grouping the results
+        def band_count(band: int, in_stock: bool):
+            query = self._filter_products(select(func.count()), None, band, in_stock)
+            return query.where(Product.category_id == Category.id).scalar_subquery()
+        
+        bands = range(len(PRICE_BANDS))
+        return select(
+            Category.id,
+            *[band_count(band, False) for band in bands],
+            *[band_count(band, True) for band in bands]
+        )
+    
+    def get_facet_cube(self) -> FacetCube:
+        """Count products per category, price band and stock state in one query"""
+        cells = []
+        band_count = len(PRICE_BANDS)
+        for category_id, *counts in self.db.execute(self._facet_query()).all():
+            for band in range(band_count):
+                total, in_stock = counts[band], counts[band_count + band]
+                if in_stock:
+                    cells.append((category_id, band, True, in_stock))
+                if total > in_stock:
+                    cells.append((category_id, band, False, total - in_stock))
+        return FacetCube(tuple(cells))
+    
     def get_all_products(self, category_id: Optional[int] = None) -> List[Product]:
         """Get all products, optionally filtered by category"""
         query = select(Product)
@@ -18,6 +160,58 @@ class ProductService:
             query = query.where(Product.category_id == category_id)
         return list(self.db.execute(query).scalars().all())
     
+    def get_products_page(
+        self,
+        category_id: Optional[int] = None,
+        sort: str = "id",
+        cursor: Optional[str] = None,
+        limit: int = 24,
+        offset: int = 0,
+        price_band: Optional[int] = None,
+        in_stock: bool = False
+    ) -> Page:
+        """Get one keyset-paginated page of products, optionally filtered by category, price band and stock"""
+        if sort not in PRODUCT_SORTS:
+            raise ValueError(f"Unsupported product sort: {sort}")
+        sort_column = PRODUCT_SORTS[sort]
+        
+        query = self._filter_products(select(Product), category_id, price_band, in_stock)
+        
+        if cursor:
+            values = decode_cursor(cursor)
+            if len(values) != 2:
+                raise InvalidCursorError(cursor)
+            last_value, last_id = values
+            if sort == "price":
+                last_value = Decimal(str(last_value))
+            if sort == "id":
+                query = query.where(Product.id > last_id)
+            else:
+                query = query.where(tuple_(sort_column, Product.id) > tuple_(last_value, last_id))
+        elif offset:
+            # Jumping to an arbitrary position; follow-up pages should use the cursor
+            query = query.offset(offset)
+        
+        order_by = [Product.id] if sort == "id" else [sort_column, Product.id]
+        query = query.order_by(*order_by).limit(limit + 1)
+        products = list(self.db.execute(query).scalars().all())
+        
+        next_cursor = None
+        if len(products) > limit:
+            products = products[:limit]
+            next_cursor = product_cursor(products[-1], sort)
+        return Page(products, next_cursor)
+    
+    def count_products(
+        self,
+        category_id: Optional[int] = None,
+        price_band: Optional[int] = None,
+        in_stock: bool = False
+    ) -> int:
+        """Count products, optionally filtered by category, price band and stock"""
+        query = self._filter_products(select(func.count(Product.id)), category_id, price_band, in_stock)
+        return self.db.execute(query).scalar_one()
+    
     def get_product(self, product_id: int) -> Product:
         """Get product by ID"""
         product = self.db.get(Product, product_id)
@@ -25,6 +219,14 @@ class ProductService:
             raise ProductNotFoundError(product_id)
         return product
     
+    def get_products_by_ids(self, product_ids: List[int]) -> List[Product]:
+        """Get products in the order of their ids, skipping ids that no longer exist"""
+        products = {
+            product.id: product
+            for product in self.db.execute(select(Product).where(Product.id.in_(product_ids))).scalars()
+        }
+        return [products[product_id] for product_id in product_ids if product_id in products]
+    
     def get_all_categories(self) -> List[Category]:
         """Get all categories"""
         return list(self.db.execute(select(Category)).scalars().all())
@@ -36,12 +238,87 @@ class ProductService:
             raise CategoryNotFoundError(category_id)
         return category
     
-    def search_products(self, query: str) -> List[Product]:
-        """Search products by name or description"""
+    def search_products(self, query: str, limit: int = 100) -> List[Product]:
+        """Search products by name, description or category, best matches first"""
+        return [hit.product for hit in self.search_products_with_snippets(query, limit)]
+    
+    def search_products_with_snippets(self, query: str, limit: int = 100) -> List[ProductSearchHit]:
+        """Search products, returning BM25-ranked hits with highlighted snippets"""
+        if not search_index_available(self.db):
+            return [ProductSearchHit(product, None) for product in self._search_products_like(query, limit)]
+        
+        match = build_match_query(query)
+        if not match:
+            return []
+        
+        hits = self._match_products(match, limit)
+        if hits:
+            return hits
+        return self._search_products_fuzzy(query, limit)
+    
+    def _match_products(self, match: str, limit: int) -> List[ProductSearchHit]:
+        """Run an FTS5 MATCH expression, best BM25 rank first"""
+        rank = func.bm25(_fts_ref, *BM25_WEIGHTS)
+        snippet = func.snippet(_fts_ref, -1, "<mark>", "</mark>", "…", 12)
+        search_query = (
+            select(Product, snippet)
+            .join(_fts, _fts.c.rowid == Product.id)
+            .where(_fts_ref.op("MATCH")(match))
+            .order_by(rank)
+            .limit(limit)
+        )
+        return [ProductSearchHit(product, text) for product, text in self.db.execute(search_query).all()]
+    
+    def _search_products_fuzzy(self, query: str, limit: int) -> List[ProductSearchHit]:
+        """Retry a search with no hits using indexed words similar to the misspelled ones"""
+        words = search_terms(query)
+        alternatives = []
+        for word in words:
+            similar = similar_terms(self.db, word)
+            # Only words nearly as close as the best one, so "macbok" means "macbook" and not also "mac"
+            options = [term for term, score in similar if score >= similar[0].similarity * FUZZY_RELATIVE_CUTOFF]
+            alternatives.append(options if word in options else options + [word])
+        if not any(len(options) > 1 or options[0] != word for options, word in zip(alternatives, words)):
+            return []
+        
+        # Take the first matches without ranking them all by BM25, so the cost is bounded by the
+        # candidate count however common the corrected words are, then rank by similarity
+        match = " AND ".join(
+            "(" + " OR ".join(f'"{option}"*' for option in options) + ")" for options in alternatives
+        )
+        snippet = func.snippet(_fts_ref, -1, "<mark>", "</mark>", "…", 12)
+        candidates = [
+            ProductSearchHit(product, text)
+            for product, text in self.db.execute(
+                select(Product, snippet)
+                .join(_fts, _fts.c.rowid == Product.id)
+                .where(_fts_ref.op("MATCH")(match))
+                .limit(FUZZY_CANDIDATES)
+            ).all()
+        ]
+        
+        def closeness(word: str, text_words: Set[str]) -> float:
+            return max((trigram_similarity(word, text_word) for text_word in text_words), default=0.0)
+        
+        def similarity(hit: ProductSearchHit) -> float:
+            # Name matches count fully and description matches half, in the spirit of the BM25 weights
+            name_words = set(search_terms(hit.product.name))
+            description_words = set(search_terms(hit.product.description or ""))
+            return sum(
+                max(closeness(word, name_words), closeness(word, description_words) / 2)
+                for word in words
+            ) / len(words)
+        
+        scores = {hit.product.id: similarity(hit) for hit in candidates}
+        candidates.sort(key=lambda hit: (-scores[hit.product.id], hit.product.id))
+        return candidates[:limit]
+    
+    def _search_products_like(self, query: str, limit: int) -> List[Product]:
+        """Fallback substring search for databases without FTS5"""
         search_query = select(Product).where(
             Product.name.ilike(f"%{query}%") |
             Product.description.ilike(f"%{query}%")
-        )
+        ).limit(limit)
         return list(self.db.execute(search_query).scalars().all())
     
     def get_featured_products(self, limit: int = 8) -> List[Product]:
@@ -0,0 +1,168 @@
+"""Reservation service for time-limited stock holds"""
+from sqlalchemy.orm import Session
+from sqlalchemy import select, update, delete, func, bindparam
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Optional
+from app.models.product import Product
+from app.models.reservation import StockHold, StockHoldTotal
+from app.core.config import settings
+from app.core.database import session_scope, dialect_insert
+from app.core.exceptions import InsufficientStockError
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+def held_quantity(product_id, exclude_cart_id=None):
+    """Scalar expression for units held on a product, optionally excluding one cart's own hold"""
+    total = select(func.coalesce(func.sum(StockHoldTotal.quantity), 0)).where(
+        StockHoldTotal.product_id == product_id
+    ).scalar_subquery()
+    if exclude_cart_id is None:
+        return total
+    own = select(func.coalesce(func.sum(StockHold.quantity), 0)).where(
+        StockHold.cart_id == exclude_cart_id,
+        StockHold.product_id == product_id
+    ).scalar_subquery()
+    return total - own
+
+class ReservationService:
+    """Service for placing and releasing stock holds"""
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def available_to_sell(self, product_id: int, exclude_cart_id: Optional[int] = None) -> int:
+        """Stock minus held units, optionally ignoring one cart's own hold"""
+        query = select(Product.stock - held_quantity(product_id, exclude_cart_id)).where(
+            Product.id == product_id
+        )
+        return self.db.execute(query).scalar_one_or_none() or 0
+    
+    def place_hold(self, cart_id: int, product_id: int, quantity: int, product_name: str) -> None:
+        """Hold `quantity` units for a cart line, refreshing its expiry; raises if not available"""
+        current = self.db.execute(
+            select(StockHold.quantity).where(StockHold.cart_id == cart_id, StockHold.product_id == product_id)
+        ).scalar_one_or_none() or 0
+        delta = quantity - current
+        insert = dialect_insert(self.db)
+        
+        # Claim the extra units on the product's running total only if they are still unheld
+        self.db.execute(
+            insert(StockHoldTotal).values(product_id=product_id, quantity=0).on_conflict_do_nothing()
+        )
+        stock = select(Product.stock).where(Product.id == product_id).scalar_subquery()
+        result = self.db.execute(
+            update(StockHoldTotal)
+            .where(StockHoldTotal.product_id == product_id, stock - StockHoldTotal.quantity >= delta)
+            .values(quantity=StockHoldTotal.quantity + delta)
+        )
+        if result.rowcount != 1:
+            raise InsufficientStockError(product_name, quantity, max(0, self.available_to_sell(product_id, cart_id)))
+        
+        expires_at = datetime.utcnow() + timedelta(seconds=settings.reservation_ttl_seconds)
+        statement = insert(StockHold).values(
+            cart_id=cart_id,
+            product_id=product_id,
+            quantity=quantity,
+            expires_at=expires_at
+        )
+        self.db.execute(statement.on_conflict_do_update(
+            index_elements=["cart_id", "product_id"],
+            set_={"quantity": quantity, "expires_at": expires_at}
+        ))
+    
+    def release_hold(self, cart_id: int, product_id: int) -> None:
+        """Release the hold for one cart line"""
+        self._release(
+            delete(StockHold).where(StockHold.cart_id == cart_id, StockHold.product_id == product_id)
+        )
+    
+    def release_cart(self, cart_id: int) -> None:
+        """Release every hold of a cart"""
+        self._release(delete(StockHold).where(StockHold.cart_id == cart_id))
+    
+    def release_expired(self, batch_size: int) -> int:
+        """Delete up to `batch_size` expired holds and commit; returns how many were released"""
+        expired = select(StockHold.id).where(
+            StockHold.expires_at <= datetime.utcnow()
+        ).order_by(StockHold.expires_at).limit(batch_size)
+        released = self._release(delete(StockHold).where(StockHold.id.in_(expired)))
+        self.db.commit()
+        return released
+    
+    def _release(self, statement) -> int:
+        """Delete holds and give their units back to the running totals"""
+        rows = self.db.execute(
+            statement.returning(StockHold.product_id, StockHold.quantity)
+        ).all()
+        released = Counter()
+        for product_id, quantity in rows:
+            released[product_id] += quantity
+        if released:
+            totals = StockHoldTotal.__table__
+            self.db.execute(
+                update(totals)
+                .where(totals.c.product_id == bindparam("held_product_id"))
+                .values(quantity=totals.c.quantity - bindparam("released_quantity")),
+                [
+                    {"held_product_id": product_id, "released_quantity": quantity}
+                    for product_id, quantity in released.items()
+                ]
+            )
+        return len(rows)
+
+class ReservationSweeper:
+    """Background thread that releases expired holds in batches"""
+    
+    def __init__(
+        self,
+        interval_seconds: float = settings.reservation_sweep_interval_seconds,
+        batch_size: int = settings.reservation_sweep_batch_size
+    ):
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self.released_total = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self):
+        """Start sweeping in a daemon thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="reservation-sweeper", daemon=True)
+        self._thread.start()
+        logger.info("Reservation sweeper started")
+    
+    def stop(self):
+        """Stop the sweeper and wait for the current batch to finish"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+    
+    def sweep(self) -> int:
+        """Release expired holds batch by batch until none are left"""
+        released = 0
+        while not self._stop.is_set():
+            with session_scope() as db:
+                count = ReservationService(db).release_expired(self.batch_size)
+            released += count
+            if count < self.batch_size:
+                break
+        self.released_total += released
+        return released
+    
+    def _run(self):
+        """Sweep every interval until stopped"""
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                released = self.sweep()
+                if released:
+                    logger.info(f"Released {released} expired stock holds")
+            except Exception as e:
+                logger.error(f"Failed to release expired stock holds: {e}")
+
+reservation_sweeper = ReservationSweeper()
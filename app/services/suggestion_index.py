@@ -0,0 +1,212 @@
+"""In-memory prefix index of product and category names for search-as-you-type"""
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+from array import array
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+from app.core.database import session_scope
+from app.models.product import Product, Category
+import re
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Words start at a letter after a non-alphanumeric; sizes and model numbers ("256gb", "15") are reached
+# through the word before them, which keeps the index about half as large
+_WORD_START = re.compile(r"(?<![^\W_])[^\W\d_]")
+
+def normalize(text: str) -> str:
+    """Case-fold and collapse whitespace so keys compare the way users type"""
+    return " ".join(text.casefold().split())
+
+def word_starts(name: str) -> List[int]:
+    """Offsets in a normalized name where a word begins"""
+    return [match.start() for match in _WORD_START.finditer(name)]
+
+class Suggestion(NamedTuple):
+    """One type-ahead suggestion"""
+    kind: str  # "product" or "category"
+    id: int
+    label: str
+
+class SuggestionIndex:
+    """Sorted array of every word-start suffix of product names, searched by bisection"""
+    
+    def __init__(self):
+        # Entry j is the suffix _keys[_ids[j]][_offsets[j]:]; entries are kept in suffix order
+        self._ids = array("i")
+        self._offsets = array("H")
+        self._keys: Dict[int, str] = {}
+        self._labels: Dict[int, str] = {}
+        self._categories: Dict[int, Tuple[str, str]] = {}
+        self._lock = threading.RLock()
+        self.ready = False
+    
+    def rebuild(self):
+        """Load every product and category name from the database and rebuild the index"""
+        start = time.perf_counter()
+        with session_scope() as db:
+            products = db.execute(select(Product.id, Product.name)).all()
+            categories = db.execute(select(Category.id, Category.name)).all()
+        self.build(products, categories)
+        logger.info(f"Suggestion index built: {len(products)} products in {time.perf_counter() - start:.2f}s")
+    
+    def build(self, products: List[Tuple[int, str]], categories: List[Tuple[int, str]]):
+        """Replace the index contents with these (id, name) pairs"""
+        keys = {product_id: normalize(name) for product_id, name in products}
+        labels = {product_id: name for product_id, name in products}
+        
+        # Entries packed as id << 16 | offset and sorted one leading character at a time, so only one
+        # bucket's suffix strings exist at once
+        buckets: Dict[str, List[int]] = {}
+        for product_id, key in keys.items():
+            for offset in word_starts(key):
+                buckets.setdefault(key[offset], []).append(product_id << 16 | offset)
+        ids, offsets = array("i"), array("H")
+        for first in sorted(buckets):
+            bucket = buckets.pop(first)
+            bucket.sort(key=lambda entry: keys[entry >> 16][entry & 0xFFFF:])
+            ids.extend(entry >> 16 for entry in bucket)
+            offsets.extend(entry & 0xFFFF for entry in bucket)
+        
+        with self._lock:
+            self._ids, self._offsets, self._keys, self._labels = ids, offsets, keys, labels
+            self._categories = {category_id: (normalize(name), name) for category_id, name in categories}
+            self.ready = True
+    
+    def suggest(self, query: str, limit: int = 8) -> List[Suggestion]:
+        """Categories, then products, with a word starting with the query; whole-name matches first"""
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        
+        with self._lock:
+            suggestions = [
+                Suggestion("category", category_id, label)
+                for category_id, (key, label) in self._categories.items()
+                if any(key.startswith(prefix, offset) for offset in word_starts(key))
+            ][:limit]
+            
+            # Look a little past the limit so whole-name matches can be ranked ahead of inner-word ones
+            matches: Dict[int, int] = {}
+            for product_id, offset in self._scan(prefix):
+                matches.setdefault(product_id, offset)
+                if len(matches) >= limit * 4:
+                    break
+            ranked = sorted(matches.items(), key=lambda match: (match[1] > 0, len(self._keys[match[0]])))
+            suggestions.extend(
+                Suggestion("product", product_id, self._labels[product_id])
+                for product_id, _ in ranked[:limit - len(suggestions)]
+            )
+        return suggestions
+    
+    def add_product(self, product_id: int, name: str):
+        """Index a new product, or re-index a renamed one"""
+        with self._lock:
+            self._remove(product_id)
+            key = normalize(name)
+            self._keys[product_id] = key
+            self._labels[product_id] = name
+            for offset in word_starts(key):
+                position = self._lower_bound(key[offset:])
+                self._ids.insert(position, product_id)
+                self._offsets.insert(position, offset)
+    
+    def remove_product(self, product_id: int):
+        """Drop a deleted product"""
+        with self._lock:
+            self._remove(product_id)
+    
+    def set_category(self, category_id: int, name: Optional[str]):
+        """Add or rename a category, or drop it when name is None"""
+        with self._lock:
+            if name is None:
+                self._categories.pop(category_id, None)
+            else:
+                self._categories[category_id] = (normalize(name), name)
+    
+    def stats(self) -> Dict[str, int]:
+        """Index size"""
+        with self._lock:
+            return {
+                "products": len(self._keys),
+                "entries": len(self._ids),
+                "categories": len(self._categories)
+            }
+    
+    def _suffix(self, position: int) -> str:
+        """Key of the entry at position; caller holds the lock"""
+        return self._keys[self._ids[position]][self._offsets[position]:]
+    
+    def _lower_bound(self, key: str) -> int:
+        """First position whose suffix is not less than key; caller holds the lock"""
+        low, high = 0, len(self._ids)
+        while low < high:
+            middle = (low + high) // 2
+            if self._suffix(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+    
+    def _scan(self, prefix: str) -> Iterator[Tuple[int, int]]:
+        """(product_id, offset) of entries whose suffix starts with prefix, in suffix order"""
+        for position in range(self._lower_bound(prefix), len(self._ids)):
+            product_id, offset = self._ids[position], self._offsets[position]
+            if not self._keys[product_id].startswith(prefix, offset):
+                return
+            yield product_id, offset
+    
+    def _remove(self, product_id: int):
+        """Remove a product's entries; caller holds the lock"""
+        key = self._keys.get(product_id)
+        if key is None:
+            return
+        for offset in word_starts(key):
+            # Entries with equal suffixes are adjacent; step over other products' ones
+            position = self._lower_bound(key[offset:])
+            while self._ids[position] != product_id or self._offsets[position] != offset:
+                position += 1
+            del self._ids[position]
+            del self._offsets[position]
+        del self._keys[product_id]
+        del self._labels[product_id]
+
+suggestion_index = SuggestionIndex()
+
+def _collect_name_changes(session: Session, flush_context):
+    """Record product and category names a flush adds, renames or deletes"""
+    changes = session.info.setdefault("suggestion_changes", {})
+    for obj in session.new:
+        if isinstance(obj, (Product, Category)):
+            changes[(type(obj), obj.id)] = obj.name
+    for obj in session.dirty:
+        if isinstance(obj, (Product, Category)) and inspect(obj).attrs.name.history.has_changes():
+            changes[(type(obj), obj.id)] = obj.name
+    for obj in session.deleted:
+        if isinstance(obj, (Product, Category)):
+            changes[(type(obj), obj.id)] = None
+
+def _apply_name_changes(session: Session):
+    """Update the index once the writes are committed"""
+    changes = session.info.pop("suggestion_changes", None)
+    if not changes or not suggestion_index.ready:
+        return
+    for (model, obj_id), name in changes.items():
+        if model is Category:
+            suggestion_index.set_category(obj_id, name)
+        elif name is None:
+            suggestion_index.remove_product(obj_id)
+        else:
+            suggestion_index.add_product(obj_id, name)
+
+def _discard_name_changes(session: Session):
+    """Forget pending changes of a rolled back transaction"""
+    session.info.pop("suggestion_changes", None)
+
+event.listen(Session, "after_flush", _collect_name_changes)
+event.listen(Session, "after_commit", _apply_name_changes)
+event.listen(Session, "after_rollback", _discard_name_changes)
+
+__all__ = ["Suggestion", "SuggestionIndex", "suggestion_index", "normalize"]
@@ -0,0 +1,119 @@
+"""In-process cache of signed-in users with TTL expiry and write-driven invalidation"""
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from collections import OrderedDict
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+from app.core.config import settings
+from app.models.user import User
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class UserSnapshot(NamedTuple):
+    """Detached, read-only view of an active user"""
+    id: int
+    email: str
+    username: str
+    is_superuser: bool
+    
+    @classmethod
+    def from_model(cls, user: User) -> "UserSnapshot":
+        """Copy the cached columns off an ORM user"""
+        return cls(user.id, user.email, user.username, bool(user.is_superuser))
+
+class UserCache:
+    """Bounded LRU cache of active users by id, so page views skip the users table"""
+    
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[int, Tuple[UserSnapshot, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        # Bumped on every invalidation so loads racing with a write are not cached
+        self._generation = 0
+    
+    def get_or_load(self, user_id: int, loader: Callable[[int], Optional[User]]) -> Optional[UserSnapshot]:
+        """The active user with this id, loading it on a miss; None if missing or deactivated"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                if entry[1] > time.monotonic():
+                    self._entries.move_to_end(user_id)
+                    self.hits += 1
+                    return entry[0]
+                del self._entries[user_id]
+            self.misses += 1
+            generation = self._generation
+        
+        user = loader(user_id)
+        if user is None or not user.is_active:
+            return None
+        snapshot = UserSnapshot.from_model(user)
+        with self._lock:
+            if generation == self._generation:
+                self._entries[user_id] = (snapshot, time.monotonic() + self.ttl_seconds)
+                self._entries.move_to_end(user_id)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return snapshot
+    
+    def invalidate(self, user_id: int):
+        """Drop a user, e.g. after it is deactivated or renamed"""
+        with self._lock:
+            self._generation += 1
+            if self._entries.pop(user_id, None) is not None:
+                self.invalidations += 1
+    
+    def clear(self):
+        """Drop all entries"""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+    
+    def stats(self) -> Dict[str, int]:
+        """Hit, miss and eviction counters"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations
+            }
+
+user_cache = UserCache(
+    max_entries=settings.user_cache_max_entries,
+    ttl_seconds=settings.user_cache_ttl_seconds
+)
+
+def _collect_user_changes(session: Session, flush_context):
+    """Record users a flush changes or deletes"""
+    changed = session.info.setdefault("user_cache_ids", set())
+    for obj in session.dirty:
+        if isinstance(obj, User) and session.is_modified(obj):
+            changed.add(obj.id)
+    for obj in session.deleted:
+        if isinstance(obj, User):
+            changed.add(obj.id)
+
+def _apply_user_changes(session: Session):
+    """Invalidate changed users once the writes are committed"""
+    for user_id in session.info.pop("user_cache_ids", ()):
+        user_cache.invalidate(user_id)
+
+def _discard_user_changes(session: Session):
+    """Forget pending invalidations of a rolled back transaction"""
+    session.info.pop("user_cache_ids", None)
+
+event.listen(Session, "after_flush", _collect_user_changes)
+event.listen(Session, "after_commit", _apply_user_changes)
+event.listen(Session, "after_rollback", _discard_user_changes)
+
+__all__ = ["UserSnapshot", "UserCache", "user_cache"]
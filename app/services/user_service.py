@@ -3,8 +3,12 @@ from sqlalchemy.orm import Session
 from sqlalchemy import select
 from typing import Optional
 from app.models.user import User
-from app.core.security import get_password_hash, verify_password
+from app.core.security import get_password_hash, verify_and_update_password
 from app.core.exceptions import UserNotFoundError
+from app.core.write_coordinator import run_write
+import logging
+
+logger = logging.getLogger(__name__)
 
 class UserService:
     """Service for user-related operations"""
@@ -14,16 +18,20 @@ class UserService:
     
     def create_user(self, email: str, username: str, password: str) -> User:
         """Create a new user"""
+        # Hashed before the write, so the slow part never holds the write lock
         hashed_password = get_password_hash(password)
-        user = User(
-            email=email,
-            username=username,
-            hashed_password=hashed_password
-        )
-        self.db.add(user)
-        self.db.commit()
-        self.db.refresh(user)
-        return user
+        
+        def insert_user(db: Session) -> User:
+            user = User(
+                email=email,
+                username=username,
+                hashed_password=hashed_password
+            )
+            db.add(user)
+            db.flush()
+            db.refresh(user)
+            return user
+        return run_write(self.db, insert_user)
     
     def get_user_by_email(self, email: str) -> Optional[User]:
         """Get user by email"""
@@ -38,9 +46,29 @@ class UserService:
     def authenticate_user(self, email: str, password: str) -> Optional[User]:
         """Authenticate user with email and password"""
         user = self.get_user_by_email(email)
-        if user and verify_password(password, user.hashed_password):
-            return user
-        return None
+        if not user:
+            return None
+        
+        valid, new_hash = verify_and_update_password(password, user.hashed_password)
+        if not valid:
+            return None
+        if new_hash:
+            self.upgrade_password_hash(user, new_hash)
+        return user
+    
+    def upgrade_password_hash(self, user: User, new_hash: str):
+        """Store a rehash made at login; the plain password is only at hand then"""
+        user.hashed_password = new_hash
+        self.db.commit()
+        logger.info(f"Rehashed password of user {user.id}")
+    
+    def deactivate_user(self, user_id: int) -> User:
+        """Deactivate a user; its sessions stop resolving as soon as this commits"""
+        user = self.get_user(user_id)
+        user.is_active = False
+        self.db.commit()
+        logger.info(f"Deactivated user {user_id}")
+        return user
     
     def get_user(self, user_id: int) -> User:
         """Get user by ID"""
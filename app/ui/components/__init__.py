@@ -3,8 +3,9 @@
 try:
     from app.ui.components.navigation import Navigation
     from app.ui.components.product_card import ProductCard
+    from app.ui.components.virtual_product_grid import VirtualProductGrid
     
-    __all__ = ["Navigation", "ProductCard"]
+    __all__ = ["Navigation", "ProductCard", "VirtualProductGrid"]
     
 except ImportError as e:
     import logging
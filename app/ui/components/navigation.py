@@ -1,5 +1,8 @@
 """Navigation component"""
 from nicegui import ui
+from typing import Awaitable, Callable, Optional
+from app.core.config import settings
+from app.services.suggestion_index import Suggestion, suggestion_index
 from app.ui.state import AppState
 
 class Navigation:
@@ -7,6 +10,8 @@ class Navigation:
     
     def __init__(self, app_state: AppState):
         self.app_state = app_state
+        # Set by pages that can show search results in place instead of navigating
+        self.on_search: Optional[Callable[[], Awaitable[None]]] = None
         self._create_navigation()
     
     def _create_navigation(self):
@@ -22,21 +27,67 @@ class Navigation:
                 with ui.row().classes('items-center gap-6'):
                     ui.link('Home', '/').classes('text-gray-600 hover:text-gray-800 font-medium')
                     ui.link('Products', '/products').classes('text-gray-600 hover:text-gray-800 font-medium')
+                    ui.link('Orders', '/orders').classes('text-gray-600 hover:text-gray-800 font-medium')
                     
-                    # Search bar
-                    search_input = ui.input(placeholder='Search products...').classes('w-64')
-                    search_input.on('keydown.enter', lambda: self._handle_search(search_input.value))
+                    # Search bar; the browser debounces typing, so only the settled value reaches the server
+                    self.search_input = ui.input(
+                        placeholder='Search products...',
+                        on_change=lambda e: self._show_suggestions(e.value)
+                    ).props(f'debounce={settings.search_debounce_ms}').classes('w-64')
+                    self.search_input.on('keydown.enter', lambda: self._handle_search(self.search_input.value))
+                    with self.search_input:
+                        self.suggestions_menu = ui.menu().props('no-parent-event no-focus fit')
+                    self._suggested_query = ''
                     
                     # Cart button
                     with ui.button(icon='shopping_cart', on_click=lambda: ui.navigate.to('/cart')).classes('relative'):
-                        if self.app_state.cart_items_count > 0:
-                            ui.badge(str(self.app_state.cart_items_count)).classes('absolute -top-2 -right-2 bg-red-500 text-white')
+                        # Follows the shared count, so the badge updates in place after cart changes
+                        self.cart_badge = ui.badge().classes('absolute -top-2 -right-2 bg-red-500 text-white')
+                        self._show_cart_count(self.app_state.cart_items_count)
+                        self.app_state.add_cart_count_listener(self._show_cart_count)
                     
                     # User info
                     if self.app_state.current_user:
                         ui.label(f'Welcome, {self.app_state.current_user.username}').classes('text-sm text-gray-600')
     
-    def _handle_search(self, query: str):
+    def _show_cart_count(self, count: int):
+        """Show the cart count on the badge, hidden while the cart is empty"""
+        self.cart_badge.set_text(str(count))
+        self.cart_badge.set_visibility(count > 0)
+    
+    def _show_suggestions(self, query: str):
+        """Show type-ahead suggestions for the current input"""
+        query = (query or '').strip()
+        if query == self._suggested_query:
+            return
+        self._suggested_query = query
+        
+        suggestions = suggestion_index.suggest(query, settings.search_suggestion_limit) if query else []
+        self.suggestions_menu.clear()
+        if not suggestions:
+            self.suggestions_menu.close()
+            return
+        with self.suggestions_menu:
+            for suggestion in suggestions:
+                with ui.menu_item(on_click=lambda s=suggestion: self._pick_suggestion(s)).classes('gap-2'):
+                    ui.icon('category' if suggestion.kind == 'category' else 'search').classes('text-gray-400')
+                    ui.label(suggestion.label)
+        self.suggestions_menu.open()
+    
+    async def _pick_suggestion(self, suggestion: Suggestion):
+        """Open a category, or search for a product by its name"""
+        if suggestion.kind == 'category':
+            self.app_state.selected_category = suggestion.id
+            self.app_state.search_query = ""
+            ui.navigate.to('/products')
+        else:
+            await self._handle_search(suggestion.label)
+    
+    async def _handle_search(self, query: str):
         """Handle search functionality"""
+        self.suggestions_menu.close()
         self.app_state.search_query = query.strip()
-        ui.navigate.to('/products')
\ No newline at end of file
+        if self.on_search:
+            await self.on_search()
+        else:
+            ui.navigate.to('/products')
\ No newline at end of file
@@ -1,53 +1,73 @@
 """Product card component"""
 from nicegui import ui
+from typing import Optional
 from app.models.product import Product
 from app.ui.state import AppState
 
 class ProductCard:
-    """Product card component"""
+    """Product card component that can be re-bound to another product"""
     
-    def __init__(self, product: Product, app_state: AppState):
-        self.product = product
+    def __init__(self, product: Optional[Product], app_state: AppState):
+        self.product = None
         self.app_state = app_state
         self._create_card()
+        self.set_product(product)
     
     def _create_card(self):
         """Create the product card"""
-        with ui.card().classes('product-card apple-card w-full max-w-sm mx-auto'):
+        with ui.card().classes('product-card apple-card w-full max-w-sm mx-auto') as self.card:
             # Product image placeholder
             with ui.column().classes('w-full'):
                 ui.image('/static/images/apple-logo.png').classes('w-full h-48 object-cover rounded-t-lg')
                 
                 with ui.column().classes('p-4 gap-3'):
                     # Product name
-                    ui.label(self.product.name).classes('text-lg font-semibold text-gray-800')
+                    self.name_label = ui.label().classes('text-lg font-semibold text-gray-800')
                     
                     # Product description
-                    if self.product.description:
-                        ui.label(self.product.description).classes('text-sm text-gray-600 line-clamp-2')
+                    self.description_label = ui.label().classes('text-sm text-gray-600 line-clamp-2')
                     
                     # Price and stock
                     with ui.row().classes('items-center justify-between'):
-                        ui.label(f'${self.product.price:,.2f}').classes('text-xl font-bold text-blue-600')
-                        
-                        if self.product.stock > 0:
-                            ui.label(f'{self.product.stock} in stock').classes('text-xs text-green-600')
-                        else:
-                            ui.label('Out of stock').classes('text-xs text-red-600')
+                        self.price_label = ui.label().classes('text-xl font-bold text-blue-600')
+                        self.stock_label = ui.label().classes('text-xs')
                     
                     # Add to cart button
-                    if self.product.stock > 0:
-                        ui.button(
-                            'Add to Cart',
-                            icon='add_shopping_cart',
-                            on_click=lambda: self._add_to_cart()
-                        ).classes('apple-button w-full')
-                    else:
-                        ui.button('Out of Stock').classes('w-full bg-gray-400 cursor-not-allowed').props('disabled')
+                    self.add_button = ui.button(
+                        'Add to Cart',
+                        icon='add_shopping_cart',
+                        on_click=self._add_to_cart
+                    ).classes('apple-button w-full')
+                    self.out_of_stock_button = ui.button('Out of Stock').classes('w-full bg-gray-400 cursor-not-allowed').props('disabled')
+    
+    def set_product(self, product: Optional[Product]):
+        """Show another product in this card, hiding it when there is none"""
+        self.product = product
+        self.card.set_visibility(product is not None)
+        if product is None:
+            return
+        
+        self.name_label.set_text(product.name)
+        self.description_label.set_text(product.description or '')
+        self.description_label.set_visibility(bool(product.description))
+        self.price_label.set_text(f'${product.price:,.2f}')
+        
+        in_stock = product.stock > 0
+        if in_stock:
+            self.stock_label.set_text(f'{product.stock} in stock')
+            self.stock_label.classes(add='text-green-600', remove='text-red-600')
+        else:
+            self.stock_label.set_text('Out of stock')
+            self.stock_label.classes(add='text-red-600', remove='text-green-600')
+        self.add_button.set_visibility(in_stock)
+        self.out_of_stock_button.set_visibility(not in_stock)
     
-    def _add_to_cart(self):
+    async def _add_to_cart(self):
         """Add product to cart"""
-        if self.app_state.add_to_cart(self.product.id):
-            ui.notify(f'{self.product.name} added to cart!', type='positive')
+        product = self.product
+        if product is None:
+            return
+        if await self.app_state.add_to_cart_async(product.id):
+            ui.notify(f'{product.name} added to cart!', type='positive')
         else:
-            ui.notify('Failed to add product to cart', type='negative')
\ No newline at end of file
+            ui.notify('Failed to add product to cart', type='negative')
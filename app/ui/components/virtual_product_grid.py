@@ -0,0 +1,125 @@
+"""Virtualized product grid component"""
+from nicegui import ui
+from itertools import zip_longest
+from typing import Dict, Optional
+from app.core.executor import run_blocking
+from app.services.product_service import product_cursor
+from app.ui.state import AppState
+from app.ui.components.product_card import ProductCard
+
+class VirtualProductGrid:
+    """Product grid that only materializes the cards in or near the viewport"""
+    
+    def __init__(
+        self,
+        app_state: AppState,
+        columns: int = 4,
+        row_height: int = 460,
+        viewport_rows: int = 2,
+        buffer_rows: int = 1
+    ):
+        self.app_state = app_state
+        self.columns = columns
+        self.row_height = row_height
+        self.viewport_rows = viewport_rows
+        self.buffer_rows = buffer_rows
+        self.pool_rows = viewport_rows + 2 * buffer_rows
+        
+        self.total = 0
+        self.first_row: Optional[int] = None
+        # Cursor resuming the listing at each offset of the current window
+        self.anchors: Dict[int, str] = {}
+        # Bumped by every load, so results of superseded loads are dropped
+        self._version = 0
+        
+        self._create_grid()
+    
+    @property
+    def total_rows(self) -> int:
+        """Number of grid rows needed for all matching products"""
+        return -(-self.total // self.columns)
+    
+    def _create_grid(self):
+        """Create the scroll area, spacers and the fixed pool of recycled cards"""
+        self.scroll_area = ui.scroll_area().classes('w-full').style(
+            f'height: {self.viewport_rows * self.row_height}px'
+        )
+        self.scroll_area.on('scroll', self._handle_scroll, args=['verticalPosition'], throttle=0.1)
+        
+        with self.scroll_area:
+            self.top_spacer = ui.element('div').classes('w-full')
+            with ui.grid(columns=self.columns).classes('w-full gap-6'):
+                self.slots = []
+                for _ in range(self.pool_rows * self.columns):
+                    card = ProductCard(None, self.app_state)
+                    card.card.style(f'height: {self.row_height - 24}px')
+                    self.slots.append(card)
+            self.bottom_spacer = ui.element('div').classes('w-full')
+        
+        with ui.column().classes('w-full text-center py-12') as self.empty_message:
+            ui.icon('inventory_2', size='4rem').classes('text-gray-400 mb-4')
+            ui.label('No products found').classes('text-xl text-gray-500 mb-2')
+            ui.label('Try adjusting your search or filters').classes('text-gray-400')
+        
+        # Hidden until the first reset() has loaded the products
+        self.scroll_area.set_visibility(False)
+        self.empty_message.set_visibility(False)
+    
+    async def reset(self):
+        """Reload the grid from the top for the current search, category and sort"""
+        self._version += 1
+        version = self._version
+        total = await run_blocking(self.app_state.count_products, self.app_state.selected_category)
+        if version != self._version:
+            return
+        
+        self.total = total
+        self.first_row = None
+        self.anchors = {}
+        
+        self.scroll_area.set_visibility(self.total > 0)
+        self.empty_message.set_visibility(self.total == 0)
+        if self.total:
+            self.scroll_area.scroll_to(pixels=0)
+        await self._render_window(0)
+    
+    async def _handle_scroll(self, e):
+        """Move the card window when the viewport crosses a row boundary"""
+        position = e.args['verticalPosition']
+        await self._render_window(max(0, int(position // self.row_height) - self.buffer_rows))
+    
+    async def _render_window(self, first_row: int):
+        """Bind the card pool to the products starting at `first_row`"""
+        first_row = min(first_row, max(0, self.total_rows - self.pool_rows))
+        if first_row == self.first_row:
+            return
+        
+        self._version += 1
+        version = self._version
+        offset = first_row * self.columns
+        limit = len(self.slots)
+        products = []
+        if self.total:
+            products = await run_blocking(
+                self.app_state.get_products_window,
+                self.app_state.selected_category,
+                offset,
+                limit,
+                self.anchors.get(offset)
+            )
+            if version != self._version:
+                return
+        
+        # Scrolling by whole rows lands on one of these offsets, so the next fetch is a keyset seek
+        self.anchors = {
+            offset + index + 1: product_cursor(product, self.app_state.product_sort)
+            for index, product in enumerate(products)
+        }
+        
+        for card, product in zip_longest(self.slots, products):
+            card.set_product(product)
+        
+        rows_after = max(0, self.total_rows - first_row - self.pool_rows)
+        self.top_spacer.style(f'height: {first_row * self.row_height}px')
+        self.bottom_spacer.style(f'height: {rows_after * self.row_height}px')
+        self.first_row = first_row
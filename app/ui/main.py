@@ -1,21 +1,64 @@
 """Main NiceGUI application"""
-from nicegui import ui, app
+from nicegui import ui, app, context
+from starlette.middleware.sessions import SessionMiddleware
 from app.ui.pages.home import HomePage
 from app.ui.pages.products import ProductsPage
 from app.ui.pages.cart import CartPage
 from app.ui.pages.checkout import CheckoutPage
+from app.ui.pages.orders import OrdersPage
 from app.ui.components.navigation import Navigation
 from app.ui.state import AppState
 from app.core.config import settings
+from app.core.database import session_scope, get_session_stats
+from app.core.executor import blocking_executor, run_blocking
+from app.core.security import password_hasher
+from app.core.session_store import session_store
+from app.core.write_coordinator import write_coordinator
+from app.services.catalog_cache import catalog_cache
+from app.services.home_snapshot import home_snapshot
+from app.services.order_queue import order_queue
+from app.services.reservation_service import reservation_sweeper
+from app.services.sales_analytics import sales_analytics
+from app.services.suggestion_index import suggestion_index
+from app.services.user_cache import user_cache
+from typing import Any, Callable, List
 import logging
 
 logger = logging.getLogger(__name__)
 
+async def _load(*loaders: Callable[[], Any]) -> List[Any]:
+    """Run page data loaders in one pooled thread, sharing one database session"""
+    def load():
+        with session_scope():
+            return [loader() for loader in loaders]
+    return await run_blocking(load)
+
+def _session_key() -> str:
+    """Key of the current browser session, shared by all of its tabs"""
+    try:
+        return app.storage.browser['id']
+    except (RuntimeError, KeyError):
+        # Without session middleware fall back to per-tab state
+        return context.get_client().id
+
+async def _app_state() -> AppState:
+    """Load the UI state of the requesting browser session"""
+    return await run_blocking(AppState, _session_key())
+
+async def _build_suggestion_index():
+    """Build the search suggestion index off the event loop"""
+    await run_blocking(suggestion_index.rebuild)
+
+async def _start_home_snapshot():
+    """Build the home page snapshot off the event loop, then keep it fresh in the background"""
+    await run_blocking(home_snapshot.refresh)
+    home_snapshot.start()
+
 def create_app():
     """Create and configure the NiceGUI application"""
     
-    # Initialize application state
-    app_state = AppState()
+    # Signed session cookie identifying each browser; NiceGUI adds its request tracking on top
+    app.add_middleware(SessionMiddleware, secret_key=settings.secret_key)
     
     # Configure NiceGUI
     ui.run_with.uvicorn_config(
@@ -59,30 +102,84 @@ def create_app():
     </style>
     ''')
     
-    # Setup routes
+    # Fork the password workers first, before the blocking pool starts its threads
+    app.on_startup(password_hasher.start)
+    app.on_startup(_build_suggestion_index)
+    app.on_startup(_start_home_snapshot)
+    app.on_startup(write_coordinator.start)
+    app.on_startup(order_queue.start)
+    app.on_shutdown(home_snapshot.stop)
+    # Commit the orders still queued while the database is up
+    app.on_shutdown(order_queue.stop)
+    app.on_shutdown(write_coordinator.stop)
+    app.on_shutdown(blocking_executor.shutdown)
+    app.on_shutdown(password_hasher.shutdown)
+    
+    # Release expired stock holds in the background
+    if settings.reservations_enabled:
+        app.on_startup(reservation_sweeper.start)
+        app.on_shutdown(reservation_sweeper.stop)
+    
+    # Setup routes; page data is loaded on the blocking pool so the event loop keeps serving other clients
     @ui.page('/')
-    def home_page():
+    async def home_page():
+        app_state = await _app_state()
+        # Same for every visitor and built ahead of time; only the first request after startup can wait on it
+        snapshot = home_snapshot.snapshot or await run_blocking(home_snapshot.get)
         with ui.column().classes('w-full min-h-screen bg-gray-50'):
             Navigation(app_state)
-            HomePage(app_state)
+            HomePage(app_state, snapshot)
     
     @ui.page('/products')
-    def products_page():
+    async def products_page():
+        app_state = await _app_state()
+        [categories] = await _load(app_state.get_categories)
         with ui.column().classes('w-full min-h-screen bg-gray-50'):
-            Navigation(app_state)
-            ProductsPage(app_state)
+            navigation = Navigation(app_state)
+            products = ProductsPage(app_state, categories)
+            navigation.on_search = products.refresh_products
+        await products.refresh_products()
     
     @ui.page('/cart')
-    def cart_page():
+    async def cart_page():
+        app_state = await _app_state()
+        [cart] = await _load(app_state.get_cart)
         with ui.column().classes('w-full min-h-screen bg-gray-50'):
             Navigation(app_state)
-            CartPage(app_state)
+            CartPage(app_state, cart)
     
     @ui.page('/checkout')
-    def checkout_page():
+    async def checkout_page():
+        app_state = await _app_state()
+        [cart] = await _load(app_state.get_cart)
+        with ui.column().classes('w-full min-h-screen bg-gray-50'):
+            Navigation(app_state)
+            CheckoutPage(app_state, cart)
+    
+    @ui.page('/orders')
+    async def orders_page():
+        app_state = await _app_state()
+        [orders] = await _load(app_state.get_order_history)
         with ui.column().classes('w-full min-h-screen bg-gray-50'):
             Navigation(app_state)
-            CheckoutPage(app_state)
+            OrdersPage(app_state, orders)
+    
+    @app.get('/api/metrics')
+    def metrics():
+        """Runtime metrics for soak and load testing"""
+        return {
+            "sessions": get_session_stats(),
+            "catalog_cache": catalog_cache.stats(),
+            "blocking_pool": blocking_executor.stats(),
+            "client_sessions": session_store.stats(),
+            "suggestion_index": suggestion_index.stats(),
+            "home_snapshot": home_snapshot.stats(),
+            "password_hasher": password_hasher.stats(),
+            "user_cache": user_cache.stats(),
+            "order_queue": order_queue.stats(),
+            "write_coordinator": write_coordinator.stats(),
+            "sales_analytics": sales_analytics.stats()
+        }
     
     logger.info(f"Apple Store application created successfully")
     return app
\ No newline at end of file
@@ -5,8 +5,9 @@ try:
     from app.ui.pages.products import ProductsPage
     from app.ui.pages.cart import CartPage
     from app.ui.pages.checkout import CheckoutPage
+    from app.ui.pages.orders import OrdersPage
     
-    __all__ = ["HomePage", "ProductsPage", "CartPage", "CheckoutPage"]
+    __all__ = ["HomePage", "ProductsPage", "CartPage", "CheckoutPage", "OrdersPage"]
     
 except ImportError as e:
     import logging
@@ -1,27 +1,86 @@
 """Shopping cart page"""
 from nicegui import ui
+from typing import Dict, Optional
+from app.models.cart import Cart
 from app.ui.state import AppState
 
+class CartLine:
+    """One cart line whose quantity and subtotal update in place"""
+    
+    def __init__(self, item, page: "CartPage"):
+        self.product_id = item.product_id
+        self.price = float(item.product.price)
+        self.quantity = item.quantity
+        self.page = page
+        self._create_line(item)
+    
+    @property
+    def subtotal(self) -> float:
+        """Calculate subtotal for this line"""
+        return self.price * self.quantity
+    
+    def _create_line(self, item):
+        """Create cart item row"""
+        with ui.card().classes('w-full p-4') as self.card:
+            with ui.row().classes('w-full items-center gap-4'):
+                # Product image placeholder
+                ui.image('/static/images/apple-logo.png').classes('w-16 h-16 object-cover rounded')
+                
+                # Product details
+                with ui.column().classes('flex-1'):
+                    ui.label(item.product.name).classes('font-semibold text-lg')
+                    ui.label(f'${item.product.price:,.2f}').classes('text-blue-600 font-medium')
+                
+                # Quantity controls
+                with ui.row().classes('items-center gap-2'):
+                    ui.button(
+                        icon='remove',
+                        on_click=lambda: self.page._decrease_quantity(self.product_id, self.quantity)
+                    ).classes('w-8 h-8 rounded-full')
+                    
+                    self.quantity_label = ui.label().classes('w-8 text-center font-medium')
+                    
+                    ui.button(
+                        icon='add',
+                        on_click=lambda: self.page._increase_quantity(self.product_id, self.quantity)
+                    ).classes('w-8 h-8 rounded-full')
+                
+                # Subtotal
+                self.subtotal_label = ui.label().classes('font-semibold text-lg w-20 text-right')
+                
+                # Remove button
+                ui.button(
+                    icon='delete',
+                    on_click=lambda: self.page._remove_item(self.product_id)
+                ).classes('text-red-500 hover:bg-red-50')
+        self.set_quantity(self.quantity)
+    
+    def set_quantity(self, quantity: int):
+        """Show a new quantity and subtotal"""
+        self.quantity = quantity
+        self.quantity_label.set_text(str(quantity))
+        self.subtotal_label.set_text(f'${self.subtotal:,.2f}')
+
 class CartPage:
     """Shopping cart page component"""
     
-    def __init__(self, app_state: AppState):
+    def __init__(self, app_state: AppState, cart: Optional[Cart]):
         self.app_state = app_state
-        self._create_page()
+        self.lines: Dict[int, CartLine] = {}
+        self._create_page(cart)
     
-    def _create_page(self):
+    def _create_page(self, cart: Optional[Cart]):
         """Create the cart page"""
         with ui.column().classes('w-full max-w-4xl mx-auto px-4 py-8 gap-8'):
             # Page header
             ui.label('Shopping Cart').classes('text-3xl font-bold')
             
             # Cart contents
-            self._create_cart_contents()
+            with ui.column().classes('w-full gap-8') as self.contents:
+                self._create_cart_contents(cart)
     
-    def _create_cart_contents(self):
+    def _create_cart_contents(self, cart: Optional[Cart]):
         """Create cart contents"""
-        cart = self.app_state.get_cart()
-        
         if not cart or not cart.items:
             self._create_empty_cart()
             return
@@ -29,10 +88,10 @@ class CartPage:
         # Cart items
         with ui.column().classes('w-full gap-4'):
             for item in cart.items:
-                self._create_cart_item(item)
+                self.lines[item.product_id] = CartLine(item, self)
         
         # Cart summary
-        self._create_cart_summary(cart)
+        self._create_cart_summary()
     
     def _create_empty_cart(self):
         """Create empty cart message"""
@@ -46,50 +105,15 @@ class CartPage:
                 on_click=lambda: ui.navigate.to('/products')
             ).classes('apple-button')
     
-    def _create_cart_item(self, item):
-        """Create cart item row"""
-        with ui.card().classes('w-full p-4'):
-            with ui.row().classes('w-full items-center gap-4'):
-                # Product image placeholder
-                ui.image('/static/images/apple-logo.png').classes('w-16 h-16 object-cover rounded')
-                
-                # Product details
-                with ui.column().classes('flex-1'):
-                    ui.label(item.product.name).classes('font-semibold text-lg')
-                    ui.label(f'${item.product.price:,.2f}').classes('text-blue-600 font-medium')
-                
-                # Quantity controls
-                with ui.row().classes('items-center gap-2'):
-                    ui.button(
-                        icon='remove',
-                        on_click=lambda item_id=item.product_id: self._decrease_quantity(item_id, item.quantity)
-                    ).classes('w-8 h-8 rounded-full')
-                    
-                    ui.label(str(item.quantity)).classes('w-8 text-center font-medium')
-                    
-                    ui.button(
-                        icon='add',
-                        on_click=lambda item_id=item.product_id: self._increase_quantity(item_id, item.quantity)
-                    ).classes('w-8 h-8 rounded-full')
-                
-                # Subtotal
-                ui.label(f'${item.subtotal:,.2f}').classes('font-semibold text-lg w-20 text-right')
-                
-                # Remove button
-                ui.button(
-                    icon='delete',
-                    on_click=lambda item_id=item.product_id: self._remove_item(item_id)
-                ).classes('text-red-500 hover:bg-red-50')
-    
-    def _create_cart_summary(self, cart):
+    def _create_cart_summary(self):
         """Create cart summary"""
         with ui.card().classes('w-full p-6 mt-6'):
             with ui.column().classes('gap-4'):
                 ui.label('Order Summary').classes('text-xl font-semibold mb-4')
                 
                 with ui.row().classes('w-full justify-between'):
-                    ui.label(f'Total Items: {cart.total_items}').classes('text-gray-600')
-                    ui.label(f'${cart.total_amount:,.2f}').classes('text-2xl font-bold text-blue-600')
+                    self.total_items_label = ui.label().classes('text-gray-600')
+                    self.total_amount_label = ui.label().classes('text-2xl font-bold text-blue-600')
                 
                 ui.separator()
                 
@@ -105,28 +129,49 @@ class CartPage:
                         icon='payment',
                         on_click=lambda: ui.navigate.to('/checkout')
                     ).classes('flex-1 apple-button')
+        self._update_summary()
     
-    def _increase_quantity(self, product_id: int, current_quantity: int):
-        """Increase item quantity"""
-        if self.app_state.update_cart_item(product_id, current_quantity + 1):
-            ui.navigate.to('/cart')  # Refresh page
+    def _update_summary(self):
+        """Recompute the totals from the lines on the page"""
+        total_items = 0
+        total_amount = 0.0
+        for line in self.lines.values():
+            total_items += line.quantity
+            total_amount += line.subtotal
+        self.total_items_label.set_text(f'Total Items: {total_items}')
+        self.total_amount_label.set_text(f'${total_amount:,.2f}')
+    
+    async def _set_quantity(self, product_id: int, quantity: int):
+        """Update one line and the summary in place"""
+        if await self.app_state.update_cart_item_async(product_id, quantity) and product_id in self.lines:
+            self.lines[product_id].set_quantity(quantity)
+            self._update_summary()
         else:
             ui.notify('Failed to update quantity', type='negative')
     
-    def _decrease_quantity(self, product_id: int, current_quantity: int):
+    async def _increase_quantity(self, product_id: int, current_quantity: int):
+        """Increase item quantity"""
+        await self._set_quantity(product_id, current_quantity + 1)
+    
+    async def _decrease_quantity(self, product_id: int, current_quantity: int):
         """Decrease item quantity"""
         if current_quantity > 1:
-            if self.app_state.update_cart_item(product_id, current_quantity - 1):
-                ui.navigate.to('/cart')  # Refresh page
-            else:
-                ui.notify('Failed to update quantity', type='negative')
+            await self._set_quantity(product_id, current_quantity - 1)
         else:
-            self._remove_item(product_id)
+            await self._remove_item(product_id)
     
-    def _remove_item(self, product_id: int):
+    async def _remove_item(self, product_id: int):
         """Remove item from cart"""
-        if self.app_state.remove_from_cart(product_id):
+        if await self.app_state.remove_from_cart_async(product_id):
             ui.notify('Item removed from cart', type='positive')
-            ui.navigate.to('/cart')  # Refresh page
+            line = self.lines.pop(product_id, None)
+            if line is not None:
+                line.card.delete()
+            if self.lines:
+                self._update_summary()
+            else:
+                self.contents.clear()
+                with self.contents:
+                    self._create_empty_cart()
         else:
-            ui.notify('Failed to remove item', type='negative')
\ No newline at end of file
+            ui.notify('Failed to remove item', type='negative')
@@ -1,18 +1,22 @@
 """Checkout page"""
 from nicegui import ui
+from typing import Optional
+from app.core.exceptions import AppError, OrderQueueFullError
+from app.models.cart import Cart
 from app.ui.state import AppState
+import uuid
 
 class CheckoutPage:
     """Checkout page component"""
     
-    def __init__(self, app_state: AppState):
+    def __init__(self, app_state: AppState, cart: Optional[Cart]):
         self.app_state = app_state
-        self._create_page()
+        # One key per rendered form, so repeated submits of it place a single order
+        self.checkout_key = uuid.uuid4().hex
+        self._create_page(cart)
     
-    def _create_page(self):
+    def _create_page(self, cart: Optional[Cart]):
         """Create the checkout page"""
-        cart = self.app_state.get_cart()
-        
         if not cart or not cart.items:
             self._create_empty_cart_message()
             return
@@ -21,12 +25,13 @@ class CheckoutPage:
             # Page header
             ui.label('Checkout').classes('text-3xl font-bold')
             
+            totals = cart.totals()
             with ui.row().classes('w-full gap-8'):
                 # Order summary
-                self._create_order_summary(cart)
+                self._create_order_summary(cart, totals)
                 
                 # Checkout form
-                self._create_checkout_form(cart)
+                self._create_checkout_form(totals)
     
     def _create_empty_cart_message(self):
         """Create empty cart message"""
@@ -38,7 +43,7 @@ class CheckoutPage:
                 on_click=lambda: ui.navigate.to('/products')
             ).classes('apple-button')
     
-    def _create_order_summary(self, cart):
+    def _create_order_summary(self, cart, totals):
         """Create order summary section"""
         with ui.column().classes('flex-1'):
             with ui.card().classes('w-full p-6'):
@@ -57,9 +62,9 @@ class CheckoutPage:
                 # Total
                 with ui.row().classes('w-full justify-between items-center'):
                     ui.label('Total').classes('text-xl font-bold')
-                    ui.label(f'${cart.total_amount:,.2f}').classes('text-xl font-bold text-blue-600')
+                    ui.label(f'${totals.total_amount:,.2f}').classes('text-xl font-bold text-blue-600')
     
-    def _create_checkout_form(self, cart):
+    def _create_checkout_form(self, totals):
         """Create checkout form"""
         with ui.column().classes('flex-1'):
             with ui.card().classes('w-full p-6'):
@@ -92,16 +97,25 @@ class CheckoutPage:
                 
                 # Place order button
                 ui.button(
-                    f'Place Order - ${cart.total_amount:,.2f}',
+                    f'Place Order - ${totals.total_amount:,.2f}',
                     icon='payment',
                     on_click=self._place_order
                 ).classes('apple-button w-full mt-6 text-lg py-3')
     
-    def _place_order(self):
-        """Process the order"""
-        if self.app_state.checkout():
-            ui.notify('Order placed successfully!', type='positive')
-            # Redirect to a success page or home
-            ui.navigate.to('/')
-        else:
-            ui.notify('Failed to place order. Please try again.', type='negative')
\ No newline at end of file
+    async def _place_order(self):
+        """Queue the order and report back once it is placed"""
+        try:
+            pending = await self.app_state.submit_order(self.checkout_key)
+            if not pending.done:
+                ui.notify('Order received, confirming...', type='info')
+            await self.app_state.wait_for_order(pending)
+        except AppError as e:
+            ui.notify(e.message, type='warning' if isinstance(e, OrderQueueFullError) else 'negative')
+            return
+        except Exception:
+            ui.notify('Failed to place order. Please try again.', type='negative')
+            return
+        
+        ui.notify('Order placed successfully!', type='positive')
+        # Redirect to a success page or home
+        ui.navigate.to('/')
\ No newline at end of file
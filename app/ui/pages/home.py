@@ -1,13 +1,17 @@
 """Home page"""
 from nicegui import ui
 from app.ui.state import AppState
+from app.services.home_snapshot import HomeSnapshot
 from app.ui.components.product_card import ProductCard
 
 class HomePage:
     """Home page component"""
     
-    def __init__(self, app_state: AppState):
+    def __init__(self, app_state: AppState, snapshot: HomeSnapshot):
         self.app_state = app_state
+        self.featured_products = snapshot.featured_products
+        self.categories = snapshot.categories
+        self.category_counts = snapshot.category_counts
         self._create_page()
     
     def _create_page(self):
@@ -37,7 +41,7 @@ class HomePage:
         """Create featured products section"""
         ui.label('Featured Products').classes('text-3xl font-bold text-center mb-8')
         
-        featured_products = self.app_state.get_featured_products()
+        featured_products = self.featured_products
         
         if featured_products:
             with ui.grid(columns=4).classes('w-full gap-6'):
@@ -50,7 +54,7 @@ class HomePage:
         """Create categories section"""
         ui.label('Shop by Category').classes('text-3xl font-bold text-center mb-8')
         
-        categories = self.app_state.get_categories()
+        categories = self.categories
         
         if categories:
             with ui.grid(columns=3).classes('w-full gap-6'):
@@ -58,6 +62,8 @@ class HomePage:
                     with ui.card().classes('apple-card p-6 text-center cursor-pointer hover:shadow-lg transition-shadow'):
                         ui.icon('category', size='3rem').classes('text-blue-600 mb-4')
                         ui.label(category.name).classes('text-xl font-semibold mb-2')
+                        count = self.category_counts.get(category.id, 0)
+                        ui.label(f'{count} product{"" if count == 1 else "s"}').classes('text-sm text-gray-500 mb-2')
                         if category.description:
                             ui.label(category.description).classes('text-gray-600 mb-4')
                         ui.button(
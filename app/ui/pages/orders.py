@@ -0,0 +1,71 @@
+"""Order history page"""
+from nicegui import ui
+from typing import Optional
+from app.core.executor import run_blocking
+from app.core.pagination import Page
+from app.models.order import Order
+from app.ui.state import AppState
+
+class OrdersPage:
+    """Order history page component, listing the newest orders first and more on demand"""
+    
+    def __init__(self, app_state: AppState, page: Page):
+        self.app_state = app_state
+        self.next_cursor: Optional[str] = None
+        self._create_page(page)
+    
+    def _create_page(self, page: Page):
+        """Create the order history page"""
+        with ui.column().classes('w-full max-w-4xl mx-auto px-4 py-8 gap-8'):
+            # Page header
+            ui.label('Order History').classes('text-3xl font-bold')
+            
+            if not page.items:
+                self._create_no_orders_message()
+                return
+            
+            self.orders_column = ui.column().classes('w-full gap-4')
+            self.load_more_button = ui.button(
+                'Show More Orders',
+                icon='expand_more',
+                on_click=self._load_more
+            ).classes('apple-button self-center')
+            self._add_orders(page)
+    
+    def _create_no_orders_message(self):
+        """Create no orders message"""
+        with ui.column().classes('w-full text-center'):
+            ui.label('You have no orders yet').classes('text-2xl text-gray-500 mb-4')
+            ui.button(
+                'Start Shopping',
+                icon='shopping_bag',
+                on_click=lambda: ui.navigate.to('/products')
+            ).classes('apple-button')
+    
+    def _add_orders(self, page: Page):
+        """Append a page of orders and show the button only while more remain"""
+        with self.orders_column:
+            for order in page.items:
+                self._create_order_row(order)
+        self.next_cursor = page.next_cursor
+        self.load_more_button.set_visibility(page.next_cursor is not None)
+    
+    def _create_order_row(self, order: Order):
+        """Create one order row from its stored summary, without loading its items"""
+        with ui.card().classes('w-full p-4'):
+            with ui.row().classes('w-full items-center justify-between gap-4'):
+                with ui.column().classes('flex-1 gap-1'):
+                    with ui.row().classes('items-center gap-2'):
+                        ui.label(f'Order #{order.id}').classes('font-semibold text-lg')
+                        ui.badge(order.status.capitalize()).classes('bg-gray-200 text-gray-700')
+                    ui.label(order.created_at.strftime('%B %d, %Y')).classes('text-sm text-gray-600')
+                    ui.label(order.summary).classes('text-gray-800')
+                with ui.column().classes('items-end gap-1'):
+                    ui.label(f'${order.total:,.2f}').classes('font-semibold text-lg text-blue-600')
+                    items = 'item' if order.item_count == 1 else 'items'
+                    ui.label(f'{order.item_count} {items}').classes('text-sm text-gray-600')
+    
+    async def _load_more(self):
+        """Load the next page of orders off the event loop"""
+        page = await run_blocking(self.app_state.get_order_history, self.next_cursor)
+        self._add_orders(page)
@@ -1,13 +1,24 @@
 """Products page"""
 from nicegui import ui
+from typing import List, Optional
+from app.core.executor import run_blocking
 from app.ui.state import AppState
-from app.ui.components.product_card import ProductCard
+from app.services.catalog_cache import CategorySnapshot
+from app.services.product_service import PRICE_BANDS, ProductFacets, price_band_label
+from app.ui.components.virtual_product_grid import VirtualProductGrid
 
 class ProductsPage:
     """Products page component"""
     
-    def __init__(self, app_state: AppState):
+    SORT_OPTIONS = {
+        'id': 'Featured',
+        'price': 'Price: Low to High',
+        'name': 'Name: A to Z',
+    }
+    
+    def __init__(self, app_state: AppState, categories: List[CategorySnapshot]):
         self.app_state = app_state
+        self.categories = categories
         self._create_page()
     
     def _create_page(self):
@@ -24,29 +35,49 @@ class ProductsPage:
     
     def _create_header(self):
         """Create page header"""
+        self.title_label = ui.label().classes('text-3xl font-bold')
+        self._update_header()
+    
+    def _update_header(self):
+        """Show the current search or category in the page title"""
         if self.app_state.search_query:
-            ui.label(f'Search Results for "{self.app_state.search_query}"').classes('text-3xl font-bold')
+            self.title_label.set_text(f'Search Results for "{self.app_state.search_query}"')
         elif self.app_state.selected_category:
-            categories = self.app_state.get_categories()
-            category_name = next((cat.name for cat in categories if cat.id == self.app_state.selected_category), "Products")
-            ui.label(category_name).classes('text-3xl font-bold')
+            category_name = next((cat.name for cat in self.categories if cat.id == self.app_state.selected_category), "Products")
+            self.title_label.set_text(category_name)
         else:
-            ui.label('All Products').classes('text-3xl font-bold')
+            self.title_label.set_text('All Products')
     
     def _create_filters(self):
         """Create filters section"""
         with ui.row().classes('w-full items-center gap-4 mb-6'):
             # Category filter
-            categories = self.app_state.get_categories()
-            category_options = [{'label': 'All Categories', 'value': None}]
-            category_options.extend([{'label': cat.name, 'value': cat.id} for cat in categories])
-            
-            category_select = ui.select(
-                options=category_options,
+            self.category_select = ui.select(
+                options=self._category_options(None),
                 value=self.app_state.selected_category,
                 label='Category'
             ).classes('w-48')
-            category_select.on('update:model-value', lambda e: self._filter_by_category(e.args))
+            self.category_select.on_value_change(lambda e: self._filter_by_category(e.value))
+            
+            # Price band filter
+            self.price_select = ui.select(
+                options=self._price_options(None),
+                value=self.app_state.price_band,
+                label='Price'
+            ).classes('w-48')
+            self.price_select.on_value_change(lambda e: self._filter_by_price(e.value))
+            
+            # Stock filter
+            self.stock_switch = ui.switch('In stock only', value=self.app_state.in_stock)
+            self.stock_switch.on_value_change(lambda e: self._filter_by_stock(e.value))
+            
+            # Sort order
+            self.sort_select = ui.select(
+                options=self.SORT_OPTIONS,
+                value=self.app_state.product_sort,
+                label='Sort by'
+            ).classes('w-48')
+            self.sort_select.on_value_change(lambda e: self._change_sort(e.value))
             
             # Clear filters button
             ui.button(
@@ -56,27 +87,78 @@ class ProductsPage:
             ).classes('apple-button')
     
     def _create_products_grid(self):
-        """Create products grid"""
-        products = self.app_state.get_products(self.app_state.selected_category)
-        
-        if products:
-            with ui.grid(columns=4).classes('w-full gap-6'):
-                for product in products:
-                    ProductCard(product, self.app_state)
-        else:
-            with ui.column().classes('w-full text-center py-12'):
-                ui.icon('inventory_2', size='4rem').classes('text-gray-400 mb-4')
-                ui.label('No products found').classes('text-xl text-gray-500 mb-2')
-                ui.label('Try adjusting your search or filters').classes('text-gray-400')
+        """Create the virtualized products grid"""
+        self.grid = VirtualProductGrid(self.app_state)
     
-    def _filter_by_category(self, category_id):
+    def _category_options(self, facets: Optional[ProductFacets]) -> dict:
+        """Category select options, with product counts when known"""
+        options = {None: 'All Categories'}
+        for cat in self.categories:
+            count = facets.categories.get(cat.id, 0) if facets else None
+            options[cat.id] = cat.name if count is None else f'{cat.name} ({count})'
+        return options
+    
+    def _price_options(self, facets: Optional[ProductFacets]) -> dict:
+        """Price select options, with product counts when known"""
+        options = {None: 'Any Price'}
+        for band in range(len(PRICE_BANDS)):
+            label = price_band_label(band)
+            options[band] = label if facets is None else f'{label} ({facets.price_bands[band]})'
+        return options
+    
+    async def _update_facets(self):
+        """Show how many products each filter value would leave"""
+        facets = await run_blocking(self.app_state.get_facets)
+        if facets is None:
+            return
+        self.category_select.set_options(self._category_options(facets), value=self.app_state.selected_category)
+        self.price_select.set_options(self._price_options(facets), value=self.app_state.price_band)
+        self.stock_switch.set_text(f'In stock only ({facets.in_stock})')
+    
+    async def refresh_products(self):
+        """Reload the grid, header and facet counts in place after a filter or search change"""
+        self._update_header()
+        await self._update_facets()
+        await self.grid.reset()
+    
+    async def _filter_by_category(self, category_id):
         """Filter products by category"""
+        if category_id == self.app_state.selected_category and not self.app_state.search_query:
+            return
         self.app_state.selected_category = category_id
         self.app_state.search_query = ""
-        ui.navigate.to('/products')  # Refresh page
+        await self.refresh_products()
+    
+    async def _filter_by_price(self, band):
+        """Filter products by price band"""
+        if band == self.app_state.price_band and not self.app_state.search_query:
+            return
+        self.app_state.price_band = band
+        self.app_state.search_query = ""
+        await self.refresh_products()
+    
+    async def _filter_by_stock(self, in_stock):
+        """Only list products in stock"""
+        if in_stock == self.app_state.in_stock and not self.app_state.search_query:
+            return
+        self.app_state.in_stock = in_stock
+        self.app_state.search_query = ""
+        await self.refresh_products()
+    
+    async def _change_sort(self, sort):
+        """Change the product sort order"""
+        if sort == self.app_state.product_sort:
+            return
+        self.app_state.product_sort = sort
+        await self.refresh_products()
     
-    def _clear_filters(self):
+    async def _clear_filters(self):
         """Clear all filters"""
         self.app_state.selected_category = None
+        self.app_state.price_band = None
+        self.app_state.in_stock = False
         self.app_state.search_query = ""
-        ui.navigate.to('/products')  # Refresh page
\ No newline at end of file
+        self.category_select.set_value(None)
+        self.price_select.set_value(None)
+        self.stock_switch.set_value(False)
+        await self.refresh_products()
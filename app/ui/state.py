@@ -1,105 +1,269 @@
 """Application state management"""
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Callable, Tuple, Union
 from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.services.product_service import ProductService
+from app.core.config import settings
+from app.core.database import session_scope
+from app.core.executor import run_blocking
+from app.core.security import create_session_token, read_session_token, verify_and_update_password_async
+from app.core.session_store import ClientSession, SessionStore, session_store
+from app.core.pagination import Page
+from app.services.product_service import ProductService, ProductFacets
+from app.services.catalog_cache import CatalogReader, ProductSnapshot, CategorySnapshot
 from app.services.cart_service import CartService
 from app.services.order_service import OrderService
+from app.services.order_queue import PendingOrder, order_queue
 from app.services.user_service import UserService
+from app.services.user_cache import UserSnapshot, user_cache
 from app.models.user import User
-from app.models.product import Product, Category
+from app.models.product import Product
 from app.models.cart import Cart
+from app.models.order import Order
+from app.core.exceptions import CartEmptyError
 import logging
+import time
+import uuid
 
 logger = logging.getLogger(__name__)
 
 class AppState:
-    """Global application state management"""
+    """UI state of one browser session, persisted in the session store"""
     
-    def __init__(self):
-        self.current_user: Optional[User] = None
-        self.selected_category: Optional[int] = None
-        self.search_query: str = ""
-        self.cart_items_count: int = 0
+    def __init__(self, session_key: Optional[str] = None, store: SessionStore = session_store):
+        # Without a key the state is private to this instance, e.g. in scripts
+        self.session_key = session_key or uuid.uuid4().hex
+        self.store = store
+        self.session = store.get(self.session_key) or ClientSession()
+        self.current_user: Optional[UserSnapshot] = None
+        # Not a nicegui BindableProperty: its global registry would keep every page view's state alive
+        self._cart_items_count = 0
+        self._cart_count_listeners: List[Callable[[int], None]] = []
+        # Ranked product ids of the last search, so its count and every window reuse one search
+        self._search_results: Tuple[str, List[int]] = ("", [])
         
-        # Initialize with demo user for simplicity
-        self._initialize_demo_user()
+        # New sessions start as the demo user for simplicity
+        self._initialize_user()
     
-    def _initialize_demo_user(self):
-        """Initialize with demo user for demonstration"""
+    @property
+    def cart_items_count(self) -> int:
+        """Units in the current user's cart"""
+        return self._cart_items_count
+    
+    @cart_items_count.setter
+    def cart_items_count(self, count: int):
+        if count == self._cart_items_count:
+            return
+        self._cart_items_count = count
+        for listener in self._cart_count_listeners:
+            try:
+                listener(count)
+            except Exception as e:
+                logger.error(f"Cart count listener failed: {e}")
+    
+    def add_cart_count_listener(self, listener: Callable[[int], None]):
+        """Call listener with the new count whenever it changes, e.g. to update a cart badge in place"""
+        self._cart_count_listeners.append(listener)
+    
+    @property
+    def selected_category(self) -> Optional[int]:
+        """Category filter of the products page"""
+        return self.session.selected_category
+    
+    @selected_category.setter
+    def selected_category(self, category_id: Optional[int]):
+        self._update_session(selected_category=category_id)
+    
+    @property
+    def search_query(self) -> str:
+        """Current product search"""
+        return self.session.search_query
+    
+    @search_query.setter
+    def search_query(self, query: str):
+        # Each search submitted runs afresh, even when repeated
+        self._search_results = ("", [])
+        self._update_session(search_query=query)
+    
+    @property
+    def product_sort(self) -> str:
+        """Sort order of the products page"""
+        return self.session.product_sort
+    
+    @product_sort.setter
+    def product_sort(self, sort: str):
+        self._update_session(product_sort=sort)
+    
+    @property
+    def price_band(self) -> Optional[int]:
+        """Price band filter of the products page"""
+        return self.session.price_band
+    
+    @price_band.setter
+    def price_band(self, band: Optional[int]):
+        self._update_session(price_band=band)
+    
+    @property
+    def in_stock(self) -> bool:
+        """Whether the products page only lists products in stock"""
+        return self.session.in_stock
+    
+    @in_stock.setter
+    def in_stock(self, in_stock: bool):
+        self._update_session(in_stock=in_stock)
+    
+    def _update_session(self, **changes):
+        """Apply changes to the session and write it back to the store"""
+        session = self.session._replace(**changes)
+        if session != self.session:
+            self.session = session
+            self.store.put(self.session_key, session)
+    
+    def _initialize_user(self):
+        """Resolve the session's signed-in user, signing other sessions in as the demo user"""
         try:
-            db = next(get_db())
-            user_service = UserService(db)
-            self.current_user = user_service.get_user_by_email("demo@apple.com")
-            if self.current_user:
-                self._update_cart_count()
-                logger.info(f"Initialized with demo user: {self.current_user.email}")
+            with session_scope() as db:
+                # A valid token resolves from the user cache; only misses read the users table
+                token = read_session_token(self.session.auth_token)
+                if token is not None:
+                    user_id, expires_at = token
+                    self.current_user = user_cache.get_or_load(user_id, lambda user_id: db.get(User, user_id))
+                    if self.current_user and expires_at - time.time() < settings.session_token_ttl_seconds / 2:
+                        # Renew tokens in use, so only idle sign-ins expire
+                        self._sign_in(self.current_user)
+                if not self.current_user:
+                    # Missing, expired or forged tokens and deactivated users fall back to the demo user
+                    demo_user = UserService(db).get_user_by_email("demo@apple.com")
+                    if demo_user and demo_user.is_active:
+                        self._sign_in(UserSnapshot.from_model(demo_user))
+                        logger.info(f"Initialized with demo user: {demo_user.email}")
+                    else:
+                        self._update_session(auth_token=None)
+                if self.current_user:
+                    self._update_cart_count()
         except Exception as e:
-            logger.error(f"Failed to initialize demo user: {e}")
+            logger.error(f"Failed to initialize user: {e}")
+    
+    def _sign_in(self, user: UserSnapshot):
+        """Make user this session's user with a fresh signed token"""
+        self.current_user = user
+        self._update_session(auth_token=create_session_token(user.id))
+    
+    async def login_async(self, email: str, password: str) -> bool:
+        """Sign this session in; the password is checked in a hashing worker without holding a pool thread"""
+        user = await run_blocking(self._find_user, email)
+        if not user or not user.is_active:
+            return False
+        
+        valid, new_hash = await verify_and_update_password_async(password, user.hashed_password)
+        if not valid:
+            return False
+        if new_hash:
+            await run_blocking(self._upgrade_password_hash, user.id, new_hash)
+        
+        self._sign_in(UserSnapshot.from_model(user))
+        self.cart_items_count = await run_blocking(self._count_cart_items)
+        logger.info(f"User signed in: {user.email}")
+        return True
+    
+    def _find_user(self, email: str) -> Optional[User]:
+        """Load a user by email, detached for use after the session closes"""
+        with session_scope() as db:
+            return UserService(db).get_user_by_email(email)
+    
+    def _upgrade_password_hash(self, user_id: int, new_hash: str):
+        """Store a password rehashed at login"""
+        with session_scope() as db:
+            user_service = UserService(db)
+            user_service.upgrade_password_hash(user_service.get_user(user_id), new_hash)
     
     def _update_cart_count(self):
         """Update cart items count"""
+        self.cart_items_count = self._count_cart_items()
+    
+    def _count_cart_items(self) -> int:
+        """Count the units in the current user's cart"""
         if not self.current_user:
-            self.cart_items_count = 0
-            return
+            return 0
         
         try:
-            db = next(get_db())
-            cart_service = CartService(db)
-            cart = cart_service.get_cart_contents(self.current_user.id)
-            self.cart_items_count = cart.total_items
+            with session_scope() as db:
+                cart_service = CartService(db)
+                return cart_service.count_cart_items(self.current_user.id)
         except Exception as e:
             logger.error(f"Failed to update cart count: {e}")
-            self.cart_items_count = 0
+            return 0
     
-    def get_products(self, category_id: Optional[int] = None) -> List[Product]:
-        """Get products, optionally filtered by category"""
+    def count_products(self, category_id: Optional[int] = None) -> int:
+        """Count the products matching the current search or category"""
         try:
-            db = next(get_db())
-            product_service = ProductService(db)
-            
-            if self.search_query:
-                return product_service.search_products(self.search_query)
-            else:
-                return product_service.get_all_products(category_id)
+            with session_scope() as db:
+                if self.search_query:
+                    return len(self._search_result_ids(db))
+                return CatalogReader(db).count_products(category_id, self.price_band, self.in_stock)
         except Exception as e:
-            logger.error(f"Failed to get products: {e}")
-            return []
+            logger.error(f"Failed to count products: {e}")
+            return 0
     
-    def get_categories(self) -> List[Category]:
-        """Get all categories"""
+    def get_products_window(
+        self,
+        category_id: Optional[int],
+        offset: int,
+        limit: int,
+        cursor: Optional[str] = None
+    ) -> List[Union[Product, ProductSnapshot]]:
+        """Get `limit` products starting at `offset`, resuming from `cursor` when known"""
         try:
-            db = next(get_db())
-            product_service = ProductService(db)
-            return product_service.get_all_categories()
+            with session_scope() as db:
+                if self.search_query:
+                    return ProductService(db).get_products_by_ids(self._search_result_ids(db)[offset:offset + limit])
+                return CatalogReader(db).get_products_window(
+                    category_id,
+                    self.product_sort,
+                    offset,
+                    limit,
+                    cursor,
+                    price_band=self.price_band,
+                    in_stock=self.in_stock
+                )
         except Exception as e:
-            logger.error(f"Failed to get categories: {e}")
+            logger.error(f"Failed to get products window: {e}")
             return []
     
-    def get_featured_products(self) -> List[Product]:
-        """Get featured products"""
+    def _search_result_ids(self, db: Session) -> List[int]:
+        """Ranked ids of the products matching the current search, searching only when the query changed"""
+        query, product_ids = self._search_results
+        if query != self.search_query:
+            query = self.search_query
+            product_ids = [product.id for product in ProductService(db).search_products(query)]
+            self._search_results = (query, product_ids)
+        return product_ids
+    
+    def get_facets(self) -> Optional[ProductFacets]:
+        """Product counts for each category, price band and the in-stock filter under the current filters"""
         try:
-            db = next(get_db())
-            product_service = ProductService(db)
-            return product_service.get_featured_products()
+            with session_scope() as db:
+                cube = CatalogReader(db).get_facet_cube()
+                return cube.facets(self.selected_category, self.price_band, self.in_stock)
         except Exception as e:
-            logger.error(f"Failed to get featured products: {e}")
-            return []
+            logger.error(f"Failed to get facets: {e}")
+            return None
     
-    def add_to_cart(self, product_id: int, quantity: int = 1) -> bool:
-        """Add product to cart"""
-        if not self.current_user:
-            return False
-        
+    def get_categories(self) -> List[CategorySnapshot]:
+        """Get all categories"""
         try:
-            db = next(get_db())
-            cart_service = CartService(db)
-            cart_service.add_to_cart(self.current_user.id, product_id, quantity)
-            self._update_cart_count()
-            return True
+            with session_scope() as db:
+                return CatalogReader(db).get_categories()
         except Exception as e:
-            logger.error(f"Failed to add to cart: {e}")
-            return False
+            logger.error(f"Failed to get categories: {e}")
+            return []
+    
+    async def add_to_cart_async(self, product_id: int, quantity: int = 1) -> bool:
+        """Add product to cart without blocking the event loop"""
+        success, self.cart_items_count = await run_blocking(
+            self._cart_write,
+            lambda db, user_id: CartService(db).add_to_cart(user_id, product_id, quantity),
+            "add to cart"
+        )
+        return success
     
     def get_cart(self) -> Optional[Cart]:
         """Get current user's cart"""
@@ -107,55 +271,72 @@ class AppState:
             return None
         
         try:
-            db = next(get_db())
-            cart_service = CartService(db)
-            return cart_service.get_cart_contents(self.current_user.id)
+            with session_scope() as db:
+                cart_service = CartService(db)
+                return cart_service.get_cart_contents(self.current_user.id)
         except Exception as e:
             logger.error(f"Failed to get cart: {e}")
             return None
     
-    def update_cart_item(self, product_id: int, quantity: int) -> bool:
-        """Update cart item quantity"""
+    async def update_cart_item_async(self, product_id: int, quantity: int) -> bool:
+        """Update cart item quantity without blocking the event loop"""
+        success, self.cart_items_count = await run_blocking(
+            self._cart_write,
+            lambda db, user_id: CartService(db).update_cart_item(user_id, product_id, quantity),
+            "update cart item"
+        )
+        return success
+    
+    async def remove_from_cart_async(self, product_id: int) -> bool:
+        """Remove product from cart without blocking the event loop"""
+        success, self.cart_items_count = await run_blocking(
+            self._cart_write,
+            lambda db, user_id: CartService(db).remove_from_cart(user_id, product_id),
+            "remove from cart"
+        )
+        return success
+    
+    async def submit_order(self, idempotency_key: Optional[str] = None) -> PendingOrder:
+        """Validate the cart and queue its checkout; raises AppError if it cannot be checked out or the queue is full"""
         if not self.current_user:
-            return False
-        
+            raise CartEmptyError()
+        return await run_blocking(order_queue.submit, self.current_user.id, idempotency_key)
+    
+    async def wait_for_order(self, pending: PendingOrder) -> Order:
+        """Wait until a queued checkout is committed, then refresh the cart count"""
         try:
-            db = next(get_db())
-            cart_service = CartService(db)
-            cart_service.update_cart_item(self.current_user.id, product_id, quantity)
-            self._update_cart_count()
-            return True
-        except Exception as e:
-            logger.error(f"Failed to update cart item: {e}")
-            return False
+            order = await pending.wait()
+            logger.info(f"Order created successfully: {order.id}")
+            return order
+        finally:
+            self.cart_items_count = await run_blocking(self._count_cart_items)
     
-    def remove_from_cart(self, product_id: int) -> bool:
-        """Remove product from cart"""
+    def get_order_history(self, cursor: Optional[str] = None) -> Page:
+        """Get one page of the current user's orders, newest first"""
         if not self.current_user:
-            return False
-        
+            return Page([], None)
         try:
-            db = next(get_db())
-            cart_service = CartService(db)
-            cart_service.remove_from_cart(self.current_user.id, product_id)
-            self._update_cart_count()
-            return True
+            with session_scope() as db:
+                return OrderService(db).get_user_orders_page(
+                    self.current_user.id,
+                    cursor=cursor,
+                    limit=settings.orders_page_size
+                )
         except Exception as e:
-            logger.error(f"Failed to remove from cart: {e}")
-            return False
+            logger.error(f"Failed to get order history: {e}")
+            return Page([], None)
     
-    def checkout(self) -> bool:
-        """Process checkout"""
+    def _cart_write(self, write: Callable[[Session, int], Any], action: str) -> Tuple[bool, int]:
+        """Run a cart write for the current user; returns whether it succeeded and the new cart count"""
+        # Only computes the count: callers assign it on the event loop, where badge listeners run
         if not self.current_user:
-            return False
+            return False, 0
         
         try:
-            db = next(get_db())
-            order_service = OrderService(db)
-            order = order_service.create_order_from_cart(self.current_user.id)
-            self._update_cart_count()
-            logger.info(f"Order created successfully: {order.id}")
-            return True
+            with session_scope() as db:
+                write(db, self.current_user.id)
+                success = True
         except Exception as e:
-            logger.error(f"Failed to process checkout: {e}")
-            return False
\ No newline at end of file
+            logger.error(f"Failed to {action}: {e}")
+            success = False
+        return success, self._count_cart_items()
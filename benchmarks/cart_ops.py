@@ -0,0 +1,102 @@
+"""Cart mutation benchmark: operations per second and statements per operation
+
+Runs add (new line), add (existing line), update quantity and remove for a
+set of users against a file database, timing each operation type and
+counting the SQL statements and commits it issues.
+
+Usage:
+    python benchmarks/cart_ops.py [--users 200] [--products 20]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("DEBUG", "false")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp}/cart_ops.db"
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import event
+
+import app.models  # noqa: F401  (register all mappers)
+from app.core.database import create_tables, engine, session_scope
+from app.services.cart_service import CartService
+
+def seed(users, products):
+    """Create users and well-stocked products"""
+    create_tables()
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        cursor.execute("INSERT INTO categories(name, created_at) VALUES ('Bench', CURRENT_TIMESTAMP)")
+        cursor.executemany(
+            "INSERT INTO products(name, price, stock, category_id, created_at, updated_at) "
+            "VALUES (?, 10, 10000000, 1, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)",
+            [(f"Product {i}",) for i in range(products)]
+        )
+        cursor.executemany(
+            "INSERT INTO users(email, username, hashed_password, is_active, is_superuser, created_at, updated_at) "
+            "VALUES (?, ?, 'x', 1, 0, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)",
+            [(f"user{i}@example.com", f"user{i}") for i in range(users)]
+        )
+        raw.commit()
+    finally:
+        raw.close()
+
+class StatementCounter:
+    """Counts statements and commits issued on the engine"""
+
+    def __init__(self):
+        self.statements = 0
+        self.commits = 0
+        event.listen(engine, "before_cursor_execute", self._statement)
+        event.listen(engine, "commit", self._commit)
+
+    def _statement(self, *args):
+        self.statements += 1
+
+    def _commit(self, *args):
+        self.commits += 1
+
+OPERATIONS = {
+    "add (new line)": lambda service, user_id, product_id: service.add_to_cart(user_id, product_id, 1),
+    "add (existing line)": lambda service, user_id, product_id: service.add_to_cart(user_id, product_id, 1),
+    "update quantity": lambda service, user_id, product_id: service.update_cart_item(user_id, product_id, 5),
+    "remove": lambda service, user_id, product_id: service.remove_from_cart(user_id, product_id),
+}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--products", type=int, default=20)
+    args = parser.parse_args()
+
+    seed(args.users, args.products)
+    counter = StatementCounter()
+
+    # Warm up: give every user a cart so "new line" measures the line, not cart creation
+    for user_id in range(1, args.users + 1):
+        with session_scope() as db:
+            CartService(db).get_or_create_cart(user_id)
+            db.commit()
+
+    for name, operation in OPERATIONS.items():
+        timings = []
+        statements, commits = counter.statements, counter.commits
+        for user_id in range(1, args.users + 1):
+            for product_id in range(1, args.products + 1):
+                start = time.perf_counter()
+                with session_scope() as db:
+                    operation(CartService(db), user_id, product_id)
+                timings.append(time.perf_counter() - start)
+        count = len(timings)
+        print(f"{name:<20} {count / sum(timings):>8.0f} ops/s  median={statistics.median(timings) * 1000:.2f}ms  "
+              f"statements/op={(counter.statements - statements) / count:.1f}  "
+              f"commits/op={(counter.commits - commits) / count:.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Cart query-count regression check: statements per cart and checkout render
+
+Fills the demo user's cart with one line per product, then renders the cart
+and checkout pages headlessly inside a NiceGUI client while counting the SQL
+statements sent to the database. The count must not grow with the number of
+cart lines; the script exits non-zero if a render needs more than --max.
+
+Usage:
+    python benchmarks/cart_queries.py [--lines 50] [--max 6]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("DEBUG", "false")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp}/cart.db"
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from nicegui import ui, Client
+from sqlalchemy import event, select
+
+import app.models  # noqa: F401  (register all mappers)
+from app.core.database import create_tables, engine, init_sample_data, session_scope
+from app.models.product import Product
+from app.services.cart_service import CartService
+from app.ui.state import AppState
+from app.ui.pages.cart import CartPage
+from app.ui.pages.checkout import CheckoutPage
+
+def seed(lines):
+    """Create the sample catalog plus enough products for a `lines`-line cart"""
+    create_tables()
+    init_sample_data()
+    raw = engine.raw_connection()
+    try:
+        raw.cursor().executemany(
+            "INSERT INTO products(name, price, stock, category_id, created_at, updated_at) "
+            "VALUES (?, 99, 1000, 1, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)",
+            [(f"Cart product {i}",) for i in range(lines)]
+        )
+        raw.commit()
+    finally:
+        raw.close()
+
+@contextmanager
+def count_statements(counter):
+    """Count statements sent to the database while the block runs"""
+    def before_execute(*args):
+        counter.append(1)
+    event.listen(engine, "before_cursor_execute", before_execute)
+    try:
+        yield
+    finally:
+        event.remove(engine, "before_cursor_execute", before_execute)
+
+def render(page_class, app_state):
+    """Render a page the way its route does; returns (statements, ms)"""
+    statements = []
+    client = Client(ui.page("/bench"), request=None)
+    start = time.perf_counter()
+    with count_statements(statements), client, session_scope():
+        page_class(app_state, app_state.get_cart())
+    return len(statements), (time.perf_counter() - start) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=50)
+    parser.add_argument("--max", type=int, default=6)
+    args = parser.parse_args()
+
+    seed(args.lines)
+    app_state = AppState()
+    with session_scope() as db:
+        cart_service = CartService(db)
+        product_ids = db.execute(select(Product.id).limit(args.lines)).scalars().all()
+        for product_id in product_ids:
+            cart_service.add_to_cart(app_state.current_user.id, product_id, 2)
+
+    failed = False
+    for name, page_class in (("cart", CartPage), ("checkout", CheckoutPage)):
+        statements, ms = render(page_class, app_state)
+        status = "ok" if statements <= args.max else "FAIL"
+        failed |= statements > args.max
+        print(f"{name:<8} lines={len(product_ids)}  statements={statements}  render={ms:.1f}ms  [{status}]")
+
+    if failed:
+        sys.exit(f"a {args.lines}-line cart needed more than {args.max} statements to render")
+
+if __name__ == "__main__":
+    main()
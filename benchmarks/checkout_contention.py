@@ -0,0 +1,127 @@
+"""Checkout contention stress test: no oversell under concurrent checkouts
+
+Many threads, each acting as its own customer, repeatedly add a hot product
+to their cart and check out until the product sells out. The run fails if
+the units sold ever exceed the starting stock or stock goes negative. The
+original read-check-write checkout is run as a baseline for comparison.
+
+Usage:
+    python benchmarks/checkout_contention.py [--threads 32] [--stock 500]
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("DEBUG", "false")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp}/checkout.db"
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import select, func
+
+import app.models  # noqa: F401  (register all mappers)
+from app.core.database import create_tables, session_scope
+from app.core.exceptions import InsufficientStockError
+from app.models.order import Order, OrderItem
+from app.models.product import Product, Category
+from app.models.user import User
+from app.services.cart_service import CartService
+from app.services.order_service import OrderService
+
+# Rejected checkouts are expected here; keep the session error log quiet
+logging.getLogger("app.core.database").setLevel(logging.CRITICAL)
+
+def legacy_checkout(db, user_id):
+    """The original read-check-write checkout, kept for comparison"""
+    cart = CartService(db).get_cart_contents(user_id)
+    for item in cart.items:
+        if not item.product.can_fulfill_quantity(item.quantity):
+            raise InsufficientStockError(item.product.name, item.quantity, item.product.stock)
+    order = Order(user_id=user_id, total=cart.total_amount, status="pending")
+    db.add(order)
+    db.flush()
+    for item in cart.items:
+        db.add(OrderItem(order_id=order.id, product_id=item.product_id,
+                         quantity=item.quantity, price=item.product.price))
+        item.product.stock -= item.quantity
+    for item in cart.items:
+        db.delete(item)
+    db.commit()
+
+def setup(threads, stock):
+    """Create a hot product and one customer per thread"""
+    with session_scope() as db:
+        category = Category(name=f"Launch {time.time_ns()}")
+        db.add(category)
+        db.flush()
+        product = Product(name="Launch Edition", price=999, stock=stock, category_id=category.id)
+        db.add(product)
+        users = [User(email=f"u{time.time_ns()}-{i}@bench", username=f"u{time.time_ns()}-{i}",
+                      hashed_password="x") for i in range(threads)]
+        db.add_all(users)
+        db.commit()
+        return product.id, [user.id for user in users]
+
+def run(name, checkout, threads, stock):
+    """Drive concurrent checkouts until the product sells out"""
+    product_id, user_ids = setup(threads, stock)
+    counters = {"orders": 0, "rejected": 0, "errors": 0}
+    lock = threading.Lock()
+
+    def customer(user_id):
+        while True:
+            try:
+                with session_scope() as db:
+                    CartService(db).add_to_cart(user_id, product_id, 1)
+                    checkout(db, user_id)
+                with lock:
+                    counters["orders"] += 1
+            except InsufficientStockError:
+                with lock:
+                    counters["rejected"] += 1
+                return
+            except Exception:
+                with lock:
+                    counters["errors"] += 1
+
+    workers = [threading.Thread(target=customer, args=(user_id,)) for user_id in user_ids]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+
+    with session_scope() as db:
+        final_stock = db.get(Product, product_id).stock
+        sold = db.execute(
+            select(func.coalesce(func.sum(OrderItem.quantity), 0)).where(OrderItem.product_id == product_id)
+        ).scalar_one()
+    oversold = sold - stock
+    print(f"{name:>8}: orders={counters['orders']:>5}  sold={sold:>5}  final_stock={final_stock:>5}  "
+          f"oversold={max(0, oversold):>4}  errors={counters['errors']:>4}  "
+          f"checkouts/s={counters['orders'] / elapsed:>7.1f}")
+    return oversold <= 0 and final_stock >= 0 and final_stock == stock - sold
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--stock", type=int, default=500)
+    args = parser.parse_args()
+
+    create_tables()
+    run("legacy", legacy_checkout, args.threads, args.stock)
+    ok = run("atomic", lambda db, user_id: OrderService(db).create_order_from_cart(user_id),
+             args.threads, args.stock)
+    if not ok:
+        print("FAIL: atomic checkout oversold or lost stock")
+        sys.exit(1)
+    print("OK: atomic checkout never oversold")
+
+if __name__ == "__main__":
+    main()
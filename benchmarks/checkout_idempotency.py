@@ -0,0 +1,139 @@
+"""Checkout idempotency test: identical concurrent submits place one order
+
+Fills one customer's cart, then fires identical checkout submits from
+concurrent threads released together, as impatient double clicks under load
+do. With an idempotency key every submit must return the same order, and
+stock must be deducted once. Without a key one submit must place the order
+and the others find the cart empty. Also times a repeated submit after the
+order exists.
+
+Usage:
+    python benchmarks/checkout_idempotency.py [--submits 50] [--lines 3]
+"""
+import argparse
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("DEBUG", "false")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp}/checkout_idempotency.db"
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import event, func, select
+
+import app.models  # noqa: F401  (register all mappers)
+from app.core.database import create_tables, engine, session_scope
+from app.models.order import Order
+from app.models.product import Product, Category
+from app.models.user import User
+from app.services.cart_service import CartService
+from app.services.order_service import OrderService
+
+# Submits that find the cart already checked out are expected without a key; keep the session error log quiet
+logging.getLogger("app.core.database").setLevel(logging.CRITICAL)
+
+STOCK = 1000
+
+def setup(lines):
+    """A customer with `lines` products in their cart, two units each"""
+    with session_scope() as db:
+        category = Category(name=f"Bench {time.time_ns()}")
+        db.add(category)
+        db.flush()
+        products = [Product(name=f"Product {i}", price=100 + i, stock=STOCK, category_id=category.id)
+                    for i in range(lines)]
+        user = User(email=f"u{time.time_ns()}@bench", username=f"u{time.time_ns()}", hashed_password="x")
+        db.add_all(products + [user])
+        db.commit()
+        for product in products:
+            CartService(db).add_to_cart(user.id, product.id, 2)
+        return user.id, [product.id for product in products]
+
+def run(name, submits, lines, use_key, stock_updates):
+    """Fire `submits` identical checkouts at once and report what they wrote"""
+    user_id, product_ids = setup(lines)
+    key = uuid.uuid4().hex if use_key else None
+    barrier = threading.Barrier(submits)
+    order_ids = []
+    errors = []
+    lock = threading.Lock()
+    
+    def submit():
+        barrier.wait()
+        try:
+            with session_scope() as db:
+                order_id = OrderService(db).create_order_from_cart(user_id, key).id
+            with lock:
+                order_ids.append(order_id)
+        except Exception as e:
+            with lock:
+                errors.append(type(e).__name__)
+    
+    stock_updates[0] = 0
+    threads = [threading.Thread(target=submit) for _ in range(submits)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = (time.perf_counter() - start) * 1000
+    
+    with session_scope() as db:
+        orders = db.execute(select(func.count(Order.id)).where(Order.user_id == user_id)).scalar_one()
+        deducted = STOCK * lines - db.execute(
+            select(func.sum(Product.stock)).where(Product.id.in_(product_ids))
+        ).scalar_one()
+    error_counts = {error: errors.count(error) for error in sorted(set(errors))}
+    print(f"{name:<10} orders={orders:>3}  distinct returned={len(set(order_ids)):>3}  "
+          f"units deducted={deducted:>4} (cart {2 * lines})  stock UPDATEs={stock_updates[0]:>4}  "
+          f"errors={error_counts or 0}  {elapsed:.0f} ms")
+    # Without a key the other submits find the cart already checked out
+    expected_errors = set(errors) <= {"CartEmptyError"} if key is None else not errors
+    return orders == 1 and len(set(order_ids)) == 1 and expected_errors and deducted == 2 * lines, user_id, key
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--submits", type=int, default=50)
+    parser.add_argument("--lines", type=int, default=3)
+    parser.add_argument("--repeats", type=int, default=2000)
+    args = parser.parse_args()
+    create_tables()
+    
+    stock_updates = [0]
+    
+    @event.listens_for(engine, "before_cursor_execute")
+    def count_stock_update(conn, cursor, statement, *rest):
+        if statement.startswith("UPDATE products"):
+            stock_updates[0] += 1
+    
+    print(f"{args.submits} identical submits, {args.lines} cart lines")
+    ok_without_key, _, _ = run("no key", args.submits, args.lines, False, stock_updates)
+    ok, user_id, key = run("with key", args.submits, args.lines, True, stock_updates)
+    
+    timings = []
+    for _ in range(args.repeats):
+        start = time.perf_counter()
+        with session_scope() as db:
+            OrderService(db).create_order_from_cart(user_id, key)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    print(f"repeat after the order exists: median {statistics.median(timings):.2f} ms, "
+          f"p99 {timings[int(len(timings) * 0.99) - 1]:.2f} ms")
+    
+    if not ok_without_key:
+        print("FAIL: identical submits without a key placed more than one order")
+        sys.exit(1)
+    if not ok:
+        print("FAIL: identical submits with one key placed more than one order")
+        sys.exit(1)
+    print("OK: one order, stock deducted once")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Concurrency benchmark: legacy StaticPool engine vs. the tuned WAL pool
+
+Runs reader threads (point lookups) alongside writer threads (stock updates)
+against a fresh SQLite file for each engine profile and reports reader
+throughput, reader tail latency and writer throughput.
+
+Usage:
+    python benchmarks/db_concurrency.py [--readers 8] [--writers 2] [--seconds 5]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+os.environ.setdefault("DEBUG", "false")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import create_engine, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base, create_db_engine
+from app.models.product import Product, Category
+import app.models  # noqa: F401  (register all mappers)
+
+PRODUCT_COUNT = 5000
+
+def seed(engine):
+    """Create schema and a small catalog"""
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as session:
+        category = Category(name="Bench", description="Benchmark category")
+        session.add(category)
+        session.flush()
+        session.add_all(
+            Product(name=f"Product {i}", description="bench", price=10 + i % 500,
+                    stock=1_000_000, category_id=category.id)
+            for i in range(PRODUCT_COUNT)
+        )
+        session.commit()
+
+def run_profile(name, engine, readers, writers, seconds):
+    """Run the mixed workload against one engine"""
+    seed(engine)
+    stop = threading.Event()
+    read_latencies, write_count, errors = [], [0], [0]
+    lock = threading.Lock()
+
+    def reader():
+        local = []
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                with Session(engine) as session:
+                    session.execute(
+                        select(Product).where(Product.id == random.randint(1, PRODUCT_COUNT))
+                    ).scalar_one_or_none()
+            except Exception:
+                with lock:
+                    errors[0] += 1
+                continue
+            local.append(time.perf_counter() - start)
+        with lock:
+            read_latencies.extend(local)
+
+    def writer():
+        done = 0
+        while not stop.is_set():
+            try:
+                with Session(engine) as session:
+                    session.execute(
+                        update(Product)
+                        .where(Product.id == random.randint(1, PRODUCT_COUNT))
+                        .values(stock=Product.stock - 1)
+                    )
+                    session.commit()
+                done += 1
+            except Exception:
+                with lock:
+                    errors[0] += 1
+        with lock:
+            write_count[0] += done
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads += [threading.Thread(target=writer) for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+
+    read_latencies.sort()
+    p99 = read_latencies[int(len(read_latencies) * 0.99) - 1] if read_latencies else 0.0
+    print(f"{name:>10}: reads/s={len(read_latencies) / seconds:>10.0f}  "
+          f"read p50={statistics.median(read_latencies) * 1000 if read_latencies else 0:.2f}ms  "
+          f"read p99={p99 * 1000:.2f}ms  writes/s={write_count[0] / seconds:>8.0f}  "
+          f"errors={errors[0]}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy = create_engine(
+            f"sqlite:///{tmp}/legacy.db",
+            poolclass=StaticPool,
+            connect_args={"check_same_thread": False, "timeout": 20}
+        )
+        run_profile("legacy", legacy, args.readers, args.writers, args.seconds)
+        tuned = create_db_engine(f"sqlite:///{tmp}/tuned.db")
+        run_profile("tuned", tuned, args.readers, args.writers, args.seconds)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""Event-loop load test: browsing latency while checkouts run concurrently
+
+Simulates NiceGUI handlers on one asyncio loop. Browsing clients load a page
+of products on a fixed schedule while checkout clients fill a cart and check
+out back to back. Browse latency is measured from when the click was due.
+Each phase runs the blocking work either inline on the loop (as the handlers
+used to) or on the bounded blocking pool, and reports browse latency
+percentiles plus event-loop lag measured by a 5 ms heartbeat.
+
+Usage:
+    python benchmarks/event_loop_load.py [--seconds 10] [--browsers 10] [--interval 0.05] [--checkouts 4] [--lines 30]
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("DEBUG", "false")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp}/loop.db"
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import app.models  # noqa: F401  (register all mappers)
+from app.core.database import create_tables, engine, session_scope
+from app.core.executor import blocking_executor, run_blocking
+from app.services.cart_service import CartService
+from app.services.order_service import OrderService
+from app.services.product_service import ProductService
+
+PRODUCTS = 5000
+CATEGORIES = 8
+
+def seed(users):
+    """Create categories, well-stocked products and checkout users"""
+    create_tables()
+    rng = random.Random(3)
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        cursor.executemany(
+            "INSERT INTO categories(name, created_at) VALUES (?, CURRENT_TIMESTAMP)",
+            [(f"Category {i}",) for i in range(CATEGORIES)]
+        )
+        cursor.executemany(
+            "INSERT INTO products(name, description, price, stock, category_id, created_at, updated_at) "
+            "VALUES (?, 'Synthetic product', ?, 10000000, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)",
+            [(f"Product {i}", rng.randint(19, 3999), i % CATEGORIES + 1) for i in range(PRODUCTS)]
+        )
+        cursor.executemany(
+            "INSERT INTO users(email, username, hashed_password, is_active, is_superuser, created_at, updated_at) "
+            "VALUES (?, ?, 'x', 1, 0, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)",
+            [(f"user{i}@example.com", f"user{i}") for i in range(users)]
+        )
+        raw.commit()
+    finally:
+        raw.close()
+
+def browse(rng):
+    """One products page load: a page of a random category at a random depth"""
+    with session_scope() as db:
+        ProductService(db).get_products_page(
+            rng.randint(1, CATEGORIES),
+            sort=rng.choice(["id", "price", "name"]),
+            limit=16,
+            offset=rng.randint(0, 500)
+        )
+
+def checkout(user_id, lines, rng):
+    """Fill the user's cart and check out"""
+    with session_scope() as db:
+        cart_service = CartService(db)
+        for product_id in rng.sample(range(1, PRODUCTS + 1), lines):
+            cart_service.add_to_cart(user_id, product_id, 1)
+        OrderService(db).create_order_from_cart(user_id)
+
+async def call(mode, func, *args):
+    """Run blocking work inline on the loop or on the blocking pool"""
+    if mode == "pool":
+        return await run_blocking(func, *args)
+    return func(*args)
+
+async def run_phase(mode, seconds, browsers, interval, checkouts, lines):
+    """Run browsing and checkout clients together; returns latency and lag samples"""
+    deadline = time.perf_counter() + seconds
+    latencies, lags = [], []
+    completed = [0]
+
+    async def browser(index):
+        # Open loop: clicks are due on a fixed schedule, so time spent waiting for a blocked loop counts
+        rng = random.Random(index)
+        due = time.perf_counter() + rng.random() * interval
+        while due < deadline:
+            await asyncio.sleep(max(0.0, due - time.perf_counter()))
+            await call(mode, browse, rng)
+            latencies.append((time.perf_counter() - due) * 1000)
+            due += interval
+
+    async def buyer(user_id):
+        rng = random.Random(user_id)
+        while time.perf_counter() < deadline:
+            await call(mode, checkout, user_id, lines, rng)
+            completed[0] += 1
+            await asyncio.sleep(0)
+
+    async def heartbeat():
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            await asyncio.sleep(0.005)
+            lags.append((time.perf_counter() - start - 0.005) * 1000)
+
+    await asyncio.gather(
+        heartbeat(),
+        *(browser(i) for i in range(browsers)),
+        *(buyer(user_id) for user_id in range(1, checkouts + 1))
+    )
+    return latencies, lags, completed[0]
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile"""
+    ordered = sorted(samples)
+    return ordered[max(0, int(len(ordered) * fraction) - 1)]
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--browsers", type=int, default=10)
+    parser.add_argument("--interval", type=float, default=0.05, help="seconds between one browser's clicks")
+    parser.add_argument("--checkouts", type=int, default=4)
+    parser.add_argument("--lines", type=int, default=30)
+    args = parser.parse_args()
+
+    seed(args.checkouts)
+    phases = [
+        ("browse only, pool", "pool", 0),
+        ("with checkouts, inline", "inline", args.checkouts),
+        ("with checkouts, pool", "pool", args.checkouts),
+    ]
+    print(f"{'phase':<24} {'browses':>8} {'p50 ms':>8} {'p99 ms':>8} {'loop lag p99':>13} {'max':>8} {'checkouts':>10}")
+    for name, mode, checkouts in phases:
+        latencies, lags, completed = await run_phase(
+            mode, args.seconds, args.browsers, args.interval, checkouts, args.lines
+        )
+        print(f"{name:<24} {len(latencies):>8} {statistics.median(latencies):>8.2f} "
+              f"{percentile(latencies, 0.99):>8.2f} {percentile(lags, 0.99):>13.2f} {max(lags):>8.2f} {completed:>10}")
+    print(f"blocking pool: {blocking_executor.stats()}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
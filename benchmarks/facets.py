@@ -0,0 +1,119 @@
+"""Faceted filtering benchmark: facet counts and the first filtered grid window
+
+Seeds a synthetic catalog spread over eight categories, then times the
+facet count query cold, facet count updates from the cached cube, and a
+full filter change as the products page runs it: facet counts, the filtered
+count and the first window of the grid.
+
+Usage:
+    python benchmarks/facets.py [--products 100000] [--changes 500]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("DEBUG", "false")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp}/facets.db"
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import app.models  # noqa: F401  (register all mappers)
+from app.core.database import create_tables, engine, session_scope
+from app.services.catalog_cache import CatalogReader, catalog_cache
+from app.services.product_service import PRICE_BANDS, ProductService
+from app.ui.state import AppState
+
+CATEGORIES = 8
+
+def seed(count):
+    """Insert `count` synthetic products over CATEGORIES categories, about a fifth out of stock"""
+    create_tables()
+    rng = random.Random(17)
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        cursor.executemany(
+            "INSERT INTO categories(name, description, created_at) VALUES (?, 'Bench', CURRENT_TIMESTAMP)",
+            [(f"Category {i}",) for i in range(1, CATEGORIES + 1)]
+        )
+        cursor.executemany(
+            "INSERT INTO products(name, description, price, stock, category_id, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)",
+            [(f"Product {i}", "Synthetic product for facet benchmarks", rng.randint(19, 3999),
+              0 if rng.random() < 0.2 else rng.randint(1, 50), rng.randint(1, CATEGORIES))
+             for i in range(count)]
+        )
+        raw.commit()
+    finally:
+        raw.close()
+
+def summary(timings):
+    """Median and p99 of a list of milliseconds"""
+    timings = sorted(timings)
+    return f"median {statistics.median(timings):.2f} ms, p99 {timings[int(len(timings) * 0.99) - 1]:.2f} ms"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--changes", type=int, default=500)
+    args = parser.parse_args()
+    
+    seed(args.products)
+    with session_scope() as db:
+        query = ProductService(db)._facet_query()
+    with engine.connect() as connection:
+        plan = connection.exec_driver_sql(
+            "EXPLAIN QUERY PLAN " + str(query.compile(engine, compile_kwargs={"literal_binds": True}))
+        ).all()
+    print("plan: " + "; ".join(sorted({row[-1] for row in plan if not row[-1].startswith("CORRELATED")})))
+    
+    # Cold: the facet query itself, as run after every catalog write that invalidates the cube
+    timings = []
+    for _ in range(20):
+        with session_scope() as db:
+            start = time.perf_counter()
+            cube = ProductService(db).get_facet_cube()
+            timings.append((time.perf_counter() - start) * 1000)
+    print(f"facet query (cold, {len(cube.cells)} cells): {summary(timings)}")
+    
+    # Warm: per-filter counts from the cached cube
+    rng = random.Random(18)
+    filters = [
+        (rng.choice([None] + list(range(1, CATEGORIES + 1))),
+         rng.choice([None] + list(range(len(PRICE_BANDS)))),
+         rng.random() < 0.5)
+        for _ in range(args.changes)
+    ]
+    with session_scope() as db:
+        reader = CatalogReader(db)
+        timings = []
+        for category_id, price_band, in_stock in filters:
+            start = time.perf_counter()
+            reader.get_facet_cube().facets(category_id, price_band, in_stock)
+            timings.append((time.perf_counter() - start) * 1000)
+    print(f"facet counts (cached cube): {summary(timings)}")
+    
+    # A filter change end to end: facets, filtered count and the first grid window, cube cached
+    app_state = AppState()
+    for label, clear_cube in (("cube cached", False), ("cube invalidated", True)):
+        timings = []
+        for category_id, price_band, in_stock in filters:
+            if clear_cube:
+                catalog_cache.clear()
+            start = time.perf_counter()
+            app_state.selected_category = category_id
+            app_state.price_band = price_band
+            app_state.in_stock = in_stock
+            app_state.get_facets()
+            app_state.count_products(category_id)
+            app_state.get_products_window(category_id, 0, 24)
+            timings.append((time.perf_counter() - start) * 1000)
+        print(f"filter change, {label}: {summary(timings)}")
+
+if __name__ == "__main__":
+    main()
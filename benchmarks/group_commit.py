@@ -0,0 +1,159 @@
+"""Group commit benchmark: cart and sign-up writes from many clients, per-call commits vs the write coordinator
+
+Starts many client threads at once. Each one adds products to its own cart,
+changes a quantity, removes a line, and signs up a user now and then, all
+through the services the pages call. With per-call commits every write takes
+the SQLite write lock and commits on its own. With the write coordinator one
+writer thread commits the writes of all clients in groups. Reports writes per
+second, write latency, commits and errors.
+
+Usage:
+    python benchmarks/group_commit.py [--clients 200] [--ops 20] [--synchronous NORMAL]
+"""
+import argparse
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("DEBUG", "false")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp}/group_commit.db"
+# Every client holds a connection in the per-call run
+os.environ.setdefault("DB_POOL_SIZE", "250")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+for index, arg in enumerate(sys.argv):
+    if arg == "--synchronous" and index + 1 < len(sys.argv):
+        os.environ["DB_SYNCHRONOUS"] = sys.argv[index + 1]
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import event, func, select
+
+import app.models  # noqa: F401  (register all mappers)
+from app.core.config import settings
+from app.core.database import create_tables, engine, session_scope
+from app.core.write_coordinator import write_coordinator
+from app.models.cart import CartItem
+from app.services.cart_service import CartService
+from app.services.user_service import UserService
+
+# Lock timeouts are counted below; keep the session error log quiet
+logging.getLogger("app.core.database").setLevel(logging.CRITICAL)
+
+PRODUCTS = 500
+
+def seed(clients):
+    """A catalog and one user with an empty cart per client"""
+    create_tables()
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        cursor.execute("INSERT INTO categories(name, created_at) VALUES ('Bench', CURRENT_TIMESTAMP)")
+        cursor.executemany(
+            "INSERT INTO products(name, description, price, stock, category_id, created_at, updated_at) "
+            "VALUES (?, 'Synthetic product', 100, 1000000, 1, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)",
+            [(f"Product {i}",) for i in range(PRODUCTS)]
+        )
+        cursor.executemany(
+            "INSERT INTO users(email, username, hashed_password, is_active, is_superuser, created_at, updated_at) "
+            "VALUES (?, ?, 'unused', 1, 0, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)",
+            [(f"client{i}@example.com", f"client{i}") for i in range(clients)]
+        )
+        cursor.executemany(
+            "INSERT INTO carts(user_id, created_at, updated_at) VALUES (?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)",
+            [(user_id,) for user_id in range(1, clients + 1)]
+        )
+        raw.commit()
+    finally:
+        raw.close()
+
+def client(name, user_id, ops, barrier, latencies, errors, lock):
+    """One shopper: add, update and remove cart lines, signing up a user every tenth write"""
+    rng = random.Random(user_id)
+    in_cart = []
+    mine = []
+    barrier.wait()
+    for op in range(ops):
+        start = time.perf_counter()
+        try:
+            with session_scope() as db:
+                if op % 10 == 9:
+                    UserService(db).create_user(f"{name}-{user_id}-{op}@example.com", f"{name}-{user_id}-{op}", "secret")
+                elif len(in_cart) > 2 and op % 4 == 3:
+                    CartService(db).remove_from_cart(user_id, in_cart.pop(0))
+                elif in_cart and op % 4 == 2:
+                    CartService(db).update_cart_item(user_id, rng.choice(in_cart), rng.randint(1, 5))
+                else:
+                    product_id = rng.randint(1, PRODUCTS)
+                    CartService(db).add_to_cart(user_id, product_id, 1)
+                    if product_id not in in_cart:
+                        in_cart.append(product_id)
+            mine.append((time.perf_counter() - start) * 1000)
+        except Exception as e:
+            with lock:
+                errors.append(type(e).__name__)
+    with lock:
+        latencies.extend(mine)
+
+def run(name, clients, ops, commits):
+    """All clients write at once; returns the elapsed seconds, latencies and errors"""
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(clients + 1)
+    threads = [
+        threading.Thread(target=client, args=(name, user_id, ops, barrier, latencies, errors, lock))
+        for user_id in range(1, clients + 1)
+    ]
+    for thread in threads:
+        thread.start()
+    commits[0] = 0
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, latencies, errors
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile"""
+    ordered = sorted(samples)
+    return ordered[max(0, int(len(ordered) * fraction) - 1)]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--ops", type=int, default=20, help="writes per client")
+    parser.add_argument("--synchronous", default=settings.db_synchronous, help="PRAGMA synchronous for the run")
+    args = parser.parse_args()
+    seed(args.clients)
+    
+    commits = [0]
+    
+    @event.listens_for(engine, "commit")
+    def count_commit(conn):
+        commits[0] += 1
+    
+    print(f"clients={args.clients}  writes/client={args.ops}  synchronous={settings.db_synchronous}  "
+          f"group: {settings.write_group_max_ops} writes or {settings.write_group_max_delay_ms:g} ms")
+    print(f"{'commits':<16} {'writes':>7} {'writes/s':>9} {'commits':>8} {'p50':>9} {'p99':>9} {'max':>9}  errors")
+    for name, enabled in [("per call", False), ("group commit", True)]:
+        write_coordinator.enabled = enabled
+        elapsed, latencies, errors = run(name.replace(" ", "-"), args.clients, args.ops, commits)
+        write_coordinator.stop()
+        error_counts = {error: errors.count(error) for error in sorted(set(errors))}
+        print(f"{name:<16} {len(latencies):>7} {len(latencies) / elapsed:>9.1f} {commits[0]:>8} "
+              f"{statistics.median(latencies):>7.1f}ms {percentile(latencies, 0.99):>7.1f}ms "
+              f"{max(latencies):>7.1f}ms  {error_counts or 0}")
+    print(f"write coordinator: {write_coordinator.stats()}")
+    
+    with session_scope() as db:
+        lines = db.execute(select(func.count(CartItem.id))).scalar_one()
+    print(f"cart lines left: {lines:,}")
+
+if __name__ == "__main__":
+    main()
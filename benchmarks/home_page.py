@@ -0,0 +1,187 @@
+"""Home page benchmark: requests per second and SQL statements per request
+
+Starts the app's home page in a NiceGUI server process three ways and
+drives each with concurrent HTTP clients that keep their session cookie:
+- from the prebuilt home snapshot
+- loading featured products and categories per visit through the catalog
+  cache, as the route used to
+- per visit straight from the database, bypassing the catalog cache
+
+Reports requests per second, latency and the SQL statements the server ran
+per request.
+
+Usage:
+    python benchmarks/home_page.py [--products 10000] [--clients 16] [--seconds 10]
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("DEBUG", "false")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmp}/home.db")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+PORT = 8097
+ROUTES = ["/snapshot", "/per-visit", "/uncached"]
+
+def seed(products):
+    """Sample catalog plus synthetic products"""
+    import app.models  # noqa: F401  (register all mappers)
+    from app.core.database import create_tables, engine, init_sample_data
+    create_tables()
+    init_sample_data()
+    rng = random.Random(18)
+    raw = engine.raw_connection()
+    try:
+        raw.cursor().executemany(
+            "INSERT INTO products(name, description, price, stock, category_id, created_at, updated_at) "
+            "VALUES (?, 'Synthetic product', ?, 100, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)",
+            [(f"Product {i}", rng.randint(19, 3999), i % 6 + 1) for i in range(products)]
+        )
+        raw.commit()
+    finally:
+        raw.close()
+
+def serve():
+    """Run the home page variants in this process"""
+    from nicegui import app, ui
+    from sqlalchemy import event
+    from app.core.database import engine, session_scope
+    from app.core.executor import run_blocking
+    from app.services.catalog_cache import CatalogReader, CategorySnapshot, ProductSnapshot
+    from app.services.product_service import ProductService
+    from app.services.home_snapshot import HomeSnapshot, home_snapshot
+    from app.ui.main import _app_state, _start_home_snapshot
+    from app.ui.components.navigation import Navigation
+    from app.ui.pages.home import HomePage
+    
+    statements = {"count": 0}
+    
+    @event.listens_for(engine, "before_cursor_execute")
+    def count_statement(*args):
+        statements["count"] += 1
+    
+    def render(app_state, snapshot):
+        with ui.column().classes('w-full min-h-screen bg-gray-50'):
+            Navigation(app_state)
+            HomePage(app_state, snapshot)
+    
+    @ui.page('/snapshot')
+    async def snapshot_home():
+        app_state = await _app_state()
+        render(app_state, home_snapshot.snapshot or await run_blocking(home_snapshot.get))
+    
+    @ui.page('/per-visit')
+    async def per_visit_home():
+        app_state = await _app_state()
+        
+        def load():
+            with session_scope() as db:
+                reader = CatalogReader(db)
+                return tuple(reader.get_featured_products()), tuple(reader.get_categories())
+        featured, categories = await run_blocking(load)
+        render(app_state, HomeSnapshot(featured, categories, {}, 0.0))
+    
+    @ui.page('/uncached')
+    async def uncached_home():
+        app_state = await _app_state()
+        
+        def load():
+            with session_scope() as db:
+                service = ProductService(db)
+                return (
+                    tuple(ProductSnapshot.from_model(p) for p in service.get_featured_products()),
+                    tuple(CategorySnapshot.from_model(c) for c in service.get_all_categories())
+                )
+        featured, categories = await run_blocking(load)
+        render(app_state, HomeSnapshot(featured, categories, {}, 0.0))
+    
+    @app.get('/statements')
+    def statement_count():
+        return statements
+    
+    app.on_startup(_start_home_snapshot)
+    ui.run(port=PORT, reload=False, show=False, storage_secret="bench")
+
+async def drive(route, clients, seconds):
+    """Requests completed and their latencies over `seconds` with `clients` concurrent sessions"""
+    import aiohttp
+    base = f"http://127.0.0.1:{PORT}"
+    latencies = []
+    
+    async def client():
+        async with aiohttp.ClientSession() as session:
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                async with session.get(base + route) as response:
+                    await response.read()
+                    assert response.status == 200, response.status
+                latencies.append((time.perf_counter() - start) * 1000)
+    
+    async with aiohttp.ClientSession() as session:
+        # Warm up: client sessions, snapshot and catalog cache
+        deadline = time.perf_counter() + 2
+        await asyncio.gather(*[client() for _ in range(clients)])
+        async with session.get(base + "/statements") as response:
+            before = (await response.json())["count"]
+        latencies.clear()
+        deadline = time.perf_counter() + seconds
+        await asyncio.gather(*[client() for _ in range(clients)])
+        async with session.get(base + "/statements") as response:
+            after = (await response.json())["count"]
+    return latencies, (after - before) / max(1, len(latencies))
+
+async def wait_until_up():
+    """Poll the server until it answers"""
+    import aiohttp
+    for _ in range(100):
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.get(f"http://127.0.0.1:{PORT}/statements") as response:
+                    if response.status == 200:
+                        return
+        except aiohttp.ClientError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("benchmark server did not start")
+
+async def main(args):
+    seed(args.products)
+    print(f"products={args.products:,}  clients={args.clients}  seconds={args.seconds}")
+    for route in ROUTES:
+        # A fresh server per variant: pages whose websocket never connects linger until NiceGUI prunes them
+        server = subprocess.Popen(
+            [sys.executable, __file__, "--serve"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+        try:
+            await wait_until_up()
+            latencies, per_request = await drive(route, args.clients, args.seconds)
+        finally:
+            server.terminate()
+            server.wait()
+        latencies.sort()
+        print(f"{route:<11} {len(latencies) / args.seconds:7.1f} req/s  "
+              f"p50 {statistics.median(latencies):6.1f} ms  p99 {latencies[int(len(latencies) * 0.99) - 1]:6.1f} ms  "
+              f"{per_request:.2f} SQL statements/request")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve:
+        serve()
+    else:
+        asyncio.run(main(args))
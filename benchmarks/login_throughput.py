@@ -0,0 +1,165 @@
+"""Login throughput benchmark: bcrypt in blocking-pool threads vs worker processes
+
+Runs back-to-back logins from concurrent clients while browsing clients
+load product pages on a fixed schedule. Logins run either as a synchronous
+`UserService.authenticate_user` call on the blocking pool, hashing in that
+pool thread (the previous behaviour) or waiting on a worker process, or as
+`AppState.login_async`, which awaits the worker process without holding a
+pool thread. Reports logins per second and per core used, browse latency
+measured from when each click was due, and the cost of the first login
+after the configured bcrypt rounds change.
+
+Usage:
+    python benchmarks/login_throughput.py [--seconds 10] [--logins 16] [--rounds 12] [--browsers 10]
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("DEBUG", "false")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp}/login.db"
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+PRODUCTS = 5000
+CATEGORIES = 8
+PASSWORD = "correct horse battery staple"
+
+def seed(users, rounds):
+    """Create a catalog and users whose passwords are hashed with `rounds`"""
+    from passlib.hash import bcrypt
+    from app.core.database import create_tables, engine
+    create_tables()
+    rng = random.Random(19)
+    hashed = bcrypt.using(rounds=rounds).hash(PASSWORD)
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        cursor.executemany(
+            "INSERT INTO categories(name, created_at) VALUES (?, CURRENT_TIMESTAMP)",
+            [(f"Category {i}",) for i in range(CATEGORIES)]
+        )
+        cursor.executemany(
+            "INSERT INTO products(name, description, price, stock, category_id, created_at, updated_at) "
+            "VALUES (?, 'Synthetic product', ?, 100, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)",
+            [(f"Product {i}", rng.randint(19, 3999), i % CATEGORIES + 1) for i in range(PRODUCTS)]
+        )
+        cursor.executemany(
+            "INSERT INTO users(email, username, hashed_password, is_active, is_superuser, created_at, updated_at) "
+            "VALUES (?, ?, ?, 1, 0, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)",
+            [(f"user{i}@example.com", f"user{i}", hashed) for i in range(users)]
+        )
+        raw.commit()
+    finally:
+        raw.close()
+
+def login(email):
+    """One login as a UI handler would run it on the blocking pool"""
+    from app.core.database import session_scope
+    from app.services.user_service import UserService
+    with session_scope() as db:
+        assert UserService(db).authenticate_user(email, PASSWORD) is not None
+
+def browse(rng):
+    """One products page load"""
+    from app.core.database import session_scope
+    from app.services.product_service import ProductService
+    with session_scope() as db:
+        ProductService(db).get_products_page(rng.randint(1, CATEGORIES), limit=16, offset=rng.randint(0, 500))
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile"""
+    ordered = sorted(samples)
+    return ordered[max(0, int(len(ordered) * fraction) - 1)]
+
+async def run_phase(seconds, logins, browsers, interval, users, use_async):
+    """Logins back to back from `logins` clients alongside scheduled browsing"""
+    from app.core.executor import run_blocking
+    from app.ui.state import AppState
+    deadline = time.perf_counter() + seconds
+    latencies = []
+    completed = [0]
+    
+    async def browser(index):
+        rng = random.Random(index)
+        due = time.perf_counter() + rng.random() * interval
+        while due < deadline:
+            await asyncio.sleep(max(0.0, due - time.perf_counter()))
+            await run_blocking(browse, rng)
+            latencies.append((time.perf_counter() - due) * 1000)
+            due += interval
+    
+    async def client(index):
+        app_state = AppState()
+        rng = random.Random(index)
+        while time.perf_counter() < deadline:
+            email = f"user{rng.randrange(users)}@example.com"
+            if use_async:
+                assert await app_state.login_async(email, PASSWORD)
+            else:
+                await run_blocking(login, email)
+            completed[0] += 1
+    
+    await asyncio.gather(*(browser(i) for i in range(browsers)), *(client(i) for i in range(logins)))
+    return completed[0], latencies
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--logins", type=int, default=16, help="concurrent login clients")
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--browsers", type=int, default=10)
+    parser.add_argument("--interval", type=float, default=0.05, help="seconds between one browser's clicks")
+    args = parser.parse_args()
+    os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+    
+    import app.models  # noqa: F401  (register all mappers)
+    from app.core import security
+    from app.core.config import settings
+    from app.core.executor import blocking_executor
+    
+    users = 1000
+    seed(users, args.rounds)
+    cores = os.cpu_count() or 1
+    print(f"cores={cores}  rounds={args.rounds}  login clients={args.logins}  blocking pool={blocking_executor.max_workers}")
+    print(f"{'login':<7} {'hashing in':<22} {'logins/s':>9} {'per core':>9} {'browse p50':>11} {'p99':>9}")
+    
+    default_workers = settings.password_hash_workers
+    phases = [("sync", "blocking-pool threads", 0, False), ("sync", f"{default_workers} worker processes", default_workers, False)]
+    phases += [
+        ("async", f"{workers} worker process{'es' if workers > 1 else ''}", workers, True)
+        for workers in sorted({1, default_workers, cores})
+    ]
+    for login_kind, name, workers, use_async in phases:
+        security.password_hasher = security.PasswordHasher(workers)
+        security.password_hasher.start()
+        completed, latencies = await run_phase(
+            args.seconds, args.logins, args.browsers, args.interval, users, use_async
+        )
+        security.password_hasher.shutdown()
+        # Threads hash on every core; workers on at most one core each
+        used = cores if workers == 0 else min(workers, cores)
+        rate = completed / args.seconds
+        print(f"{login_kind:<7} {name:<22} {rate:>9.1f} {rate / used:>9.1f} "
+              f"{statistics.median(latencies):>9.1f}ms {percentile(latencies, 0.99):>7.1f}ms")
+    
+    # Upgrade on login: the stored hashes use args.rounds; configure one round more
+    security.pwd_context.update(bcrypt__rounds=args.rounds + 1)
+    security.password_hasher = security.PasswordHasher(1)
+    timings = []
+    for index in range(2):
+        start = time.perf_counter()
+        login("user0@example.com")
+        timings.append((time.perf_counter() - start) * 1000)
+    security.password_hasher.shutdown()
+    print(f"rounds {args.rounds} -> {args.rounds + 1}: first login {timings[0]:.0f} ms (verify + rehash), "
+          f"next login {timings[1]:.0f} ms")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,170 @@
+"""Order history benchmark: statements and latency per page of a user's orders
+
+Creates the orders table as it was before item counts and summaries were
+stored, fills it, then lets create_tables add the new columns and index.
+Half the orders are legacy rows without a stored summary. Lists pages of a
+customer's order history the previous way, loading every order and then the
+items and products of the listed ones, and with the keyset-paginated query.
+Also walks every page of the busiest customer and checks that each order
+appears exactly once.
+
+Usage:
+    python benchmarks/order_history.py [--orders 200000] [--heavy 5000]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("DEBUG", "false")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp}/order_history.db"
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import event, text
+
+import app.models  # noqa: F401  (register all mappers)
+from app.core.database import create_tables, engine, session_scope
+from app.services.order_service import OrderService, order_summary
+
+USERS = 2000
+PRODUCTS = 500
+PAGE = 20
+
+# The orders table before this change
+LEGACY_ORDERS = """
+CREATE TABLE orders (
+    id INTEGER NOT NULL PRIMARY KEY,
+    user_id INTEGER REFERENCES users(id),
+    total NUMERIC(10, 2) NOT NULL,
+    status VARCHAR(50) NOT NULL,
+    created_at DATETIME NOT NULL,
+    updated_at DATETIME NOT NULL
+)
+"""
+
+def seed(orders, heavy):
+    """Users, products and `orders` orders of three lines each; user 1 has `heavy` of them"""
+    with engine.begin() as connection:
+        connection.execute(text(LEGACY_ORDERS))
+    create_tables()
+    rng = random.Random(24)
+    names = [f"Product {i}" for i in range(PRODUCTS)]
+    start = datetime(2024, 1, 1)
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        cursor.execute("INSERT INTO categories(name, created_at) VALUES ('Bench', CURRENT_TIMESTAMP)")
+        cursor.executemany(
+            "INSERT INTO products(name, description, price, stock, category_id, created_at, updated_at) "
+            "VALUES (?, 'Synthetic product', 100, 1000, 1, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)",
+            [(name,) for name in names]
+        )
+        cursor.executemany(
+            "INSERT INTO users(email, username, hashed_password, is_active, is_superuser, created_at, updated_at) "
+            "VALUES (?, ?, 'unused', 1, 0, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)",
+            [(f"user{i}@example.com", f"user{i}") for i in range(USERS)]
+        )
+        order_rows = []
+        item_rows = []
+        for order_id in range(1, orders + 1):
+            user_id = 1 if order_id <= heavy else rng.randint(2, USERS)
+            # Whole seconds and a burst every 50 orders, so several orders share a created_at
+            created = (start + timedelta(seconds=order_id - order_id % 50 % 3)).strftime("%Y-%m-%d %H:%M:%S")
+            lines = [(product_id, rng.randint(1, 3)) for product_id in rng.sample(range(1, PRODUCTS + 1), 3)]
+            legacy = order_id % 2 == 0
+            order_rows.append((
+                order_id, user_id, 300, created, created,
+                None if legacy else sum(quantity for _, quantity in lines),
+                None if legacy else order_summary([(names[product_id - 1], quantity) for product_id, quantity in lines])
+            ))
+            item_rows.extend((order_id, product_id, quantity, created) for product_id, quantity in lines)
+        cursor.executemany(
+            "INSERT INTO orders(id, user_id, total, status, created_at, updated_at, item_count, summary) "
+            "VALUES (?, ?, ?, 'pending', ?, ?, ?, ?)",
+            order_rows
+        )
+        cursor.executemany(
+            "INSERT INTO order_items(order_id, product_id, quantity, price, created_at) VALUES (?, ?, ?, 100, ?)",
+            item_rows
+        )
+        raw.commit()
+    finally:
+        raw.close()
+
+def previous_page(db, user_id, page):
+    """What listing a page took before: every order of the user, then items and products of the listed ones"""
+    orders = OrderService(db).get_user_orders(user_id)[page * PAGE:(page + 1) * PAGE]
+    return [(order.id, sum(item.quantity for item in order.items), ", ".join(item.product.name for item in order.items))
+            for order in orders]
+
+def keyset_page(db, user_id, page, cursors):
+    """A page through get_user_orders_page, resuming from the previous page's cursor"""
+    result = OrderService(db).get_user_orders_page(user_id, cursors.get(page), PAGE)
+    cursors[page + 1] = result.next_cursor
+    return [(order.id, order.item_count, order.summary) for order in result.items]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--orders", type=int, default=200_000)
+    parser.add_argument("--heavy", type=int, default=5000, help="orders of the busiest customer")
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+    seed(args.orders, args.heavy)
+    
+    statements = [0]
+    
+    @event.listens_for(engine, "before_cursor_execute")
+    def count_statement(conn, cursor, statement, *rest):
+        statements[0] += 1
+    
+    with engine.connect() as connection:
+        columns = [row[1] for row in connection.execute(text("PRAGMA table_info(orders)"))]
+        plan = connection.execute(text(
+            "EXPLAIN QUERY PLAN SELECT * FROM orders WHERE user_id = 1 AND (created_at, id) < ('2024-01-01 01:00:00', 3600) "
+            "ORDER BY created_at DESC, id DESC LIMIT 21"
+        )).all()
+    print(f"orders={args.orders:,}  busiest customer={args.heavy:,} orders  columns after create_tables: {columns}")
+    print(f"query plan: {' / '.join(row[-1] for row in plan)}")
+    
+    # Every page of the busiest customer, in order
+    cursors = {}
+    seen = []
+    with session_scope() as db:
+        for page in range(args.heavy // PAGE + 1):
+            seen.extend(order_id for order_id, _, _ in keyset_page(db, 1, page, cursors))
+            if cursors[page + 1] is None:
+                break
+    ok = len(seen) == len(set(seen)) == args.heavy
+    print(f"walked {page + 1} pages: {len(seen):,} orders, {len(set(seen)):,} distinct")
+    
+    print(f"{'listing':<22} {'page':>5} {'statements':>11} {'median':>10} {'p99':>10}")
+    for name, lister in [("all orders (previous)", previous_page), ("keyset page", keyset_page)]:
+        for page in (0, 100, args.heavy // PAGE - 1):
+            timings = []
+            for _ in range(args.repeats):
+                with session_scope() as db:
+                    statements[0] = 0
+                    start = time.perf_counter()
+                    if lister is keyset_page:
+                        rows = keyset_page(db, 1, page, cursors)
+                    else:
+                        rows = previous_page(db, 1, page)
+                    timings.append((time.perf_counter() - start) * 1000)
+            assert len(rows) == PAGE
+            timings.sort()
+            print(f"{name:<22} {page:>5} {statements[0]:>11} {statistics.median(timings):>8.2f}ms "
+                  f"{timings[int(len(timings) * 0.99) - 1]:>8.2f}ms")
+    
+    if not ok:
+        print("FAIL: paging skipped or repeated orders")
+        sys.exit(1)
+    print("OK: every order listed once")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""Order intake benchmark: a launch burst of checkouts, inline vs through the order queue
+
+Fills the carts of many customers, then has all of them check out at once
+from the event loop while browsing clients keep loading product pages on a
+fixed schedule. Checkouts run either inline on the blocking pool, as the
+checkout page used to, or through the order queue, where worker threads
+commit them in batches. Reports checkouts per second, commits, checkout
+latency, browse throughput and latency, and how a queue with a small depth
+turns the excess away.
+
+Usage:
+    python benchmarks/order_queue.py [--customers 400] [--browsers 10]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("DEBUG", "false")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp}/order_queue.db"
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import event
+
+import app.models  # noqa: F401  (register all mappers)
+from app.core.database import create_tables, engine, session_scope
+from app.core.exceptions import OrderQueueFullError
+from app.core.executor import run_blocking
+from app.services.order_queue import OrderQueue
+from app.services.order_service import OrderService
+from app.services.product_service import ProductService
+
+# Turned-away checkouts are expected in the shedding run; keep their warnings quiet
+logging.getLogger("app.services.order_queue").setLevel(logging.ERROR)
+
+PRODUCTS = 2000
+CATEGORIES = 8
+
+def seed(customers):
+    """A catalog and `customers` users, each with an empty cart"""
+    create_tables()
+    rng = random.Random(22)
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        cursor.executemany(
+            "INSERT INTO categories(name, created_at) VALUES (?, CURRENT_TIMESTAMP)",
+            [(f"Category {i}",) for i in range(CATEGORIES)]
+        )
+        cursor.executemany(
+            "INSERT INTO products(name, description, price, stock, category_id, created_at, updated_at) "
+            "VALUES (?, 'Synthetic product', ?, 1000000, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)",
+            [(f"Product {i}", rng.randint(19, 3999), i % CATEGORIES + 1) for i in range(PRODUCTS)]
+        )
+        cursor.executemany(
+            "INSERT INTO users(email, username, hashed_password, is_active, is_superuser, created_at, updated_at) "
+            "VALUES (?, ?, 'unused', 1, 0, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)",
+            [(f"user{i}@example.com", f"user{i}") for i in range(customers)]
+        )
+        cursor.executemany(
+            "INSERT INTO carts(user_id, created_at, updated_at) VALUES (?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)",
+            [(user_id,) for user_id in range(1, customers + 1)]
+        )
+        raw.commit()
+    finally:
+        raw.close()
+
+def fill_carts(user_ids, rng):
+    """Put two random products in each customer's cart"""
+    raw = engine.raw_connection()
+    try:
+        raw.cursor().executemany(
+            "INSERT OR REPLACE INTO cart_items(cart_id, product_id, quantity, created_at) "
+            "SELECT id, ?, ?, CURRENT_TIMESTAMP FROM carts WHERE user_id = ?",
+            [(product_id, rng.randint(1, 3), user_id)
+             for user_id in user_ids for product_id in rng.sample(range(1, PRODUCTS + 1), 2)]
+        )
+        raw.commit()
+    finally:
+        raw.close()
+
+def checkout_inline(user_id):
+    """One checkout as the checkout page ran it before, on the blocking pool"""
+    with session_scope() as db:
+        OrderService(db).create_order_from_cart(user_id)
+
+def browse(rng):
+    """One products page load"""
+    with session_scope() as db:
+        ProductService(db).get_products_page(rng.randint(1, CATEGORIES), limit=16, offset=rng.randint(0, 200))
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile"""
+    ordered = sorted(samples)
+    return ordered[max(0, int(len(ordered) * fraction) - 1)]
+
+async def burst(user_ids, order_queue, browsers, interval):
+    """All customers check out at once while browsers click on schedule"""
+    checkouts = []
+    rejections = []
+    failures = []
+    browse_latencies = []
+    done = asyncio.Event()
+    
+    async def browser(index):
+        rng = random.Random(index)
+        due = time.perf_counter() + rng.random() * interval
+        while not done.is_set():
+            await asyncio.sleep(max(0.0, due - time.perf_counter()))
+            await run_blocking(browse, rng)
+            browse_latencies.append((time.perf_counter() - due) * 1000)
+            due += interval
+    
+    async def customer(user_id):
+        start = time.perf_counter()
+        try:
+            if order_queue is None:
+                await run_blocking(checkout_inline, user_id)
+            else:
+                pending = await run_blocking(order_queue.submit, user_id)
+                await pending.wait()
+            checkouts.append((time.perf_counter() - start) * 1000)
+        except OrderQueueFullError:
+            rejections.append((time.perf_counter() - start) * 1000)
+        except Exception as e:
+            failures.append(type(e).__name__)
+    
+    browsing = [asyncio.ensure_future(browser(index)) for index in range(browsers)]
+    await asyncio.sleep(interval)
+    start = time.perf_counter()
+    await asyncio.gather(*(customer(user_id) for user_id in user_ids))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await asyncio.gather(*browsing)
+    return elapsed, checkouts, rejections, failures, browse_latencies
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--customers", type=int, default=400)
+    parser.add_argument("--browsers", type=int, default=10)
+    parser.add_argument("--interval", type=float, default=0.05, help="seconds between one browser's clicks")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--shed-depth", type=int, default=50, help="queue depth for the shedding run")
+    args = parser.parse_args()
+    seed(args.customers)
+    rng = random.Random(22)
+    user_ids = list(range(1, args.customers + 1))
+    
+    commits = [0]
+    
+    @event.listens_for(engine, "commit")
+    def count_commit(conn):
+        commits[0] += 1
+    
+    print(f"customers={args.customers}  browsers={args.browsers}  workers={args.workers}  batch={args.batch_size}")
+    print(f"{'checkout':<22} {'placed':>6} {'shed':>5} {'orders/s':>9} {'commits':>8} "
+          f"{'checkout p50':>13} {'p99':>9} {'shed p50':>9} {'browses/s':>10} {'browse p50':>11} {'p99':>9}")
+    runs = [
+        ("inline (previous)", None),
+        (f"queue, depth {args.customers}", OrderQueue(args.workers, args.customers, args.batch_size)),
+        (f"queue, depth {args.shed_depth}", OrderQueue(args.workers, args.shed_depth, args.batch_size)),
+    ]
+    for name, order_queue in runs:
+        fill_carts(user_ids, rng)
+        commits[0] = 0
+        elapsed, checkouts, rejections, failures, browse_latencies = await burst(
+            user_ids, order_queue, args.browsers, args.interval
+        )
+        placed_commits = commits[0]
+        if order_queue is not None:
+            order_queue.stop()
+        shed = f"{statistics.median(rejections):7.1f}ms" if rejections else f"{'-':>9}"
+        print(f"{name:<22} {len(checkouts):>6} {len(rejections):>5} {len(checkouts) / elapsed:>9.1f} "
+              f"{placed_commits:>8} {statistics.median(checkouts):>11.1f}ms {percentile(checkouts, 0.99):>7.1f}ms "
+              f"{shed} {len(browse_latencies) / elapsed:>10.1f} {statistics.median(browse_latencies):>9.1f}ms {percentile(browse_latencies, 0.99):>7.1f}ms"
+              + (f"  failures={failures}" if failures else ""))
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,113 @@
+"""Reservation benchmark: add_to_cart latency as active holds grow
+
+Seeds an increasing number of active holds (half of them on one hot
+product) and times CartService.add_to_cart with reservations enabled,
+then times one sweeper pass releasing all of them once expired.
+
+Usage:
+    python benchmarks/reservations.py [--holds 0,10000,50000] [--samples 500]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("DEBUG", "false")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp}/holds.db"
+os.environ["RESERVATIONS_ENABLED"] = "true"
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import delete, update
+
+import app.models  # noqa: F401  (register all mappers)
+from app.core.database import create_tables, engine, session_scope
+from app.models.cart import CartItem
+from app.models.reservation import StockHold, StockHoldTotal
+from app.services.cart_service import CartService
+from app.services.reservation_service import ReservationSweeper
+
+PRODUCTS = 1000
+HOT_PRODUCT = 1
+
+def seed_catalog():
+    """Create products with plenty of stock and carts for the holders"""
+    create_tables()
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        cursor.execute("INSERT INTO categories(name, created_at) VALUES ('Bench', CURRENT_TIMESTAMP)")
+        cursor.executemany(
+            "INSERT INTO products(name, price, stock, category_id, created_at, updated_at) "
+            "VALUES (?, 10, 10000000, 1, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)",
+            [(f"Product {i}",) for i in range(PRODUCTS)]
+        )
+        raw.commit()
+    finally:
+        raw.close()
+
+def seed_holds(count):
+    """Replace all holds with `count` active ones, half on the hot product"""
+    expires = datetime.utcnow() + timedelta(hours=1)
+    rng = random.Random(1)
+    with session_scope() as db:
+        db.execute(delete(StockHold))
+        db.execute(delete(StockHoldTotal))
+        db.execute(delete(CartItem))
+        db.commit()
+        raw = db.connection().connection
+        raw.executemany(
+            "INSERT INTO carts(id, user_id, created_at, updated_at) VALUES (?, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP) "
+            "ON CONFLICT(id) DO NOTHING",
+            [(cart_id, cart_id) for cart_id in range(1, count + 1)]
+        )
+        raw.executemany(
+            "INSERT INTO stock_holds(cart_id, product_id, quantity, expires_at, created_at) "
+            "VALUES (?, ?, 1, ?, CURRENT_TIMESTAMP)",
+            [(cart_id, HOT_PRODUCT if cart_id % 2 else rng.randint(2, PRODUCTS), expires)
+             for cart_id in range(1, count + 1)]
+        )
+        raw.execute(
+            "INSERT INTO stock_hold_totals(product_id, quantity) "
+            "SELECT product_id, SUM(quantity) FROM stock_holds GROUP BY product_id"
+        )
+        db.commit()
+
+def time_add_to_cart(samples, holds):
+    """Median and p99 add_to_cart latency for fresh users on the hot product"""
+    timings = []
+    for i in range(samples):
+        user_id = 10_000_000 + holds + i
+        start = time.perf_counter()
+        with session_scope() as db:
+            CartService(db).add_to_cart(user_id, HOT_PRODUCT, 1)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.99) - 1]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--holds", default="0,10000,50000")
+    parser.add_argument("--samples", type=int, default=500)
+    args = parser.parse_args()
+
+    seed_catalog()
+    for count in [int(c) for c in args.holds.split(",")]:
+        seed_holds(count)
+        median, p99 = time_add_to_cart(args.samples, count)
+        print(f"active holds={count:>7,}  add_to_cart median={median:.2f}ms  p99={p99:.2f}ms")
+
+    with session_scope() as db:
+        db.execute(update(StockHold).values(expires_at=datetime.utcnow() - timedelta(seconds=1)))
+        db.commit()
+    start = time.perf_counter()
+    released = ReservationSweeper(batch_size=500).sweep()
+    print(f"sweeper released {released:,} expired holds in {time.perf_counter() - start:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""Sales analytics benchmark: building and querying per-day sales totals over millions of order lines
+
+Generates synthetic orders with three lines each inside SQLite, then builds
+the sales analytics buckets from scratch. It times report queries on the
+cached buckets and tops them up with a burst of new orders. It compares the
+results and times with a SQL GROUP BY over the same range, and with a loop
+over ORM order items measured on a sample.
+
+Usage:
+    python benchmarks/sales_analytics.py [--lines 10000000] [--days 730]
+"""
+import argparse
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("DEBUG", "false")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp}/sales_analytics.db"
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import select, text
+from sqlalchemy.orm import joinedload
+
+import app.models  # noqa: F401  (register all mappers)
+from app.core.database import create_tables, engine, session_scope
+from app.models.order import Order, OrderItem
+from app.services.sales_analytics import SalesAnalytics
+
+PRODUCTS = 2000
+CATEGORIES = 12
+USERS = 50_000
+LINES_PER_ORDER = 3
+START = date(2024, 1, 1)
+
+def seed(orders, days, first_order=1):
+    """Orders `first_order`.. spread evenly over `days` days, with three distinct products each"""
+    seconds = days * 86400
+    with engine.begin() as connection:
+        connection.execute(text(f"""
+            WITH RECURSIVE seq(x) AS (SELECT {first_order} UNION ALL SELECT x + 1 FROM seq WHERE x < {first_order + orders - 1})
+            INSERT INTO orders(id, user_id, total, status, created_at, updated_at, item_count, summary)
+            SELECT x, abs(random()) % {USERS} + 1, 0, 'pending',
+                   datetime('{START}', '+' || (x * {seconds} / {first_order + orders}) || ' seconds'),
+                   datetime('{START}', '+' || (x * {seconds} / {first_order + orders}) || ' seconds'),
+                   0, ''
+            FROM seq
+        """))
+        connection.execute(text(f"""
+            WITH RECURSIVE line(k) AS (SELECT 0 UNION ALL SELECT k + 1 FROM line WHERE k < {LINES_PER_ORDER - 1})
+            INSERT INTO order_items(order_id, product_id, quantity, price, created_at)
+            SELECT o.id, (o.id * 7 + line.k * 131) % {PRODUCTS} + 1, abs(random()) % 3 + 1,
+                   (abs(random()) % 398000 + 1900) / 100.0, o.created_at
+            FROM orders AS o, line
+            WHERE o.id >= {first_order}
+        """))
+
+def seed_catalog():
+    """Categories and products; order lines read their category through the product"""
+    create_tables()
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        cursor.executemany(
+            "INSERT INTO categories(name, created_at) VALUES (?, CURRENT_TIMESTAMP)",
+            [(f"Category {i}",) for i in range(CATEGORIES)]
+        )
+        cursor.executemany(
+            "INSERT INTO products(name, description, price, stock, category_id, created_at, updated_at) "
+            "VALUES (?, 'Synthetic product', 100, 1000, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)",
+            [(f"Product {i}", i % CATEGORIES + 1) for i in range(PRODUCTS)]
+        )
+        raw.commit()
+    finally:
+        raw.close()
+
+def sql_by_category(first, last):
+    """The same category totals with a SQL GROUP BY over the order lines"""
+    with engine.connect() as connection:
+        return {
+            category_id: (Decimal(cents).scaleb(-2), units, orders)
+            for category_id, cents, units, orders in connection.execute(text("""
+                SELECT p.category_id, SUM(CAST(ROUND(oi.price * 100) AS INTEGER) * oi.quantity),
+                       SUM(oi.quantity), COUNT(DISTINCT oi.order_id)
+                FROM order_items AS oi
+                JOIN orders AS o ON o.id = oi.order_id
+                JOIN products AS p ON p.id = oi.product_id
+                WHERE o.created_at >= :first AND o.created_at < :last
+                GROUP BY p.category_id
+            """), {"first": str(first), "last": str(last + timedelta(days=1))})
+        }
+
+def orm_loop(sample_orders):
+    """Category revenue by looping over ORM order items of the first `sample_orders` orders; returns seconds"""
+    start = time.perf_counter()
+    with session_scope() as db:
+        revenue = {}
+        orders = db.execute(
+            select(Order).where(Order.id <= sample_orders)
+            .options(joinedload(Order.items).joinedload(OrderItem.product))
+        ).unique().scalars()
+        for order in orders:
+            for item in order.items:
+                category_id = item.product.category_id
+                revenue[category_id] = revenue.get(category_id, 0) + item.price * item.quantity
+    return time.perf_counter() - start
+
+def timed(call, repeats=20):
+    """Median milliseconds of `repeats` calls"""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=10_000_000)
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--chunk-orders", type=int, default=100_000)
+    parser.add_argument("--new-orders", type=int, default=1000, help="orders placed after the first build")
+    parser.add_argument("--orm-sample", type=int, default=20_000, help="orders the ORM loop reads")
+    args = parser.parse_args()
+    orders = args.lines // LINES_PER_ORDER
+    
+    start = time.perf_counter()
+    seed_catalog()
+    seed(orders, args.days)
+    print(f"seeded {orders * LINES_PER_ORDER:,} order lines in {orders:,} orders over {args.days} days "
+          f"in {time.perf_counter() - start:.0f} s")
+    
+    analytics = SalesAnalytics(chunk_orders=args.chunk_orders, refresh_seconds=10**9)
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    lines = analytics.refresh()
+    elapsed = time.perf_counter() - start
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    stats = analytics.stats()
+    print(f"full build: {lines:,} lines in {elapsed:.1f} s ({lines / elapsed / 1e6:.2f}M lines/s), "
+          f"{stats['days']} day buckets, {stats['bytes'] / 2**20:.1f} MiB of buckets, "
+          f"peak RSS +{(rss_after - rss_before) / 1024:.0f} MiB")
+    
+    last = START + timedelta(days=args.days - 1)
+    year = (last - timedelta(days=364), last)
+    print(f"{'report (cached buckets)':<34} {'median':>10}")
+    for name, call in [
+        ("revenue by day, last 30 days", lambda: analytics.by_day(last - timedelta(days=29), last)),
+        ("revenue by day, last 365 days", lambda: analytics.by_day(*year)),
+        ("by category, last 365 days", lambda: analytics.by_category(*year)),
+        ("top 20 products, last 365 days", lambda: analytics.by_product(*year)),
+        ("top 20 products, all days", lambda: analytics.by_product(START, last)),
+    ]:
+        print(f"{name:<34} {timed(call):>8.2f}ms")
+    
+    start = time.perf_counter()
+    expected = sql_by_category(*year)
+    sql_seconds = time.perf_counter() - start
+    rows = analytics.by_category(*year)
+    matches = all(expected[row.key] == (row.revenue, row.units, row.orders) for row in rows) and len(rows) == len(expected)
+    print(f"SQL GROUP BY, by category, last 365 days: {sql_seconds * 1000:,.0f} ms; "
+          f"analytics totals {'match' if matches else 'DO NOT match'}")
+    
+    sample = min(args.orm_sample, orders)
+    orm_seconds = orm_loop(sample)
+    print(f"ORM loop over {sample * LINES_PER_ORDER:,} lines: {orm_seconds:.1f} s, "
+          f"about {orm_seconds * orders / sample / 60:.0f} min for all lines")
+    
+    seed(args.new_orders, args.days, first_order=orders + 1)
+    start = time.perf_counter()
+    added = analytics.refresh()
+    print(f"incremental refresh: {added:,} new lines in {(time.perf_counter() - start) * 1000:.1f} ms")
+    start = time.perf_counter()
+    analytics.refresh()
+    print(f"refresh with no new orders: {(time.perf_counter() - start) * 1000:.2f} ms")
+    
+    top = analytics.by_category(*year)[0]
+    print(f"top category last 365 days: {top.label}, revenue {top.revenue:,}, {top.units:,} units, "
+          f"{top.orders:,} orders, AOV {top.average_order_value}")
+    if not matches:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Search benchmark: legacy ILIKE scan vs. the FTS5 index
+
+Builds synthetic catalogs of increasing size and times a fixed set of
+search terms through the original `name ILIKE '%q%' OR description ILIKE '%q%'`
+query and through `ProductService.search_products_with_snippets`.
+
+Usage:
+    python benchmarks/search_fts.py [--sizes 10000,100000,1000000] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+os.environ.setdefault("DEBUG", "false")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.database import Base, create_db_engine
+from app.core.search_index import create_product_search_index, rebuild_search_terms
+from app.models.product import Product
+from app.services.product_service import ProductService
+import app.models  # noqa: F401  (register all mappers)
+
+FAMILIES = ["iPhone", "iPad", "MacBook", "iMac", "Watch", "AirPods", "HomePod", "Vision", "Magic", "MagSafe"]
+MODIFIERS = ["Pro", "Air", "Max", "Mini", "Ultra", "SE", "Plus", "Studio", "Sport", "Classic"]
+WORDS = ["titanium", "display", "chip", "camera", "battery", "wireless", "retina", "keyboard",
+         "charger", "silicone", "leather", "aluminium", "graphite", "midnight", "starlight",
+         "performance", "audio", "spatial", "noise", "cancellation", "portable", "compact"]
+CATEGORIES = ["iPhone", "iPad", "Mac", "Apple Watch", "AirPods", "Accessories", "Home", "Vision"]
+TERMS = ["macbook", "titanium", "watch ultra", "spatial audio", "accessories", "iphone pro max", "zzz"]
+
+PRODUCT_INSERT = (
+    "INSERT INTO products(name, description, price, stock, category_id, created_at, updated_at) "
+    "VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)"
+)
+
+def build_catalog(engine, size):
+    """Create schema and insert `size` synthetic products"""
+    Base.metadata.create_all(bind=engine)
+    create_product_search_index(engine)
+    rng = random.Random(42)
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        cursor.executemany(
+            "INSERT INTO categories(name, description, created_at) VALUES (?, ?, CURRENT_TIMESTAMP)",
+            [(name, f"{name} products") for name in CATEGORIES]
+        )
+        rows = []
+        for i in range(size):
+            name = f"{rng.choice(FAMILIES)} {rng.choice(MODIFIERS)} {i}"
+            description = " ".join(rng.choices(WORDS, k=12))
+            rows.append((name, description, rng.randint(19, 3999), rng.randint(0, 200),
+                         rng.randint(1, len(CATEGORIES))))
+            if len(rows) == 50_000:
+                cursor.executemany(
+                    PRODUCT_INSERT,
+                    rows
+                )
+                rows.clear()
+        if rows:
+            cursor.executemany(
+                PRODUCT_INSERT,
+                rows
+            )
+        raw.commit()
+    finally:
+        raw.close()
+    # Raw inserts bypass the ORM hooks that add new words to the typo-tolerance vocabulary
+    with engine.begin() as connection:
+        rebuild_search_terms(connection)
+
+def legacy_search(db, query):
+    """The original unindexed search query"""
+    search_query = select(Product).where(
+        Product.name.ilike(f"%{query}%") |
+        Product.description.ilike(f"%{query}%")
+    )
+    return list(db.execute(search_query).scalars().all())
+
+def time_ms(fn, repeat):
+    """Median wall time of `fn` in milliseconds"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for size in [int(s) for s in args.sizes.split(",")]:
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_db_engine(f"sqlite:///{tmp}/search.db")
+            start = time.perf_counter()
+            build_catalog(engine, size)
+            print(f"\n{size:,} products (built in {time.perf_counter() - start:.1f}s)")
+            print(f"{'query':>16} {'LIKE ms':>10} {'FTS5 ms':>10} {'LIKE rows':>10}")
+            with Session(engine) as db:
+                service = ProductService(db)
+                for term in TERMS:
+                    like_ms = time_ms(lambda: db.expunge_all() or legacy_search(db, term), args.repeat)
+                    fts_ms = time_ms(lambda: db.expunge_all() or service.search_products_with_snippets(term), args.repeat)
+                    rows = len(legacy_search(db, term))
+                    print(f"{term:>16} {like_ms:>10.2f} {fts_ms:>10.2f} {rows:>10}")
+            engine.dispose()
+
+if __name__ == "__main__":
+    main()
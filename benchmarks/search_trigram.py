@@ -0,0 +1,94 @@
+"""Typo-tolerant search benchmark: trigram term index on large catalogs
+
+Builds the synthetic catalogs of `search_fts.py` (FTS5 filled by triggers as
+rows are inserted, then the trigram term index) and times misspelled
+queries through `ProductService.search_products_with_snippets`, next to the
+exact-spelling queries that never touch the term index. Also times adding
+products that bring new words, which the ORM flush indexes incrementally, and the
+similar-word lookup as the vocabulary grows.
+
+Usage:
+    python benchmarks/search_trigram.py [--sizes 100000,1000000] [--repeat 5] [--vocabulary 10000,100000,500000]
+"""
+import argparse
+import random
+import tempfile
+import time
+
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+
+from search_fts import build_catalog, time_ms
+from app.core.database import create_db_engine
+from app.core.search_index import TERMS_TABLE, TRIGRAMS_TABLE, add_search_terms, similar_terms
+from app.models.product import Product
+from app.services.product_service import ProductService
+
+QUERY_WORDS = ["macbok", "airpod", "ipone", "titainum", "wirless", "chargr", "retna", "dispaly"]
+QUERIES = ["macbok", "airpod", "ipone", "titainum", "wirless chargr", "retna dispaly", "macbook", "zzzz"]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="100000,1000000")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--vocabulary", default="10000,100000,500000")
+    args = parser.parse_args()
+
+    for size in [int(s) for s in args.sizes.split(",")]:
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_db_engine(f"sqlite:///{tmp}/search.db")
+            start = time.perf_counter()
+            build_catalog(engine, size)
+            build_seconds = time.perf_counter() - start
+            with Session(engine) as db:
+                terms = db.execute(text(f"SELECT count(*) FROM {TERMS_TABLE}")).scalar()
+                trigrams = db.execute(text(f"SELECT count(*) FROM {TRIGRAMS_TABLE}")).scalar()
+                print(f"\n{size:,} products (built in {build_seconds:.1f}s), "
+                      f"{terms:,} indexed words, {trigrams:,} trigram rows")
+                print(f"{'query':>16} {'ms':>8} {'hits':>6}  top result")
+                service = ProductService(db)
+                for query in QUERIES:
+                    ms = time_ms(lambda: db.expunge_all() or service.search_products_with_snippets(query), args.repeat)
+                    hits = service.search_products_with_snippets(query)
+                    top = hits[0].product.name if hits else "-"
+                    print(f"{query:>16} {ms:>8.2f} {len(hits):>6}  {top}")
+
+                # Incremental updates: new products bringing new words
+                rng = random.Random(16)
+                next_id = db.execute(select(func.max(Product.id))).scalar() + 1
+                start = time.perf_counter()
+                for i in range(1000):
+                    db.add(Product(
+                        name=f"Gizmo{rng.randint(0, 10**6)} {next_id + i}",
+                        description=f"novelword{i} accessory",
+                        price=1,
+                        stock=1,
+                        category_id=1
+                    ))
+                    db.flush()
+                db.commit()
+                per_insert = (time.perf_counter() - start) / 1000 * 1000
+                print(f"insert with new words: {per_insert:.2f} ms per product; "
+                      f"'novelwrd500' -> {service.search_products('novelwrd500')[0].description}")
+            engine.dispose()
+
+    # The term lookup scales with vocabulary size, not catalog size: grow the vocabulary with random words
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{tmp}/vocabulary.db")
+        build_catalog(engine, 1000)
+        rng = random.Random(17)
+        letters = "abcdefghijklmnopqrstuvwxyz"
+        with Session(engine) as db:
+            print(f"\n{'vocabulary':>10} {'similar_terms ms':>17}")
+            for vocabulary in args.vocabulary.split(","):
+                target = int(vocabulary)
+                while db.execute(text(f"SELECT count(*) FROM {TERMS_TABLE}")).scalar() < target:
+                    words = ["".join(rng.choices(letters, k=rng.randint(4, 11))) for _ in range(10_000)]
+                    add_search_terms(db.connection(), words)
+                    db.commit()
+                ms = time_ms(lambda: [similar_terms(db, word) for word in QUERY_WORDS], args.repeat) / len(QUERY_WORDS)
+                print(f"{target:>10,} {ms:>17.2f}")
+        engine.dispose()
+
+if __name__ == "__main__":
+    main()
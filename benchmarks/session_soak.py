@@ -0,0 +1,62 @@
+"""Session soak: drive AppState interactions and watch sessions and memory
+
+Each simulated request opens a unit of work the same way a page render does,
+builds the session's AppState and calls the methods a page would. Every
+`--sample` requests the script prints the open-session count, the states held
+by NiceGUI's binding registry and the traced Python heap, which should all
+stay flat for the whole run.
+
+Usage:
+    python benchmarks/session_soak.py [--requests 100000] [--sample 10000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("DEBUG", "false")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp}/soak.db"
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from nicegui import binding
+
+from app.core.database import create_tables, init_sample_data, session_scope, get_session_stats
+from app.ui.state import AppState
+
+# Cards a products page render fills
+WINDOW = 24
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=100_000)
+    parser.add_argument("--sample", type=int, default=10_000)
+    args = parser.parse_args()
+
+    create_tables()
+    init_sample_data()
+    session_key = "soak"
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    for i in range(1, args.requests + 1):
+        with session_scope():
+            # A fresh state per request, as every page load builds one
+            app_state = AppState(session_key)
+            app_state.get_categories()
+            app_state.count_products()
+            app_state.get_products_window(None, 0, WINDOW)
+            app_state.get_cart()
+        if i % args.sample == 0:
+            current, _ = tracemalloc.get_traced_memory()
+            stats = get_session_stats()
+            print(f"{i:>8} requests  open_sessions={stats['open']}  "
+                  f"opened_total={stats['opened_total']}  bindable_properties={len(binding.bindable_properties)}  "
+                  f"heap={current / 1024:.0f} KiB  "
+                  f"elapsed={time.perf_counter() - start:.1f}s")
+
+if __name__ == "__main__":
+    main()
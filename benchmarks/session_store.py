@@ -0,0 +1,119 @@
+"""Session store benchmark: memory per idle session, access latency and eviction
+
+Fills each backend with idle browser sessions (a signed-in user, sometimes a
+category filter or short search) and reports the memory they hold per 10k
+sessions: traced Python heap for the in-process backend, file size for the
+SQLite backend. Then times get/put on the full store and checks that the
+entry and byte ceilings hold while twice as many sessions churn through.
+
+Usage:
+    python benchmarks/session_store.py [--sessions 100000]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from pathlib import Path
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("DEBUG", "false")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp}/sessions_bench.db"
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core.security import create_session_token
+from app.core.session_store import ClientSession, MemorySessionStore, SqliteSessionStore
+
+TOKEN = create_session_token(1)
+
+def make_session(rng):
+    """An idle session as the UI leaves it"""
+    roll = rng.random()
+    auth_token = create_session_token(rng.randint(1, 10**6))
+    if roll < 0.6:
+        return ClientSession(auth_token=auth_token)
+    if roll < 0.9:
+        return ClientSession(auth_token=auth_token, selected_category=rng.randint(1, 8), product_sort="price")
+    return ClientSession(auth_token=auth_token, search_query=f"iphone {rng.randint(1, 999)}")
+
+def session_keys(count):
+    """Keys shaped like NiceGUI's browser ids"""
+    return [str(uuid.uuid4()) for _ in range(count)]
+
+def time_calls(func, keys, rng, samples=20000):
+    """Median and p99 microseconds of func over random keys"""
+    timings = []
+    for _ in range(samples):
+        key = rng.choice(keys)
+        start = time.perf_counter()
+        func(key)
+        timings.append((time.perf_counter() - start) * 1e6)
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.99)]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=100_000)
+    args = parser.parse_args()
+    per = args.sessions / 10_000
+    rng = random.Random(14)
+    keys = session_keys(args.sessions)
+    sessions = [make_session(rng) for _ in keys]
+
+    # In-process backend: heap held by the store, keys and session tuples included
+    store = MemorySessionStore(max_entries=10**9, max_bytes=10**12, ttl_seconds=3600)
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    for key, session in zip(keys, sessions):
+        store.put(key, session)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # The key and session objects were built before tracing, so add what they hold
+    outside = sum(sys.getsizeof(key) for key in keys) + sum(
+        sys.getsizeof(session) + sys.getsizeof(session.auth_token) + sys.getsizeof(session.search_query)
+        for session in sessions
+    )
+    measured = current - baseline + outside
+    print(f"memory: {args.sessions} sessions, heap {measured / per / 1024:.0f} KiB per 10k, "
+          f"estimated {store.stats()['bytes'] / per / 1024:.0f} KiB per 10k")
+    get_median, get_p99 = time_calls(store.get, keys, rng)
+    put_median, put_p99 = time_calls(lambda key: store.put(key, ClientSession(auth_token=TOKEN)), keys, rng)
+    print(f"memory: get {get_median:.2f} / {get_p99:.2f} us, put {put_median:.2f} / {put_p99:.2f} us (median / p99)")
+
+    # Ceilings: churn twice the bound through a small store
+    bounded = MemorySessionStore(max_entries=args.sessions // 2, max_bytes=store.stats()["bytes"] // 4, ttl_seconds=3600)
+    for key, session in zip(keys, sessions):
+        bounded.put(key, session)
+    stats = bounded.stats()
+    print(f"memory, bounded: {stats['entries']} entries, {stats['bytes'] / 1024:.0f} KiB "
+          f"(ceiling {bounded.max_bytes / 1024:.0f} KiB), {stats['evictions']} evictions")
+
+    # SQLite backend: one file shared by worker processes
+    path = f"{_tmp}/sessions.db"
+    store = SqliteSessionStore(path, max_entries=10**9, ttl_seconds=3600)
+    connection = store._connection()
+    start = time.perf_counter()
+    for key, session in zip(keys, sessions):
+        store.put(key, session)
+    fill_seconds = time.perf_counter() - start
+    connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    size = os.path.getsize(path)
+    print(f"sqlite: {args.sessions} sessions, file {size / per / 1024:.0f} KiB per 10k, "
+          f"filled at {args.sessions / fill_seconds:,.0f} puts/s")
+    get_median, get_p99 = time_calls(store.get, keys, rng)
+    put_median, put_p99 = time_calls(lambda key: store.put(key, ClientSession(auth_token=TOKEN)), keys, rng)
+    print(f"sqlite: get {get_median:.2f} / {get_p99:.2f} us, put {put_median:.2f} / {put_p99:.2f} us (median / p99)")
+
+    bounded = SqliteSessionStore(f"{_tmp}/bounded.db", max_entries=args.sessions // 2, ttl_seconds=3600)
+    for key, session in zip(keys, sessions):
+        bounded.put(key, session)
+    bounded.sweep()
+    stats = bounded.stats()
+    print(f"sqlite, bounded: {stats['entries']} entries (ceiling {bounded.max_entries}), {stats['evictions']} evictions")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Type-ahead suggestion benchmark: prefix index build, lookup latency and updates
+
+Builds the suggestion index over a synthetic catalog of Apple-style product
+names and times `suggest()` for short, long, multi-word, inner-word and
+non-matching prefixes, plus incremental adds and renames as catalog writes
+would apply them.
+
+Usage:
+    python benchmarks/suggestions.py [--products 1000000] [--lookups 2000]
+"""
+import argparse
+import os
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("DEBUG", "false")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp}/suggestions.db"
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.suggestion_index import SuggestionIndex
+
+FAMILIES = ["iPhone", "iPad", "MacBook", "iMac", "Apple Watch", "AirPods", "HomePod", "Mac mini", "Vision"]
+MODELS = ["", "Pro", "Pro Max", "Air", "mini", "Ultra", "Series", "SE", "Studio", "Plus"]
+COLORS = ["Black", "Silver", "Blue", "Starlight", "Midnight", "Titanium", "Gold", "Green", "Pink"]
+CATEGORIES = ["iPhone", "iPad", "Mac", "Apple Watch", "AirPods", "Accessories", "Home", "Vision"]
+
+def product_names(count, rng):
+    """Names like 'iPhone 15 Pro Max 256GB Blue 8123'"""
+    for product_id in range(1, count + 1):
+        parts = [rng.choice(FAMILIES), str(rng.randint(1, 16)), rng.choice(MODELS),
+                 f"{rng.choice([64, 128, 256, 512, 1024])}GB", rng.choice(COLORS), str(product_id)]
+        yield product_id, " ".join(part for part in parts if part)
+
+def resident_bytes():
+    """Current resident set size of this process"""
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+def time_lookups(index, query, lookups):
+    """Median and p99 milliseconds of suggest(query)"""
+    timings = []
+    for _ in range(lookups):
+        start = time.perf_counter()
+        results = index.suggest(query)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.99)], len(results)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--products", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(15)
+    products = list(product_names(args.products, rng))
+    categories = list(enumerate(CATEGORIES, start=1))
+
+    index = SuggestionIndex()
+    before = resident_bytes()
+    start = time.perf_counter()
+    index.build(products, categories)
+    build_seconds = time.perf_counter() - start
+    stats = index.stats()
+    print(f"build: {stats['products']:,} products, {stats['entries']:,} entries in {build_seconds:.1f}s, "
+          f"resident +{(resident_bytes() - before) / 2**20:.0f} MiB, "
+          f"peak process {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MiB")
+
+    print(f"{'query':<22} {'median ms':>10} {'p99 ms':>8} {'results':>8}")
+    for query in ["i", "ip", "iphone 15 pro", "macbook 14 air", "titan", "pro max", "zzz"]:
+        median, p99, results = time_lookups(index, query, args.lookups)
+        print(f"{query!r:<22} {median:>10.3f} {p99:>8.3f} {results:>8}")
+
+    # Incremental updates, as applied after catalog commits
+    timings = []
+    for product_id, name in product_names(1000, random.Random(16)):
+        start = time.perf_counter()
+        index.add_product(args.products + product_id, name)
+        timings.append((time.perf_counter() - start) * 1000)
+    print(f"add product: median {statistics.median(timings):.3f} ms, max {max(timings):.3f} ms")
+    timings = []
+    for product_id in range(1, 1001):
+        start = time.perf_counter()
+        index.add_product(product_id, f"Renamed Product {product_id}")
+        timings.append((time.perf_counter() - start) * 1000)
+    print(f"rename product: median {statistics.median(timings):.3f} ms, max {max(timings):.3f} ms")
+
+if __name__ == "__main__":
+    main()
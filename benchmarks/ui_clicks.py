@@ -0,0 +1,138 @@
+"""UI click benchmark: bytes on the wire and server time, in-place update vs page reload
+
+Renders the cart and products pages headlessly inside NiceGUI clients and
+clicks through them: cart quantity +/- and remove, product category filter
+and search. Each click is measured as the websocket diff its handler queues
+in place, against rebuilding the whole page as a `ui.navigate.to` reload did.
+
+Usage:
+    python benchmarks/ui_clicks.py [--lines 20] [--clicks 200]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("DEBUG", "false")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp}/clicks.db"
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from nicegui import ui, Client
+from sqlalchemy import select
+
+import app.models  # noqa: F401  (register all mappers)
+from app.core.database import create_tables, engine, init_sample_data, session_scope
+from app.core.executor import run_blocking
+from app.models.product import Product
+from app.ui.state import AppState
+from app.ui.components.navigation import Navigation
+from app.ui.pages.cart import CartPage
+from app.ui.pages.products import ProductsPage
+
+def seed(products):
+    """Create the sample catalog plus extra stocked products"""
+    create_tables()
+    init_sample_data()
+    raw = engine.raw_connection()
+    try:
+        raw.cursor().executemany(
+            "INSERT INTO products(name, description, price, stock, category_id, created_at, updated_at) "
+            "VALUES (?, 'Synthetic product', 99, 100000, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)",
+            [(f"Product {i}", i % 4 + 1) for i in range(products)]
+        )
+        raw.commit()
+    finally:
+        raw.close()
+
+def wire_bytes(client):
+    """Size of the queued element updates and messages, as the outbox would send them"""
+    updates = {
+        element_id: None if element is None else element._to_dict()
+        for element_id, element in client.outbox.updates.items()
+    }
+    size = len(json.dumps(updates, default=str)) + len(json.dumps(list(client.outbox.messages), default=str))
+    client.outbox.updates.clear()
+    client.outbox.messages.clear()
+    return size
+
+async def build(create_page, app_state):
+    """Build a full page the way its route does; returns (client, page, bytes, ms)"""
+    client = Client(ui.page("/bench"), request=None)
+    start = time.perf_counter()
+    with client:
+        Navigation(app_state)
+        page = await create_page()
+    ms = (time.perf_counter() - start) * 1000
+    size = len(json.dumps({element.id: element._to_dict() for element in client.elements.values()}, default=str))
+    client.outbox.updates.clear()
+    client.outbox.messages.clear()
+    return client, page, size, ms
+
+async def click(client, handler):
+    """Run a click handler in the client; returns (bytes, ms)"""
+    start = time.perf_counter()
+    with client:
+        await handler()
+    ms = (time.perf_counter() - start) * 1000
+    return wire_bytes(client), ms
+
+def report(name, clicks, reload_bytes, reload_ms):
+    """Print median in-place cost next to the cost of a full reload"""
+    sizes = [size for size, _ in clicks]
+    timings = [ms for _, ms in clicks]
+    print(f"{name:<22} in place: {statistics.median(sizes):>7.0f} B  {statistics.median(timings):6.2f} ms   "
+          f"reload: {reload_bytes:>7} B  {reload_ms:6.2f} ms")
+
+async def create_cart_page(app_state):
+    """Cart page as its route builds it"""
+    return CartPage(app_state, await run_blocking(app_state.get_cart))
+
+async def create_products_page(app_state):
+    """Products page as its route builds it"""
+    page = ProductsPage(app_state, await run_blocking(app_state.get_categories))
+    await page.refresh_products()
+    return page
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=20)
+    parser.add_argument("--clicks", type=int, default=200)
+    args = parser.parse_args()
+
+    seed(1000)
+    app_state = AppState()
+    with session_scope() as db:
+        product_ids = db.execute(select(Product.id).limit(args.lines)).scalars().all()
+    for product_id in product_ids:
+        await app_state.add_to_cart_async(product_id, 2)
+
+    # Cart: quantity up and down on every line, then remove lines
+    client, page, reload_bytes, reload_ms = await build(lambda: create_cart_page(app_state), app_state)
+    increases, decreases = [], []
+    for i in range(args.clicks):
+        line = page.lines[product_ids[i % len(product_ids)]]
+        increases.append(await click(client, lambda: page._increase_quantity(line.product_id, line.quantity)))
+        decreases.append(await click(client, lambda: page._decrease_quantity(line.product_id, line.quantity)))
+    removals = [await click(client, lambda: page._remove_item(product_id)) for product_id in product_ids[:-1]]
+    report("cart: quantity +", increases, reload_bytes, reload_ms)
+    report("cart: quantity -", decreases, reload_bytes, reload_ms)
+    report("cart: remove line", removals, reload_bytes, reload_ms)
+
+    # Products: switch category filter and search
+    client, page, reload_bytes, reload_ms = await build(lambda: create_products_page(app_state), app_state)
+    filters = [await click(client, lambda: page._filter_by_category(i % 5 or None)) for i in range(args.clicks)]
+    report("products: category", filters, reload_bytes, reload_ms)
+    searches = []
+    for i in range(args.clicks):
+        app_state.search_query = f"Product {i}"
+        searches.append(await click(client, page.refresh_products))
+    report("products: search", searches, reload_bytes, reload_ms)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,114 @@
+"""Signed-in page view benchmark: users table queries and latency per view
+
+Seeds users and signs sessions in with signed tokens, then loads each
+session's `AppState` the way every page view does. Counts the statements
+that read the users table per view and times the view, both with the user
+cache and with it cleared before every view, which matches the previous
+behaviour of reading the user on every view. Then deactivates a user
+and checks that their next view no longer resolves to them.
+
+Usage:
+    python benchmarks/user_cache.py [--users 10000] [--views 20000]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("DEBUG", "false")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp}/user_cache.db"
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import app.models  # noqa: F401  (register all mappers)
+from sqlalchemy import event
+from app.core.database import create_tables, engine, session_scope
+from app.core.security import create_session_token, read_session_token
+from app.core.session_store import ClientSession, MemorySessionStore
+from app.services.user_cache import user_cache
+from app.services.user_service import UserService
+from app.ui.state import AppState
+
+def seed(count):
+    """Insert `count` active users; their password hashes are never checked here"""
+    create_tables()
+    raw = engine.raw_connection()
+    try:
+        raw.cursor().executemany(
+            "INSERT INTO users(email, username, hashed_password, is_active, is_superuser, created_at, updated_at) "
+            "VALUES (?, ?, 'unused', 1, 0, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)",
+            [(f"user{i}@example.com", f"user{i}") for i in range(count)]
+        )
+        raw.commit()
+    finally:
+        raw.close()
+
+def summary(timings):
+    """Median and p99 of a list of milliseconds"""
+    timings = sorted(timings)
+    return f"median {statistics.median(timings):.3f} ms, p99 {timings[int(len(timings) * 0.99) - 1]:.3f} ms"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--views", type=int, default=20_000)
+    parser.add_argument("--sessions", type=int, default=1000, help="signed-in sessions viewing pages")
+    args = parser.parse_args()
+    seed(args.users)
+    rng = random.Random(20)
+    
+    user_statements = [0]
+    
+    @event.listens_for(engine, "before_cursor_execute")
+    def count_user_statement(conn, cursor, statement, *args):
+        if "FROM users" in statement:
+            user_statements[0] += 1
+    
+    store = MemorySessionStore(max_entries=10**6, max_bytes=10**9, ttl_seconds=3600)
+    keys = [f"session-{i}" for i in range(args.sessions)]
+    for key in keys:
+        store.put(key, ClientSession(auth_token=create_session_token(rng.randint(1, args.users))))
+    
+    print(f"users={args.users:,}  sessions={args.sessions:,}  views={args.views:,}")
+    for name, cached in [("reading the user per view", False), ("user cache", True)]:
+        user_cache.clear()
+        # Warm up: fills the user cache for the cached run
+        for key in keys:
+            AppState(key, store)
+        user_statements[0] = 0
+        timings = []
+        for _ in range(args.views):
+            if not cached:
+                user_cache.clear()
+            key = rng.choice(keys)
+            start = time.perf_counter()
+            app_state = AppState(key, store)
+            timings.append((time.perf_counter() - start) * 1000)
+            assert app_state.current_user is not None
+        print(f"{name:<26} {user_statements[0] / args.views:.2f} user queries/view, {summary(timings)}")
+    
+    token = create_session_token(1)
+    timings = []
+    for _ in range(args.views):
+        start = time.perf_counter()
+        read_session_token(token)
+        timings.append((time.perf_counter() - start) * 1000)
+    print(f"token verification: {summary(timings)}")
+    
+    # Deactivation reaches the cache on commit, well before its TTL
+    key = keys[0]
+    user_id = read_session_token(store.get(key).auth_token)[0]
+    assert AppState(key, store).current_user.id == user_id
+    with session_scope() as db:
+        user_service = UserService(db)
+        user_service.deactivate_user(user_id)
+    app_state = AppState(key, store)
+    resolved = app_state.current_user.id if app_state.current_user else None
+    print(f"after deactivating user {user_id}: next view resolves to {resolved}, cache {user_cache.stats()}")
+
+if __name__ == "__main__":
+    main()
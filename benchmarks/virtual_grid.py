@@ -0,0 +1,96 @@
+"""Virtualized grid benchmark: element count and update payload while scrolling
+
+Builds the products grid headlessly inside a NiceGUI client over a large
+synthetic catalog, then scrolls through it row by row. For each step it
+records how many elements the client holds and how many bytes of element
+updates would go over the websocket; both should stay constant.
+
+Usage:
+    python benchmarks/virtual_grid.py [--products 50000] [--steps 2000]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("DEBUG", "false")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp}/grid.db"
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from nicegui import ui, Client
+
+import app.models  # noqa: F401  (register all mappers)
+from app.core.database import create_tables, engine
+from app.ui.state import AppState
+from app.ui.components.virtual_product_grid import VirtualProductGrid
+
+def seed(count):
+    """Insert `count` synthetic products"""
+    create_tables()
+    rng = random.Random(7)
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        cursor.execute(
+            "INSERT INTO categories(name, description, created_at) VALUES ('Bench', 'Bench', CURRENT_TIMESTAMP)"
+        )
+        cursor.executemany(
+            "INSERT INTO products(name, description, price, stock, category_id, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, 1, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)",
+            [(f"Product {i}", "Synthetic product for grid benchmarks", rng.randint(19, 3999), rng.randint(0, 50))
+             for i in range(count)]
+        )
+        raw.commit()
+    finally:
+        raw.close()
+
+def payload_bytes(client):
+    """Size of the pending element updates, as the outbox would serialize them"""
+    data = {
+        element_id: None if element is None else element._to_dict()
+        for element_id, element in client.outbox.updates.items()
+    }
+    client.outbox.updates.clear()
+    return len(json.dumps(data, default=str))
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--products", type=int, default=50_000)
+    parser.add_argument("--steps", type=int, default=2000)
+    args = parser.parse_args()
+
+    seed(args.products)
+    app_state = AppState()
+    client = Client(ui.page("/bench"), request=None)
+    with client:
+        grid = VirtualProductGrid(app_state)
+        await grid.reset()
+    payload_bytes(client)
+
+    elements, payloads, timings = [], [], []
+    stride = max(1, grid.total_rows // args.steps)
+    for step in range(args.steps):
+        position = step * stride * grid.row_height
+        start = time.perf_counter()
+        with client:
+            await grid._handle_scroll(SimpleNamespace(args={"verticalPosition": position}))
+        timings.append((time.perf_counter() - start) * 1000)
+        elements.append(len(client.elements))
+        payloads.append(payload_bytes(client))
+
+    print(f"products={args.products:,}  rows={grid.total_rows:,}  steps={args.steps}  stride={stride} rows")
+    print(f"elements per client: min={min(elements)} max={max(elements)}")
+    print(f"update bytes per scroll step: min={min(payloads)} median={statistics.median(payloads):.0f} max={max(payloads)}")
+    print(f"server ms per scroll step: median={statistics.median(timings):.2f} "
+          f"p99={sorted(timings)[int(len(timings) * 0.99) - 1]:.2f}")
+
+if __name__ == "__main__":
+    asyncio.run(main())